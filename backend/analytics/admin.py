@@ -0,0 +1,87 @@
+import csv
+
+from django.contrib import admin
+from django.http import Http404, HttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .constants import REPORT_DEFAULT_PERIOD, REPORT_PERIODS
+from .models import RollupWatermark
+from .reports import REPORTS, period
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    """
+    Дашборд аналитики вместо списка сводок. Отчёты читают только
+    таблицы сводок, которые досчитывает команда rollup_analytics.
+    """
+    list_display = ('name', 'last_day', 'updated_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                'export/<str:report>/',
+                self.admin_site.admin_view(self.export_view),
+                name='analytics_export'
+            ),
+        ] + super().get_urls()
+
+    def get_period(self, request):
+        days = request.GET.get('days', '')
+        days = int(days) if days.isdigit() else REPORT_DEFAULT_PERIOD
+        if days not in REPORT_PERIODS:
+            days = REPORT_DEFAULT_PERIOD
+        return days, period(days)
+
+    def changelist_view(self, request, extra_context=None):
+        if not self.has_view_permission(request):
+            raise Http404
+        days, (first_day, last_day) = self.get_period(request)
+        reports = [
+            {
+                'key': key,
+                'title': title,
+                'columns': columns,
+                'rows': [[row[column] for column, _ in columns]
+                         for row in fetch(first_day, last_day)],
+            }
+            for key, (title, columns, fetch) in REPORTS.items()
+        ]
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Аналитика',
+            'days': days,
+            'periods': REPORT_PERIODS,
+            'first_day': first_day,
+            'last_day': last_day,
+            'reports': reports,
+            'watermarks': RollupWatermark.objects.all(),
+            **(extra_context or {}),
+        }
+        return TemplateResponse(
+            request, 'admin/analytics/dashboard.html', context)
+
+    def export_view(self, request, report):
+        if report not in REPORTS or not self.has_view_permission(request):
+            raise Http404
+        title, columns, fetch = REPORTS[report]
+        _, (first_day, last_day) = self.get_period(request)
+        response = HttpResponse(content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = (
+            f'attachment; filename="{report}-{first_day}-{last_day}.csv"')
+        writer = csv.writer(response)
+        writer.writerow([label for _, label in columns])
+        for row in fetch(first_day, last_day):
+            writer.writerow([row[column] for column, _ in columns])
+        return response
@@ -0,0 +1,11 @@
+# RollupWatermark
+ROLLUP_NAME_MAX_LENGTH = 32
+
+# Rollups
+ROLLUP_INITIAL_DAYS = 365
+ROLLUP_CHUNK_DAYS = 31
+
+# Reports
+REPORT_LIMIT = 20
+REPORT_PERIODS = (7, 30, 90, 365)
+REPORT_DEFAULT_PERIOD = 30
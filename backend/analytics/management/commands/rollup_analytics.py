@@ -0,0 +1,69 @@
+from argparse import ArgumentTypeError
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analytics.constants import ROLLUP_CHUNK_DAYS
+from analytics.models import RollupWatermark
+from analytics.rollup import ROLLUPS, earliest_day, run_rollup
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise ArgumentTypeError('ожидается целое число не меньше 1')
+    return number
+
+
+class Command(BaseCommand):
+    help = (
+        'Досчитывает дневные сводки аналитики от водяного знака '
+        'до сегодняшнего дня'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Пересчитать с этой даты (ГГГГ-ММ-ДД), например '
+                 'после исправления данных.'
+        )
+        parser.add_argument(
+            '--only',
+            choices=[name for name, _, _ in ROLLUPS],
+            action='append',
+            help='Считать только эти сводки.'
+        )
+        parser.add_argument(
+            '--chunk-days',
+            type=positive_int,
+            default=ROLLUP_CHUNK_DAYS,
+            help='Сколько дней пересчитывать в одной транзакции.'
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Удалить сводки и водяные знаки и посчитать заново: '
+                 'с --since или с первого дня исходных данных.'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('Дата ожидается в формате ГГГГ-ММ-ДД.')
+        for name, model, compute in ROLLUPS:
+            if options['only'] and name not in options['only']:
+                continue
+            first_day = since
+            if options['rebuild']:
+                model.objects.all().delete()
+                RollupWatermark.objects.filter(name=name).delete()
+                if first_day is None:
+                    first_day = earliest_day(name) or timezone.localdate()
+            days, rows = run_rollup(
+                name, model, compute, first_day, options['chunk_days'])
+            self.stdout.write(f'{name}: дней {days}, строк {rows}')
+        self.stdout.write(self.style.SUCCESS('Сводки обновлены.'))
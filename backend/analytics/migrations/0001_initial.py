@@ -0,0 +1,95 @@
+# Generated by Django 4.2.23 on 2026-10-19 09:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAuthorStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('author_id', models.PositiveBigIntegerField(verbose_name='ID автора')),
+                ('recipes', models.PositiveIntegerField(default=0, verbose_name='Рецептов')),
+                ('favorites', models.PositiveIntegerField(default=0, verbose_name='В избранное')),
+                ('subscribers', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+            ],
+            options={
+                'verbose_name': 'Автор за день',
+                'verbose_name_plural': 'Авторы по дням',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyIngredientStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('ingredient_id', models.PositiveBigIntegerField(verbose_name='ID ингредиента')),
+                ('recipes', models.PositiveIntegerField(default=0, verbose_name='Рецептов')),
+            ],
+            options={
+                'verbose_name': 'Ингредиент за день',
+                'verbose_name_plural': 'Ингредиенты по дням',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRecipeStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('recipe_id', models.PositiveBigIntegerField(verbose_name='ID рецепта')),
+                ('favorites', models.PositiveIntegerField(default=0, verbose_name='В избранное')),
+                ('shopping_carts', models.PositiveIntegerField(default=0, verbose_name='В корзину')),
+            ],
+            options={
+                'verbose_name': 'Рецепт за день',
+                'verbose_name_plural': 'Рецепты по дням',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySignups',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True, verbose_name='День')),
+                ('users', models.PositiveIntegerField(default=0, verbose_name='Регистраций')),
+            ],
+            options={
+                'verbose_name': 'Регистрации за день',
+                'verbose_name_plural': 'Регистрации по дням',
+                'ordering': ('-day',),
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32, unique=True, verbose_name='Сводка')),
+                ('last_day', models.DateField(verbose_name='Посчитано по')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Время расчёта')),
+            ],
+            options={
+                'verbose_name': 'Сводка',
+                'verbose_name_plural': 'Сводки',
+                'ordering': ('name',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrecipestats',
+            constraint=models.UniqueConstraint(fields=('day', 'recipe_id'), name='unique_daily_recipe'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyingredientstats',
+            constraint=models.UniqueConstraint(fields=('day', 'ingredient_id'), name='unique_daily_ingredient'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyauthorstats',
+            constraint=models.UniqueConstraint(fields=('day', 'author_id'), name='unique_daily_author'),
+        ),
+    ]
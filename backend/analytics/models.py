@@ -0,0 +1,128 @@
+from django.db import models
+
+from .constants import ROLLUP_NAME_MAX_LENGTH
+
+
+class RollupWatermark(models.Model):
+    """Последний закрытый день, до которого посчитана сводка."""
+    name = models.CharField(
+        max_length=ROLLUP_NAME_MAX_LENGTH,
+        unique=True,
+        verbose_name='Сводка'
+    )
+    last_day = models.DateField(verbose_name='Посчитано по')
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Время расчёта'
+    )
+
+    class Meta:
+        verbose_name = 'Сводка'
+        verbose_name_plural = 'Сводки'
+        ordering = ('name',)
+
+    def __str__(self):
+        return f'{self.name} по {self.last_day}'
+
+
+class DailySignups(models.Model):
+    """Регистрации за день."""
+    day = models.DateField(unique=True, verbose_name='День')
+    users = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Регистраций'
+    )
+
+    class Meta:
+        verbose_name = 'Регистрации за день'
+        verbose_name_plural = 'Регистрации по дням'
+        ordering = ('-day',)
+
+    def __str__(self):
+        return f'{self.day}: {self.users}'
+
+
+class DailyRecipeStats(models.Model):
+    """
+    Добавления рецепта в избранное и корзину за день. Id без внешних
+    ключей: история не зависит от удаления рецепта.
+    """
+    day = models.DateField(verbose_name='День')
+    recipe_id = models.PositiveBigIntegerField(verbose_name='ID рецепта')
+    favorites = models.PositiveIntegerField(
+        default=0,
+        verbose_name='В избранное'
+    )
+    shopping_carts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='В корзину'
+    )
+
+    class Meta:
+        verbose_name = 'Рецепт за день'
+        verbose_name_plural = 'Рецепты по дням'
+        constraints = (
+            models.UniqueConstraint(
+                fields=['day', 'recipe_id'],
+                name='unique_daily_recipe'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.day}: рецепт {self.recipe_id}'
+
+
+class DailyIngredientStats(models.Model):
+    """Число рецептов с ингредиентом среди опубликованных за день."""
+    day = models.DateField(verbose_name='День')
+    ingredient_id = models.PositiveBigIntegerField(
+        verbose_name='ID ингредиента'
+    )
+    recipes = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Рецептов'
+    )
+
+    class Meta:
+        verbose_name = 'Ингредиент за день'
+        verbose_name_plural = 'Ингредиенты по дням'
+        constraints = (
+            models.UniqueConstraint(
+                fields=['day', 'ingredient_id'],
+                name='unique_daily_ingredient'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.day}: ингредиент {self.ingredient_id}'
+
+
+class DailyAuthorStats(models.Model):
+    """Публикации, добавления в избранное и новые подписчики автора."""
+    day = models.DateField(verbose_name='День')
+    author_id = models.PositiveBigIntegerField(verbose_name='ID автора')
+    recipes = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Рецептов'
+    )
+    favorites = models.PositiveIntegerField(
+        default=0,
+        verbose_name='В избранное'
+    )
+    subscribers = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков'
+    )
+
+    class Meta:
+        verbose_name = 'Автор за день'
+        verbose_name_plural = 'Авторы по дням'
+        constraints = (
+            models.UniqueConstraint(
+                fields=['day', 'author_id'],
+                name='unique_daily_author'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.day}: автор {self.author_id}'
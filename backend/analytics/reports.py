@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from recipes.models import Ingredient, Recipe
+from users.models import FoodgramUser
+from .constants import REPORT_LIMIT
+from .models import (
+    DailyAuthorStats,
+    DailyIngredientStats,
+    DailyRecipeStats,
+    DailySignups,
+)
+
+MISSING_NAME = '— удалён —'
+
+
+def period(days):
+    """Последние days дней, включая сегодняшний."""
+    last_day = timezone.localdate()
+    return last_day - timedelta(days=days - 1), last_day
+
+
+def top(model, key, first_day, last_day, order, *counters,
+        limit=REPORT_LIMIT):
+    """Суммы счётчиков сводки за период по key, лучшие limit строк."""
+    return list(
+        model.objects
+        .filter(day__range=(first_day, last_day))
+        .values(key)
+        .annotate(**{counter: Sum(counter) for counter in counters})
+        .order_by(f'-{order}', key)[:limit]
+    )
+
+
+def with_names(rows, key, manager, describe):
+    """
+    Подставляет имена по id одним запросом по первичному ключу,
+    только для строк отчёта.
+    """
+    objects = manager.in_bulk([row[key] for row in rows])
+    for row in rows:
+        obj = objects.get(row[key])
+        row['name'] = describe(obj) if obj else MISSING_NAME
+    return rows
+
+
+def top_ingredients(first_day, last_day):
+    rows = top(DailyIngredientStats, 'ingredient_id', first_day, last_day,
+               'recipes', 'recipes')
+    return with_names(
+        rows, 'ingredient_id', Ingredient.objects,
+        lambda ingredient: (f'{ingredient.name}, '
+                            f'{ingredient.measurement_unit}')
+    )
+
+
+def top_recipes(first_day, last_day):
+    rows = top(DailyRecipeStats, 'recipe_id', first_day, last_day,
+               'favorites', 'favorites', 'shopping_carts')
+    return with_names(rows, 'recipe_id', Recipe.all_objects,
+                      lambda recipe: recipe.name)
+
+
+def top_authors(first_day, last_day):
+    rows = top(DailyAuthorStats, 'author_id', first_day, last_day,
+               'favorites', 'favorites', 'recipes', 'subscribers')
+    return with_names(rows, 'author_id', FoodgramUser.objects,
+                      lambda user: user.username)
+
+
+def daily_signups(first_day, last_day):
+    return list(
+        DailySignups.objects
+        .filter(day__range=(first_day, last_day))
+        .order_by('day')
+        .values('day', 'users')
+    )
+
+
+# Отчёт: заголовок, колонки (ключ, подпись) и функция выборки.
+REPORTS = {
+    'ingredients': (
+        'Популярные ингредиенты',
+        (('ingredient_id', 'ID'), ('name', 'Ингредиент'),
+         ('recipes', 'Рецептов')),
+        top_ingredients,
+    ),
+    'recipes': (
+        'Рецепты в избранном',
+        (('recipe_id', 'ID'), ('name', 'Рецепт'),
+         ('favorites', 'В избранное'), ('shopping_carts', 'В корзину')),
+        top_recipes,
+    ),
+    'authors': (
+        'Авторы',
+        (('author_id', 'ID'), ('name', 'Автор'),
+         ('favorites', 'В избранное'), ('recipes', 'Рецептов'),
+         ('subscribers', 'Подписчиков')),
+        top_authors,
+    ),
+    'signups': (
+        'Регистрации по дням',
+        (('day', 'День'), ('users', 'Регистраций')),
+        daily_signups,
+    ),
+}
@@ -0,0 +1,164 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from recipes.models import Favorite, Recipe, RecipeIngredient, ShoppingCart
+from users.models import FoodgramUser, Subscription
+from .constants import ROLLUP_CHUNK_DAYS, ROLLUP_INITIAL_DAYS
+from .models import (
+    DailyAuthorStats,
+    DailyIngredientStats,
+    DailyRecipeStats,
+    DailySignups,
+    RollupWatermark,
+)
+
+
+def day_start(day):
+    """Начало дня в часовом поясе проекта."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def per_day(queryset, field, first_day, last_day, *group):
+    """
+    Счётчики строк за дни [first_day, last_day] по полю времени field.
+    Фильтр по диапазону идёт по индексу поля, поэтому читаются только
+    строки этих дней.
+    """
+    return (
+        queryset
+        .filter(**{
+            f'{field}__gte': day_start(first_day),
+            f'{field}__lt': day_start(last_day + timedelta(days=1)),
+        })
+        .annotate(day=TruncDate(field))
+        .values('day', *group)
+        .annotate(total=Count('pk'))
+        .order_by()
+    )
+
+
+def rollup_signups(first_day, last_day):
+    return [
+        DailySignups(day=row['day'], users=row['total'])
+        for row in per_day(
+            FoodgramUser.objects, 'date_joined', first_day, last_day)
+    ]
+
+
+def rollup_recipes(first_day, last_day):
+    stats = {}
+    sources = (
+        (Favorite, 'favorites'),
+        (ShoppingCart, 'shopping_carts'),
+    )
+    for model, counter in sources:
+        for row in per_day(model.objects, 'created_at',
+                           first_day, last_day, 'recipe_id'):
+            key = (row['day'], row['recipe_id'])
+            if key not in stats:
+                stats[key] = DailyRecipeStats(
+                    day=row['day'], recipe_id=row['recipe_id'])
+            setattr(stats[key], counter, row['total'])
+    return list(stats.values())
+
+
+def rollup_ingredients(first_day, last_day):
+    return [
+        DailyIngredientStats(
+            day=row['day'], ingredient_id=row['ingredient_id'],
+            recipes=row['total']
+        )
+        for row in per_day(RecipeIngredient.objects, 'recipe__pub_date',
+                           first_day, last_day, 'ingredient_id')
+    ]
+
+
+def rollup_authors(first_day, last_day):
+    stats = defaultdict(dict)
+    sources = (
+        (Recipe.all_objects, 'pub_date', 'author_id', 'recipes'),
+        (Favorite.objects, 'created_at', 'recipe__author_id', 'favorites'),
+        (Subscription.objects, 'date_added', 'author_id', 'subscribers'),
+    )
+    for queryset, field, author, counter in sources:
+        for row in per_day(queryset, field, first_day, last_day, author):
+            stats[row['day'], row[author]][counter] = row['total']
+    return [
+        DailyAuthorStats(day=day, author_id=author_id, **counters)
+        for (day, author_id), counters in stats.items()
+    ]
+
+
+# Поля времени исходных строк каждой сводки: с первого такого дня
+# начинается полный пересчёт.
+ROLLUP_SOURCES = {
+    'signups': ((FoodgramUser.objects, 'date_joined'),),
+    'recipes': (
+        (Favorite.objects, 'created_at'),
+        (ShoppingCart.objects, 'created_at'),
+    ),
+    'ingredients': ((Recipe.all_objects, 'pub_date'),),
+    'authors': (
+        (Recipe.all_objects, 'pub_date'),
+        (Favorite.objects, 'created_at'),
+        (Subscription.objects, 'date_added'),
+    ),
+}
+
+ROLLUPS = (
+    ('signups', DailySignups, rollup_signups),
+    ('recipes', DailyRecipeStats, rollup_recipes),
+    ('ingredients', DailyIngredientStats, rollup_ingredients),
+    ('authors', DailyAuthorStats, rollup_authors),
+)
+
+
+def earliest_day(name):
+    """Первый день с исходными строками сводки; None, если строк нет."""
+    moments = [
+        queryset.aggregate(first=Min(field))['first']
+        for queryset, field in ROLLUP_SOURCES[name]
+    ]
+    moments = [moment for moment in moments if moment is not None]
+    return timezone.localdate(min(moments)) if moments else None
+
+
+def run_rollup(name, model, compute, since=None,
+               chunk_days=ROLLUP_CHUNK_DAYS):
+    """
+    Досчитывает сводку от водяного знака до сегодняшнего дня. Каждая
+    порция дней пересчитывается целиком в своей транзакции, поэтому
+    повторный запуск безопасен. Сегодняшний день не закрыт: знак
+    ставится на вчера, и следующий запуск пересчитает его заново.
+    Возвращает (число дней, число строк сводки).
+    """
+    if chunk_days < 1:
+        raise ValueError('chunk_days должен быть не меньше 1.')
+    today = timezone.localdate()
+    watermark = RollupWatermark.objects.filter(name=name).first()
+    if since is not None:
+        first_day = since
+    elif watermark is not None:
+        first_day = watermark.last_day + timedelta(days=1)
+    else:
+        first_day = today - timedelta(days=ROLLUP_INITIAL_DAYS)
+    days = rows = 0
+    while first_day <= today:
+        last_day = min(first_day + timedelta(days=chunk_days - 1), today)
+        with transaction.atomic():
+            model.objects.filter(day__range=(first_day, last_day)).delete()
+            rows += len(model.objects.bulk_create(
+                compute(first_day, last_day)))
+            RollupWatermark.objects.update_or_create(
+                name=name,
+                defaults={'last_day': min(last_day,
+                                          today - timedelta(days=1))}
+            )
+        days += (last_day - first_day).days + 1
+        first_day = last_day + timedelta(days=1)
+    return days, rows
@@ -0,0 +1,49 @@
+from django.contrib import admin
+from django.utils.html import format_html, format_html_join
+
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Профили запросов, снятые по заголовку X-Profile."""
+    list_display = (
+        'created_at', 'method', 'path', 'view', 'action', 'status_code',
+        'duration', 'sql_count', 'sql_duration'
+    )
+    list_filter = ('view', 'action', 'created_at')
+    search_fields = ('path',)
+    list_select_related = ('user',)
+    fields = (
+        'created_at', 'user', 'method', 'path', 'view', 'action',
+        'status_code', 'duration', 'sql_count', 'sql_duration',
+        'slow_queries_display', 'file_name', 'stats_display'
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def delete_model(self, request, obj):
+        obj.file_path.unlink(missing_ok=True)
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for profile in queryset:
+            profile.file_path.unlink(missing_ok=True)
+        super().delete_queryset(request, queryset)
+
+    @admin.display(description='Самые медленные SQL-запросы')
+    def slow_queries_display(self, obj):
+        return format_html_join(
+            '', '<p><b>{:.1f} мс</b> <code>{}</code></p>',
+            ((query['duration'] * 1000, query['sql'])
+             for query in obj.slow_queries)
+        )
+
+    @admin.display(description='Профиль (cumulative)')
+    def stats_display(self, obj):
+        return format_html('<pre>{}</pre>', obj.stats_text())
@@ -0,0 +1,294 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from api.metrics import CACHE_EVICTIONS, record_cache
+
+LOCAL_MAX_ENTRIES = 1000
+LOCAL_TIMEOUT = 30
+LOCK_TIMEOUT = 10
+LOCK_POLL_SECONDS = 0.05
+
+MISSING = object()
+
+
+class LocalTier:
+    """
+    Память процесса для кэшей с одним LOCATION: LRU, таблица
+    пересчётов get_or_set и счётчики. Django создаёт экземпляр кэша
+    на каждый поток, поэтому всё это хранится здесь, а не в нём.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.flights_lock = threading.Lock()
+        self.counters = Counter()
+
+
+_local_tiers = {}
+_local_tiers_lock = threading.Lock()
+
+
+def get_local_tier(location):
+    with _local_tiers_lock:
+        return _local_tiers.setdefault(location, LocalTier())
+
+
+class TieredCache(BaseCache):
+    """
+    Двухуровневый кэш: ограниченный LRU в памяти процесса перед общим
+    для воркеров бэкендом (FileBasedCache, memcached). Запись идёт
+    в оба уровня; локальная копия живёт не дольше LOCAL_TIMEOUT, так
+    что чужие изменения ключа видны с этой задержкой. Данные, которые
+    не должны устаревать, стоит хранить под версионными ключами.
+
+    Локальный уровень общий для потоков процесса и всех экземпляров
+    с тем же LOCATION: очистка из любого потока видна остальным.
+
+    OPTIONS: SHARED — псевдоним общего кэша в CACHES, LOCAL_MAX_ENTRIES,
+    LOCAL_TIMEOUT, LOCK_TIMEOUT — срок блокировки пересчёта в get_or_set.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', location or 'shared')
+        self.local_max_entries = options.get(
+            'LOCAL_MAX_ENTRIES', LOCAL_MAX_ENTRIES)
+        self.local_timeout = options.get('LOCAL_TIMEOUT', LOCAL_TIMEOUT)
+        self.lock_timeout = options.get('LOCK_TIMEOUT', LOCK_TIMEOUT)
+        tier = get_local_tier(location or self.shared_alias)
+        self.local = tier.entries
+        self.local_lock = tier.lock
+        self.flights = tier.flights
+        self.flights_lock = tier.flights_lock
+        self.counters = tier.counters
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def resolve_version(self, version):
+        return self.version if version is None else version
+
+    def local_key(self, key, version):
+        return self.make_and_validate_key(key, self.resolve_version(version))
+
+    def local_seconds(self, timeout):
+        """Срок локальной копии: не дольше ни TTL ключа, ни LOCAL_TIMEOUT."""
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def local_get(self, key):
+        with self.local_lock:
+            entry = self.local.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self.local[key]
+                return MISSING
+            self.local.move_to_end(key)
+            return value
+
+    def local_set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        seconds = self.local_seconds(timeout)
+        evicted = 0
+        with self.local_lock:
+            if seconds <= 0:
+                self.local.pop(key, None)
+                return
+            self.local[key] = (time.monotonic() + seconds, value)
+            self.local.move_to_end(key)
+            while len(self.local) > self.local_max_entries:
+                self.local.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self.counters['evictions'] += evicted
+            CACHE_EVICTIONS.labels('local').inc(evicted)
+
+    def local_delete(self, key):
+        with self.local_lock:
+            self.local.pop(key, None)
+
+    def record(self, local_hits=0, shared_hits=0, misses=0):
+        self.counters['local_hits'] += local_hits
+        self.counters['shared_hits'] += shared_hits
+        self.counters['misses'] += misses
+        record_cache('local', local_hits, shared_hits + misses)
+        record_cache('shared', shared_hits, misses)
+
+    def stats(self):
+        """Счётчики процесса: попадания по уровням, промахи, вытеснения."""
+        with self.local_lock:
+            size = len(self.local)
+        return {
+            'local_hits': self.counters['local_hits'],
+            'shared_hits': self.counters['shared_hits'],
+            'misses': self.counters['misses'],
+            'evictions': self.counters['evictions'],
+            'flight_waits': self.counters['flight_waits'],
+            'local_size': size,
+            'local_max_entries': self.local_max_entries,
+        }
+
+    def get(self, key, default=None, version=None):
+        local_key = self.local_key(key, version)
+        value = self.local_get(local_key)
+        if value is not MISSING:
+            self.record(local_hits=1)
+            return value
+        value = self.shared.get(
+            key, MISSING, version=self.resolve_version(version))
+        if value is MISSING:
+            self.record(misses=1)
+            return default
+        self.record(shared_hits=1)
+        self.local_set(local_key, value)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(
+            key, value, timeout, version=self.resolve_version(version))
+        self.local_set(self.local_key(key, version), value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(
+            key, value, timeout, version=self.resolve_version(version))
+        if added:
+            self.local_set(self.local_key(key, version), value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local_delete(self.local_key(key, version))
+        return self.shared.touch(
+            key, timeout, version=self.resolve_version(version))
+
+    def delete(self, key, version=None):
+        self.local_delete(self.local_key(key, version))
+        return self.shared.delete(key, version=self.resolve_version(version))
+
+    def has_key(self, key, version=None):
+        if self.local_get(self.local_key(key, version)) is not MISSING:
+            return True
+        return self.shared.has_key(key, version=self.resolve_version(version))
+
+    def incr(self, key, delta=1, version=None):
+        self.local_delete(self.local_key(key, version))
+        return self.shared.incr(
+            key, delta, version=self.resolve_version(version))
+
+    def get_many(self, keys, version=None):
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.local_get(self.local_key(key, version))
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        shared = {}
+        if missing:
+            shared = self.shared.get_many(
+                missing, version=self.resolve_version(version))
+            for key, value in shared.items():
+                self.local_set(self.local_key(key, version), value)
+        self.record(len(found), len(shared), len(missing) - len(shared))
+        found.update(shared)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(
+            data, timeout, version=self.resolve_version(version))
+        for key, value in data.items():
+            if key not in failed:
+                self.local_set(self.local_key(key, version), value, timeout)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        for key in keys:
+            self.local_delete(self.local_key(key, version))
+        self.shared.delete_many(keys, version=self.resolve_version(version))
+
+    def clear_local(self):
+        with self.local_lock:
+            self.local.clear()
+
+    def clear(self):
+        self.clear_local()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    def flight_lock(self, key):
+        """Блокировка пересчёта ключа, общая для потоков процесса."""
+        with self.flights_lock:
+            entry = self.flights.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        return entry
+
+    def release_flight(self, key, entry):
+        with self.flights_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del self.flights[key]
+
+    def wait_for_value(self, key, version):
+        """Ждёт, пока другой процесс досчитает значение под блокировкой."""
+        lock_key = f'{key}:lock'
+        deadline = time.monotonic() + self.lock_timeout
+        self.counters['flight_waits'] += 1
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_SECONDS)
+            value = self.shared.get(key, MISSING, version=version)
+            if value is not MISSING:
+                return value
+            if not self.shared.has_key(lock_key, version=version):
+                break
+        return MISSING
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        Значение ключа или результат default(), вычисленный один раз:
+        потоки процесса ждут на общей блокировке, а процессы — на ключе
+        «key:lock», добавленном в общий кэш через add(). Если держатель
+        блокировки не успел за LOCK_TIMEOUT, значение считается заново.
+        """
+        value = self.get(key, MISSING, version=version)
+        if value is not MISSING:
+            return value
+        local_key = self.local_key(key, version)
+        version = self.resolve_version(version)
+        entry = self.flight_lock(local_key)
+        try:
+            with entry[0]:
+                value = self.get(key, MISSING, version=version)
+                if value is not MISSING:
+                    return value
+                lock_key = f'{key}:lock'
+                locked = self.shared.add(
+                    lock_key, 1, self.lock_timeout, version=version)
+                if not locked:
+                    value = self.wait_for_value(key, version)
+                    if value is not MISSING:
+                        self.local_set(local_key, value, timeout)
+                        return value
+                try:
+                    value = default() if callable(default) else default
+                    self.set(key, value, timeout, version=version)
+                    return value
+                finally:
+                    if locked:
+                        self.shared.delete(lock_key, version=version)
+        finally:
+            self.release_flight(local_key, entry)
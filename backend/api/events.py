@@ -0,0 +1,248 @@
+import asyncio
+import json
+import logging
+import secrets
+import select
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection, connections, transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.module_loading import import_string
+from rest_framework.authentication import get_authorization_header
+from rest_framework.authtoken.models import Token
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from users.models import FoodgramUser
+
+NOTIFY_CHANNEL = 'foodgram_events'
+QUEUE_SIZE = 100
+LISTEN_POLL_SECONDS = 5
+HEARTBEAT_SECONDS = 15
+# Клиент EventSource переподключается сам, поэтому поток ограничен
+# по времени: так освобождаются и соединения оборванных клиентов.
+STREAM_SECONDS = 5 * 60
+RETRY_MILLISECONDS = 3000
+# Билет для EventSource, который не умеет слать заголовки: попадает
+# в URL и журналы, поэтому годится только для потока, недолго и на одно
+# подключение.
+TICKET_SALT = 'api.events.ticket'
+TICKET_MAX_AGE = 60
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Очередь событий одного SSE-соединения в его event loop."""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def deliver(self, event):
+        """Вызывается в loop подписчика; при переполнении просит resync."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({'type': 'resync'})
+
+
+class InProcessBroker:
+    """
+    Рассылка событий подписчикам этого процесса. Подходит для
+    разработки и для одного процесса, обслуживающего и API, и поток.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id)
+        with self.lock:
+            self.subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscriptions.get(subscription.user_id, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self.subscriptions.pop(subscription.user_id, None)
+
+    def dispatch(self, user_id, event):
+        """Передаёт событие подписчикам из любого потока."""
+        with self.lock:
+            subscribers = list(self.subscriptions.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(
+                subscription.deliver, event)
+
+    def publish(self, user_id, event):
+        self.dispatch(user_id, event)
+
+
+class PostgresBroker(InProcessBroker):
+    """
+    События между процессами через LISTEN/NOTIFY PostgreSQL.
+    Воркеры API только отправляют NOTIFY; процесс с SSE-потоками
+    слушает канал в отдельном потоке на своём соединении.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.listener = None
+
+    def publish(self, user_id, event):
+        payload = json.dumps({'user': user_id, 'event': event})
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, %s)', [NOTIFY_CHANNEL, payload])
+
+    def subscribe(self, user_id):
+        with self.lock:
+            if self.listener is None or not self.listener.is_alive():
+                self.listener = threading.Thread(
+                    target=self.listen, name='events-listener', daemon=True)
+                self.listener.start()
+        return super().subscribe(user_id)
+
+    def listen(self):
+        wrapper = connections.create_connection('default')
+        try:
+            wrapper.ensure_connection()
+            raw = wrapper.connection
+            raw.autocommit = True
+            with raw.cursor() as cursor:
+                cursor.execute(f'LISTEN {NOTIFY_CHANNEL}')
+            while True:
+                if select.select([raw], [], [], LISTEN_POLL_SECONDS)[0]:
+                    raw.poll()
+                    while raw.notifies:
+                        message = json.loads(raw.notifies.pop(0).payload)
+                        self.dispatch(message['user'], message['event'])
+        except Exception:
+            logger.exception('Слушатель событий PostgreSQL остановлен')
+        finally:
+            wrapper.close()
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.EVENTS_BROKER)()
+
+
+def publish_event(user_id, event_type, **data):
+    """Отправляет событие пользователю после фиксации транзакции."""
+    event = {'type': event_type, **data}
+    transaction.on_commit(lambda: get_broker().publish(user_id, event))
+
+
+def format_event(event):
+    return f'event: {event["type"]}\ndata: {json.dumps(event)}\n\n'
+
+
+def issue_ticket(user):
+    return signing.dumps(
+        {'user': user.pk, 'nonce': secrets.token_urlsafe(16)},
+        salt=TICKET_SALT)
+
+
+def read_ticket(ticket):
+    """Содержимое билета или None, если билет чужой или истёк."""
+    try:
+        return signing.loads(ticket, salt=TICKET_SALT, max_age=TICKET_MAX_AGE)
+    except signing.BadSignature:
+        return None
+
+
+async def redeem_ticket(ticket):
+    """
+    id пользователя из билета, если билет ещё не предъявляли. Отметка
+    о предъявлении живёт в кэше столько же, сколько сам билет.
+    """
+    payload = read_ticket(ticket)
+    if not isinstance(payload, dict):
+        return None
+    if not await cache.aadd(
+            f'events-ticket:{payload["nonce"]}', True, TICKET_MAX_AGE):
+        return None
+    return payload['user']
+
+
+async def stream_user(request):
+    """Пользователь по токену из заголовка или ?ticket= для EventSource."""
+    header = get_authorization_header(request).split()
+    if len(header) == 2 and header[0].lower() == b'token':
+        token = await Token.objects.select_related('user').filter(
+            key=header[1].decode(), user__is_active=True).afirst()
+        return token and token.user
+    user_id = await redeem_ticket(request.GET.get('ticket', ''))
+    if user_id is None:
+        return None
+    return await FoodgramUser.objects.filter(
+        pk=user_id, is_active=True).afirst()
+
+
+async def event_stream(broker, user_id):
+    subscription = broker.subscribe(user_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_SECONDS
+    yield f'retry: {RETRY_MILLISECONDS}\n\n'
+    try:
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(),
+                    min(HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def events_view(request):
+    """
+    Поток Server-Sent Events с изменениями корзины, избранного
+    и подписок текущего пользователя. Работает только под ASGI.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'detail': 'Поток событий доступен только через ASGI-сервер.'},
+            status=501, json_dumps_params={'ensure_ascii': False})
+    user = await stream_user(request)
+    if user is None:
+        return JsonResponse(
+            {'detail': 'Учетные данные не были предоставлены.'},
+            status=401, json_dumps_params={'ensure_ascii': False})
+    response = StreamingHttpResponse(
+        event_stream(get_broker(), user.pk),
+        content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def events_ticket_view(request):
+    """
+    Билет для подключения к потоку событий: ?ticket= вместо токена
+    в URL. Живёт TICKET_MAX_AGE секунд и годится на одно подключение:
+    перед каждым переподключением клиент запрашивает новый.
+    """
+    return Response({
+        'ticket': issue_ticket(request.user),
+        'expires_in': TICKET_MAX_AGE,
+    })
@@ -1,22 +1,99 @@
 import base64
+import binascii
+from tempfile import SpooledTemporaryFile
 
-from django.core.files.base import ContentFile
+from django.core.files import File
+from PIL import Image
 from rest_framework import serializers
 
+# Кратно 4, чтобы куски base64 декодировались независимо.
+BASE64_CHUNK_SIZE = 64 * 1024
+BASE64_MARKER = ';base64,'
+# Столько же пропускает client_max_body_size в nginx.
+IMAGE_MAX_SIZE = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS = 40_000_000
+# Меньшие изображения остаются в памяти, большие уходят во временный файл.
+SPOOL_MAX_SIZE = 1024 * 1024
+
+
+def decoded_size(data, start):
+    """Размер base64-данных после декодирования, без самого декодирования."""
+    length = len(data) - start
+    return length // 4 * 3 - data.count('=', max(start, len(data) - 2))
+
+
+def decode_base64(data, start):
+    """
+    Декодирует data[start:] кусками во временный файл. В памяти
+    одновременно держится лишь один кусок исходной строки и результата.
+    """
+    file = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    tail = ''
+    for offset in range(start, len(data), BASE64_CHUNK_SIZE):
+        chunk = tail + ''.join(
+            data[offset:offset + BASE64_CHUNK_SIZE].split())
+        usable = len(chunk) - len(chunk) % 4
+        file.write(base64.b64decode(chunk[:usable], validate=True))
+        tail = chunk[usable:]
+    if tail:
+        raise binascii.Error('Неполный base64.')
+    file.seek(0)
+    return file
+
 
 class SmartImageField(serializers.ImageField):
-    """Обрабатывает как файл, так и base64-изображения."""
+    """
+    Обрабатывает как файл, так и base64-изображения. Размер и размеры
+    в пикселях проверяются до чтения пикселей; полную проверку Pillow
+    выполняет хранилище в фоне после сохранения.
+    """
+
+    default_error_messages = {
+        'too_large': 'Размер изображения не должен превышать {max_size} Мб.',
+        'too_many_pixels': (
+            'Изображение {width}×{height} слишком велико: допускается '
+            'не больше {max_pixels} пикселей.'
+        ),
+    }
 
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:'):
+            start = data.find(BASE64_MARKER)
+            if start == -1:
+                self.fail('invalid_image')
+            format = data[len('data:'):start]
+            start += len(BASE64_MARKER)
+            self.check_size(decoded_size(data, start))
             try:
-                format, imgstr = data.split(';base64,')
-                ext = format.split('/')[-1]
-                decoded_file = base64.b64decode(imgstr)
-                file_name = f'temp_avatar.{ext}'
-                data = ContentFile(decoded_file, name=file_name)
-            except Exception:
+                decoded_file = decode_base64(data, start)
+            except (binascii.Error, ValueError):
                 raise serializers.ValidationError(
                     'Ошибка при декодировании изображения в base64.')
+            ext = format.split('/')[-1]
+            # Итоговое имя по хешу содержимого задаёт хранилище.
+            data = File(decoded_file, name=f'upload.{ext}')
+
+        file_object = serializers.FileField.to_internal_value(self, data)
+        self.check_size(file_object.size)
+        self.check_header(file_object)
+        return file_object
+
+    def check_size(self, size):
+        if size > IMAGE_MAX_SIZE:
+            self.fail('too_large', max_size=IMAGE_MAX_SIZE // 1024 // 1024)
 
-        return super().to_internal_value(data)
+    def check_header(self, file_object):
+        """Читает только заголовок: формат и размеры, без пикселей."""
+        try:
+            file_object.seek(0)
+            with Image.open(file_object) as image:
+                width, height = image.size
+        except Exception:
+            self.fail('invalid_image')
+        finally:
+            file_object.seek(0)
+        if width * height > IMAGE_MAX_PIXELS:
+            self.fail(
+                'too_many_pixels', width=width, height=height,
+                max_pixels=IMAGE_MAX_PIXELS
+            )
@@ -1,6 +1,21 @@
+from django.db import connection
+from django.db.models import Count, Exists, OuterRef, Q
+from django.db.models.functions import Lower
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.constants import INGREDIENT_FILTER_MAX_IDS
+from recipes.ingredient_index import get_ingredient_index
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipes.trigram_index import search_ingredients
+from users.models import FoodgramUser
+
+USER_SEARCH_FIELDS = ('username', 'first_name', 'last_name')
+USER_SEARCH_MAX_WORDS = 3
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    """Список чисел через запятую."""
 
 
 class RecipeFilter(filters.FilterSet):
@@ -26,10 +41,19 @@ class RecipeFilter(filters.FilterSet):
         field_name='author__id',
         label='Автор рецепта (ID)'
     )
+    ingredients = NumberInFilter(
+        method='filter_ingredients',
+        label='Содержит все ингредиенты (ID через запятую)'
+    )
+    exclude_ingredients = NumberInFilter(
+        method='filter_exclude_ingredients',
+        label='Не содержит ингредиентов (ID через запятую)'
+    )
 
     class Meta:
         model = Recipe
-        fields = ['author', 'tags', 'is_favorited', 'is_in_shopping_cart']
+        fields = ['author', 'tags', 'is_favorited', 'is_in_shopping_cart',
+                  'ingredients', 'exclude_ingredients']
 
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
@@ -43,14 +67,97 @@ class RecipeFilter(filters.FilterSet):
             return queryset.filter(shoppingcart__user=user)
         return queryset
 
+    def filter_ingredients(self, queryset, name, value):
+        if not value:
+            return queryset
+        ingredient_ids = set(value)
+        recipe_ids = get_ingredient_index().with_all(ingredient_ids)
+        if len(recipe_ids) <= INGREDIENT_FILTER_MAX_IDS:
+            return queryset.filter(pk__in=sorted(recipe_ids))
+        # Длинный список не влезет в параметры запроса: те же рецепты
+        # отбирает подзапрос по индексу «ингредиент → рецепт».
+        matched = (
+            RecipeIngredient.objects
+            .filter(ingredient_id__in=ingredient_ids)
+            .values('recipe_id')
+            .annotate(matched=Count('ingredient_id'))
+            .filter(matched=len(ingredient_ids))
+            .values('recipe_id')
+        )
+        return queryset.filter(pk__in=matched)
+
+    def filter_exclude_ingredients(self, queryset, name, value):
+        if not value:
+            return queryset
+        ingredient_ids = set(value)
+        recipe_ids = get_ingredient_index().with_any(ingredient_ids)
+        if len(recipe_ids) <= INGREDIENT_FILTER_MAX_IDS:
+            return queryset.exclude(pk__in=sorted(recipe_ids))
+        return queryset.filter(~Exists(
+            RecipeIngredient.objects.filter(
+                recipe_id=OuterRef('pk'), ingredient_id__in=ingredient_ids)
+        ))
+
 
 class IngredientSearchFilter(filters.FilterSet):
-    """Фильтр для поиска ингредиентов по началу имени."""
-    name = filters.CharFilter(method='filter_name_startswith')
+    """
+    Поиск ингредиентов: сначала по началу имени, затем похожие
+    по триграммам, с учётом опечаток и латинской раскладки.
+    """
+    name = filters.CharFilter(method='filter_name')
 
     class Meta:
         model = Ingredient
         fields = ['name']
 
-    def filter_name_startswith(self, queryset, name, value):
-        return queryset.filter(name__istartswith=value)
+    def filter_name(self, queryset, name, value):
+        return search_ingredients(queryset, value)
+
+
+class RecipeOrderingFilter(OrderingFilter):
+    """Сортировка рецептов; ordering=trending — по популярности."""
+
+    def get_ordering(self, request, queryset, view):
+        if request.query_params.get(self.ordering_param) == 'trending':
+            return ['-trending_score', '-pub_date']
+        return super().get_ordering(request, queryset, view)
+
+
+class UserSearchFilter(filters.FilterSet):
+    """
+    Поиск пользователей: каждое слово запроса — начало юзернейма,
+    имени или фамилии. На PostgreSQL сравнение идёт по
+    lower(поле) LIKE 'слово%' и использует индексы *_prefix_idx.
+    LOWER и LIKE в SQLite не знают регистра кириллицы, поэтому там
+    слово проверяется ещё и с заглавной буквы.
+    """
+    search = filters.CharFilter(
+        method='filter_search',
+        label='Начало юзернейма, имени или фамилии'
+    )
+
+    class Meta:
+        model = FoodgramUser
+        fields = ['search']
+
+    def filter_search(self, queryset, name, value):
+        words = value.lower().split()[:USER_SEARCH_MAX_WORDS]
+        if connection.vendor != 'postgresql':
+            for word in words:
+                condition = Q()
+                for field in USER_SEARCH_FIELDS:
+                    for variant in {word, word.capitalize()}:
+                        condition |= Q(**{f'{field}__istartswith': variant})
+                queryset = queryset.filter(condition)
+            return queryset
+        if words:
+            queryset = queryset.annotate(**{
+                f'{field}_lower': Lower(field)
+                for field in USER_SEARCH_FIELDS
+            })
+        for word in words:
+            condition = Q()
+            for field in USER_SEARCH_FIELDS:
+                condition |= Q(**{f'{field}_lower__startswith': word})
+            queryset = queryset.filter(condition)
+        return queryset
@@ -0,0 +1,123 @@
+import logging
+import threading
+from time import perf_counter
+
+from django.db import DatabaseError, connections
+from django.http import JsonResponse
+from django.urls import get_resolver
+
+HEALTH_CHECK_PATH = '/api/health/'
+
+logger = logging.getLogger(__name__)
+
+_ready = threading.Event()
+_warm_up_lock = threading.Lock()
+_warm_up_started = False
+
+
+def warm_up_serializers():
+    """
+    Один раз читает и сериализует теги и ингредиенты. Данные не
+    сохраняются: шаг прогревает импорт моделей, кэши метаданных ORM
+    и сборку полей сериализаторов DRF, которые иначе ждут первый запрос.
+    """
+    from api.serializers import IngredientSerializer, TagSerializer
+    from recipes.models import Ingredient, Tag
+
+    TagSerializer(Tag.objects.all(), many=True).data
+    IngredientSerializer(Ingredient.objects.all(), many=True).data
+
+
+def build_indexes():
+    from recipes.ingredient_index import get_ingredient_index
+    from recipes.trigram_index import get_trigram_index
+
+    get_ingredient_index()
+    # На PostgreSQL поиск ингредиентов идёт через pg_trgm.
+    if connections['default'].vendor != 'postgresql':
+        get_trigram_index()
+
+
+WARM_UP_STEPS = (
+    ('маршруты', lambda: get_resolver().url_patterns),
+    ('соединения с БД', lambda: [
+        connection.ensure_connection() for connection in connections.all()
+    ]),
+    ('ORM и сериализаторы', warm_up_serializers),
+    ('индексы', build_indexes),
+)
+
+
+def warm_up():
+    """
+    Готовит процесс к трафику: импортирует вьюхи, открывает соединения,
+    прогревает ORM и сериализаторы и строит индексы в памяти. Ошибка
+    шага не блокирует готовность — её отражает проверка базы
+    в /api/health/. Соединения остаются открытыми для запросов этого
+    потока, если CONN_MAX_AGE больше нуля.
+    """
+    global _warm_up_started
+    with _warm_up_lock:
+        if _warm_up_started:
+            return
+        _warm_up_started = True
+    for name, step in WARM_UP_STEPS:
+        start = perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception('Прогрев: шаг «%s» завершился ошибкой', name)
+        else:
+            logger.info('Прогрев: %s за %.3f с', name, perf_counter() - start)
+    for connection in connections.all():
+        connection.close_if_unusable_or_obsolete()
+    _ready.set()
+
+
+def warm_up_in_background():
+    """Прогрев в отдельном потоке: его соединения запросам не достанутся."""
+    try:
+        warm_up()
+    finally:
+        connections.close_all()
+
+
+def database_status():
+    """Пинг базы: (доступна ли, задержка в мс)."""
+    start = perf_counter()
+    try:
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError:
+        return False, None
+    return True, round((perf_counter() - start) * 1000, 2)
+
+
+class HealthCheckMiddleware:
+    """
+    Отвечает на /api/health/ до остальных middleware, без проверки
+    хоста и редиректа на HTTPS. Возвращает 200, только когда прогрев
+    завершён и база отвечает, иначе 503. Если прогрев не запускался
+    (например, под runserver), первая проверка запускает его в фоне.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path != HEALTH_CHECK_PATH:
+            return self.get_response(request)
+        if not _warm_up_started:
+            threading.Thread(
+                target=warm_up_in_background, daemon=True).start()
+        database_ok, latency = database_status()
+        ready = _ready.is_set() and database_ok
+        return JsonResponse(
+            {
+                'status': 'ok' if ready else 'unavailable',
+                'ready': ready,
+                'warmed_up': _ready.is_set(),
+                'database': {'ok': database_ok, 'latency_ms': latency},
+            },
+            status=200 if ready else 503,
+        )
@@ -0,0 +1,260 @@
+import http.client
+import json
+import random
+import re
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from time import perf_counter
+from urllib.parse import quote, urlsplit
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+BAD_REQUESTS_SUFFIX = 'bad_requests'
+VARIABLE_PATTERN = re.compile(r'{{(\w+)}}')
+PERCENTILES = (50, 95, 99)
+URL_SAFE_CHARACTERS = "/?&=%:+,;@"
+MIN_COMPARED_REQUESTS = 20
+
+
+@dataclass(frozen=True)
+class Route:
+    """Запрос из коллекции с подставленными переменными."""
+    name: str
+    method: str
+    path: str
+    auth: str = None
+    body: str = None
+
+
+@dataclass
+class RouteStats:
+    """Замеры одного маршрута за прогон."""
+    latencies: list = field(default_factory=list)
+    errors: int = 0
+    statuses: Counter = field(default_factory=Counter)
+
+
+def percentile(sorted_values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-percent * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def iter_requests(items, auth=None, folder=''):
+    """Обходит папки коллекции, наследуя авторизацию папок."""
+    for item in items:
+        item_auth = item.get('auth', auth)
+        if 'item' in item:
+            yield from iter_requests(item['item'], item_auth, item['name'])
+        else:
+            yield folder, item['request'], item['request'].get(
+                'auth', item_auth)
+
+
+def auth_header(auth):
+    """Значение заголовка Authorization из авторизации apikey."""
+    if not auth or auth.get('type') != 'apikey':
+        return None
+    options = {option['key']: option['value'] for option in auth['apikey']}
+    if options.get('key') != 'Authorization':
+        return None
+    return options.get('value')
+
+
+def substitute(template, variables):
+    """Подставляет {{переменные}}; None, если какой-то нет."""
+    missing = set(VARIABLE_PATTERN.findall(template)) - set(variables)
+    if missing:
+        return None
+    return VARIABLE_PATTERN.sub(
+        lambda match: str(variables[match.group(1)]), template)
+
+
+def build_profile(collection, variables, include_writes=False,
+                  include_bad_requests=False):
+    """
+    Превращает коллекцию Postman во взвешенный профиль нагрузки.
+    Вес маршрута — сколько раз одинаковый запрос встречается
+    в коллекции. Возвращает (Counter маршрутов, пропущенные запросы).
+    """
+    profile = Counter()
+    skipped = []
+    for folder, request, auth in iter_requests(collection['item']):
+        method = request['method']
+        url = request['url']['raw'] if isinstance(
+            request['url'], dict) else request['url']
+        if method not in SAFE_METHODS and not include_writes:
+            continue
+        if folder.endswith(BAD_REQUESTS_SUFFIX) and not include_bad_requests:
+            continue
+        template = url.replace('{{baseUrl}}', '')
+        raw_header = auth_header(auth)
+        raw_body = request.get('body', {}).get('raw') or None
+        path, header, body = (
+            substitute(value, variables) if value else value
+            for value in (template, raw_header, raw_body)
+        )
+        if (path is None or (raw_header and header is None)
+                or (raw_body and body is None)):
+            skipped.append(f'{method} {template}')
+            continue
+        path = quote(path, safe=URL_SAFE_CHARACTERS)
+        name = f'{method} {template}'
+        if header:
+            name += ' [auth]'
+        profile[Route(name, method, path, header, body)] += 1
+    return profile, skipped
+
+
+class LoadRunner:
+    """
+    Воспроизводит профиль в нескольких потоках заданное время.
+    Каждый поток держит своё keep-alive соединение.
+    """
+
+    def __init__(self, base_url, profile, concurrency, seed=None):
+        parts = urlsplit(base_url)
+        self.connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https'
+            else http.client.HTTPConnection
+        )
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.routes = list(profile)
+        self.weights = [profile[route] for route in self.routes]
+        self.concurrency = concurrency
+        self.seed = seed
+        self.stats = defaultdict(RouteStats)
+        self.lock = threading.Lock()
+
+    def send(self, connection, route):
+        headers = {'X-Forwarded-Proto': 'https', 'Accept': 'application/json'}
+        if route.auth:
+            headers['Authorization'] = route.auth
+        if route.body is not None:
+            headers['Content-Type'] = 'application/json'
+        connection.request(route.method, self.prefix + route.path,
+                           body=route.body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+
+    def worker(self, number, deadline, record_after):
+        rng = random.Random(None if self.seed is None else self.seed + number)
+        connection = self.connection_class(self.netloc, timeout=30)
+        local = defaultdict(RouteStats)
+        while True:
+            route = rng.choices(self.routes, self.weights)[0]
+            start = perf_counter()
+            if start >= deadline:
+                break
+            try:
+                status = self.send(connection, route)
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = self.connection_class(self.netloc, timeout=30)
+                status = None
+            finished = perf_counter()
+            if start < record_after:
+                continue
+            stats = local[route.name]
+            stats.latencies.append(finished - start)
+            stats.statuses[status or 'error'] += 1
+            if status is None or status >= 400:
+                stats.errors += 1
+        connection.close()
+        with self.lock:
+            for name, stats in local.items():
+                total = self.stats[name]
+                total.latencies.extend(stats.latencies)
+                total.errors += stats.errors
+                total.statuses.update(stats.statuses)
+
+    def run(self, duration, warmup=0):
+        start = perf_counter()
+        record_after = start + warmup
+        deadline = record_after + duration
+        threads = [
+            threading.Thread(target=self.worker,
+                             args=(number, deadline, record_after))
+            for number in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return build_report(self.stats, duration, self.concurrency)
+
+
+def summarize(latencies, errors, duration):
+    latencies = sorted(latencies)
+    requests = len(latencies)
+    summary = {
+        'requests': requests,
+        'rps': round(requests / duration, 2),
+        'errors': errors,
+        'error_rate': round(errors / requests, 4) if requests else 0.0,
+    }
+    for percent in PERCENTILES:
+        summary[f'p{percent}_ms'] = round(
+            percentile(latencies, percent) * 1000, 2)
+    return summary
+
+
+def build_report(stats, duration, concurrency):
+    """Итог прогона: сводка по каждому маршруту и по всем сразу."""
+    routes = {}
+    for name in sorted(stats):
+        routes[name] = summarize(
+            stats[name].latencies, stats[name].errors, duration)
+        routes[name]['statuses'] = {
+            str(status): count
+            for status, count in sorted(
+                stats[name].statuses.items(), key=str)
+        }
+    return {
+        'duration': duration,
+        'concurrency': concurrency,
+        'total': summarize(
+            [latency for item in stats.values()
+             for latency in item.latencies],
+            sum(item.errors for item in stats.values()),
+            duration
+        ),
+        'routes': routes,
+    }
+
+
+def compare_reports(report, baseline, tolerance):
+    """
+    Сравнивает прогон с эталонным отчётом. Регрессия — рост p95
+    больше чем на tolerance, падение rps больше чем на tolerance
+    или рост доли ошибок. Маршруты с малой выборкой не сравниваются.
+    """
+    regressions = []
+    pairs = [('total', report['total'], baseline['total'])] + [
+        (name, summary, baseline['routes'][name])
+        for name, summary in report['routes'].items()
+        if name in baseline['routes']
+        and min(summary['requests'], baseline['routes'][name]['requests'])
+        >= MIN_COMPARED_REQUESTS
+    ]
+    for name, current, previous in pairs:
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f'{name}: p95 {previous["p95_ms"]} → {current["p95_ms"]} мс')
+        if current['rps'] < previous['rps'] * (1 - tolerance):
+            regressions.append(
+                f'{name}: rps {previous["rps"]} → {current["rps"]}')
+        if current['error_rate'] > previous['error_rate']:
+            regressions.append(
+                f'{name}: ошибки {previous["error_rate"]:.2%} → '
+                f'{current["error_rate"]:.2%}')
+    return regressions
+
+
+def load_collection(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
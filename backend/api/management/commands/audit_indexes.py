@@ -0,0 +1,144 @@
+import re
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from api.filters import RecipeFilter
+from api.utils.shopping_cart import shopping_cart_ingredients
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+)
+from users.models import FoodgramUser, Subscription
+
+SEQ_SCAN = 'seq scan'
+SORT = 'sort'
+
+PLAN_PATTERNS = {
+    'postgresql': {
+        SEQ_SCAN: re.compile(r'Seq Scan on (\w+)'),
+        SORT: re.compile(r'(?<!Incremental )\bSort\b(?! Key| Method)'),
+    },
+    'sqlite': {
+        SEQ_SCAN: re.compile(r'\bSCAN (\w+)(?!.*USING (COVERING )?INDEX)'),
+        SORT: re.compile(r'USE TEMP B-TREE FOR (ORDER|GROUP) BY'),
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN для запросов API и помечает полные '
+        'сканирования таблиц и сортировки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Печатать планы запросов целиком.'
+        )
+        parser.add_argument(
+            '--force-index',
+            action='store_true',
+            help=(
+                'PostgreSQL: запретить seq scan, чтобы проверить наличие '
+                'индекса на маленьких таблицах.'
+            )
+        )
+        parser.add_argument(
+            '--fail',
+            action='store_true',
+            help='Завершиться с ошибкой, если найдены проблемы.'
+        )
+
+    def audited_queries(self):
+        """
+        Возвращает (название, queryset, допустимые находки) для
+        запросов, которые выполняют действия API.
+        """
+        user = FoodgramUser(pk=1)
+        request = SimpleNamespace(user=user)
+        tag = Tag.objects.values_list('slug', flat=True).first() or 'tag'
+        recipes = Recipe.objects.only('id', 'author_id', 'updated_at')
+
+        def recipe_filter(**data):
+            return RecipeFilter(data, queryset=recipes, request=request).qs
+
+        yield 'recipes.list', recipes.order_by('-pub_date')[:6], set()
+        yield ('recipes.list?ordering=trending',
+               recipes.order_by('-trending_score', '-pub_date')[:6], set())
+        yield 'recipes.list?author', recipe_filter(author=1)[:6], set()
+        if Tag.objects.exists():
+            yield 'recipes.list?tags', recipe_filter(tags=[tag])[:6], {SORT}
+        yield ('recipes.list?is_favorited',
+               recipe_filter(is_favorited=True)[:6], {SORT})
+        yield ('recipes.list?is_in_shopping_cart',
+               recipe_filter(is_in_shopping_cart=True)[:6], {SORT})
+        yield ('recipes.retrieve.is_favorited',
+               Favorite.objects.filter(user=user, recipe_id=1), set())
+        yield ('recipes.get_shopping_cart',
+               Recipe.objects.filter(shoppingcart__user=user), {SORT})
+        yield ('recipes.download_shopping_cart',
+               shopping_cart_ingredients(user), {SORT})
+        yield ('recipes.shopping_cart.exists',
+               ShoppingCart.objects.filter(user=user, recipe_id=1), set())
+        yield ('recipes.similar.refresh',
+               RecipeIngredient.objects.filter(ingredient_id__in=[1, 2])
+               .values_list('recipe_id', flat=True), set())
+        yield ('ingredients.list?name',
+               Ingredient.objects.filter(name__istartswith='мол'), {SORT})
+        yield ('users.subscriptions',
+               FoodgramUser.objects.filter(
+                   id__in=Subscription.objects.filter(user=user)
+                   .values('author_id'))[:6], {SORT})
+        yield ('users.subscriptions.recent',
+               Subscription.objects.filter(user=user)
+               .order_by('-date_added')[:6], set())
+        yield ('users.subscriptions.recipes_count',
+               Recipe.objects.filter(author_id__in=[1, 2])
+               .values('author_id').annotate(total=Count('id')), {SORT})
+
+    def explain(self, queryset, force_index):
+        if connection.vendor == 'postgresql' and force_index:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+                return queryset.explain()
+        return queryset.explain()
+
+    def handle(self, *args, **options):
+        patterns = PLAN_PATTERNS.get(connection.vendor)
+        if patterns is None:
+            raise CommandError(
+                f'База {connection.vendor} не поддерживается.')
+
+        problems = 0
+        for name, queryset, allowed in self.audited_queries():
+            plan = self.explain(queryset, options['force_index'])
+            findings = [
+                f'{kind}: {line.strip()}'
+                for line in plan.splitlines()
+                for kind, pattern in patterns.items()
+                if kind not in allowed and pattern.search(line)
+            ]
+            if findings:
+                problems += len(findings)
+                self.stdout.write(self.style.WARNING(f'[!] {name}'))
+                for finding in findings:
+                    self.stdout.write(f'    {finding}')
+            else:
+                self.stdout.write(self.style.SUCCESS(f'[ok] {name}'))
+            if options['plans']:
+                self.stdout.write(plan)
+
+        if problems and options['fail']:
+            raise CommandError(f'Найдено проблем: {problems}.')
+        self.stdout.write(f'Проверено на {connection.vendor}, '
+                          f'проблем: {problems}.')
@@ -0,0 +1,142 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from api.query_budget import (
+    SCENARIOS,
+    BudgetRunner,
+    baseline_entry,
+    compare,
+    missing_actions,
+    seed,
+    split_missing,
+)
+from api.utils.permissions_map import recipe_permissions, user_permissions
+
+DEFAULT_BASELINE = settings.BASE_DIR / 'data' / 'query_budgets.json'
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'api.cache.TieredCache',
+        'OPTIONS': {'SHARED': 'shared'},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет все действия API на тестовой базе с типовыми данными '
+        'и сверяет число SQL-запросов, размер ответа и время с эталоном'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Записать текущие значения как новый эталон'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.5,
+            help='Допустимый рост времени и размера ответа'
+        )
+        parser.add_argument(
+            '--skip-timing', action='store_true',
+            help='Не сравнивать время (например, на общем CI-раннере)'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Повторов каждого сценария для медианы времени'
+        )
+        parser.add_argument('--output', help='Файл для JSON-отчёта')
+
+    def handle(self, *args, **options):
+        missing = missing_actions(SCENARIOS, {
+            'recipes': recipe_permissions, 'users': user_permissions})
+        if missing:
+            raise CommandError(
+                'Нет сценариев для действий: ' + ', '.join(missing))
+
+        results = self.measure(options['repeat'])
+        self.print_results(results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+
+        if options['update_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as file:
+                json.dump(
+                    {name: baseline_entry(result)
+                     for name, result in results.items()},
+                    file, ensure_ascii=False, indent=2
+                )
+                file.write('\n')
+            self.stdout.write(self.style.SUCCESS(
+                f'Эталон записан в {options["baseline"]}.'))
+            return
+
+        try:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+        except FileNotFoundError:
+            raise CommandError(
+                'Эталон не найден, запустите с --update-baseline.')
+        unmeasured, stale = split_missing(results, baseline)
+        for name in unmeasured:
+            self.stdout.write(self.style.WARNING(f'Нет эталона: {name}'))
+        for name in stale:
+            self.stdout.write(self.style.WARNING(
+                f'Эталон без сценария: {name}'))
+        problems, warnings = compare(
+            results, baseline, options['tolerance'],
+            not options['skip_timing'])
+        for warning in warnings:
+            self.stdout.write(self.style.WARNING(
+                f'Известная проблема: {warning}'))
+        if problems:
+            raise CommandError(
+                'Превышены бюджеты:\n' + '\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS('Бюджеты соблюдены.'))
+
+    def measure(self, repeat):
+        """Создаёт тестовую базу, наполняет её и прогоняет сценарии."""
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == 'sqlite':
+                # Фоновые потоки пишут параллельно с запросами. Общая
+                # база в памяти сразу отвечает им «table is locked»,
+                # а файловая ждёт блокировку busy_timeout.
+                connection.settings_dict['TEST']['NAME'] = str(
+                    Path(directory) / 'budgets.sqlite3')
+            return self.run_scenarios(repeat, Path(directory) / 'media')
+
+    def run_scenarios(self, repeat, media_root):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True)
+        try:
+            with override_settings(CACHES=TEST_CACHES,
+                                   MEDIA_ROOT=str(media_root)):
+                fixtures = seed()
+                return BudgetRunner(fixtures, repeat).run(SCENARIOS)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def print_results(self, results):
+        self.stdout.write(f'{"сценарий":<34} {"SQL":>5} {"байт":>8} '
+                          f'{"мс":>8}  по страницам')
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<34} {result["queries"]:>5} {result["bytes"]:>8} '
+                f'{result["time_ms"]:>8}  {result["page_queries"] or ""}'
+            )
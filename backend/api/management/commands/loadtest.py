@@ -0,0 +1,229 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from api.loadtest import (
+    LoadRunner,
+    build_profile,
+    compare_reports,
+    load_collection,
+)
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import FoodgramUser
+
+DEFAULT_COLLECTION = (
+    settings.BASE_DIR.parent
+    / 'postman_collection' / 'foodgram.postman_collection.json'
+)
+SERVER_START_TIMEOUT = 30
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process, timeout=SERVER_START_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError('Сервер завершился при запуске.')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError('Сервер не начал принимать соединения.')
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон по запросам Postman-коллекции: '
+        'rps, доля ошибок и перцентили задержки по маршрутам'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--collection',
+            help='Путь к Postman-коллекции; по умолчанию коллекция '
+                 'из репозитория, если она есть рядом с backend'
+        )
+        parser.add_argument(
+            '--url',
+            help='Адрес уже запущенного сервера; без него поднимается '
+                 'runserver на свободном порту'
+        )
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--duration', type=float, default=30,
+            help='Длительность замера, секунд'
+        )
+        parser.add_argument(
+            '--warmup', type=float, default=3,
+            help='Прогрев перед замером, секунд'
+        )
+        parser.add_argument('--seed', type=int, help='Зерно выбора запросов')
+        parser.add_argument(
+            '--user',
+            help='Пользователь, от имени которого идут запросы с токеном '
+                 '(токен создаётся, если его нет); по умолчанию первый '
+                 'активный не из персонала. С --include-writes обязателен '
+                 'и не может быть персоналом'
+        )
+        parser.add_argument(
+            '--var', action='append', default=[], metavar='KEY=VALUE',
+            help='Переменная коллекции, перекрывает найденную в базе'
+        )
+        parser.add_argument(
+            '--include-writes', action='store_true',
+            help='Включить POST/PUT/PATCH/DELETE (изменяют данные!)'
+        )
+        parser.add_argument(
+            '--include-bad-requests', action='store_true',
+            help='Включить папки *_bad_requests с ожидаемыми 4xx'
+        )
+        parser.add_argument('--output', help='Файл для JSON-отчёта')
+        parser.add_argument('--baseline', help='JSON-отчёт для сравнения')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимое ухудшение p95 и rps относительно эталона'
+        )
+
+    def collection_path(self, path):
+        if path:
+            return path
+        if not DEFAULT_COLLECTION.exists():
+            raise CommandError(
+                f'Коллекция {DEFAULT_COLLECTION} не найдена (в образе '
+                f'backend её нет): укажите --collection.')
+        return str(DEFAULT_COLLECTION)
+
+    def load_user(self, username, include_writes):
+        """
+        Пользователь для запросов с токеном. Запись идёт только
+        от явно названного пользователя не из персонала: прогон меняет
+        его избранное, подписки и рецепты.
+        """
+        users = FoodgramUser.objects.filter(is_active=True, deleted_at=None)
+        if include_writes and not username:
+            raise CommandError('С --include-writes укажите --user.')
+        if not username:
+            return users.filter(
+                is_staff=False, is_superuser=False).order_by('pk').first()
+        user = users.filter(username=username).first()
+        if user is None:
+            raise CommandError(f'Пользователь {username} не найден.')
+        if include_writes and (user.is_staff or user.is_superuser):
+            raise CommandError(
+                'Запросы на запись нельзя выполнять от имени персонала.')
+        return user
+
+    def collection_variables(self, user, overrides):
+        """Значения переменных коллекции из текущей базы."""
+        variables = {}
+        if user is not None:
+            token, _ = Token.objects.get_or_create(user=user)
+            variables.update(
+                userId=user.pk, userToken=token.key,
+                secondUserToken=token.key
+            )
+        tags = list(Tag.objects.order_by('pk')[:3])
+        for prefix, tag in zip(('first', 'second', 'third'), tags):
+            variables[f'{prefix}TagId'] = tag.pk
+            variables[f'{prefix}TagSlug'] = tag.slug
+        ingredient = Ingredient.objects.order_by('pk').first()
+        if ingredient is not None:
+            variables['firstIndredientId'] = ingredient.pk
+            variables['ingredientNameFirstLatter'] = ingredient.name[:1]
+        recipe = Recipe.objects.order_by('pk').first()
+        if recipe is not None:
+            variables['firstRecipeId'] = recipe.pk
+        for override in overrides:
+            key, sep, value = override.partition('=')
+            if not sep:
+                raise CommandError(f'Ожидается KEY=VALUE: {override}')
+            variables[key] = value
+        return variables
+
+    def start_server(self):
+        port = free_port()
+        env = dict(os.environ, ALLOWED_HOSTS='127.0.0.1,localhost')
+        process = subprocess.Popen(
+            [sys.executable, 'manage.py', 'runserver', '--noreload',
+             f'127.0.0.1:{port}'],
+            cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_port(port, process)
+        except CommandError:
+            process.kill()
+            raise
+        return process, f'http://127.0.0.1:{port}'
+
+    def handle(self, *args, **options):
+        user = self.load_user(options['user'], options['include_writes'])
+        variables = self.collection_variables(user, options['var'])
+        profile, skipped = build_profile(
+            load_collection(self.collection_path(options['collection'])),
+            variables,
+            options['include_writes'], options['include_bad_requests']
+        )
+        for request in skipped:
+            self.stdout.write(f'Пропущен (нет переменных): {request}')
+        if not profile:
+            raise CommandError('В профиле нет ни одного запроса.')
+        self.stdout.write(
+            f'Маршрутов: {len(profile)}, '
+            f'суммарный вес: {sum(profile.values())}'
+        )
+
+        process = None
+        base_url = options['url']
+        if base_url is None:
+            process, base_url = self.start_server()
+        try:
+            report = LoadRunner(
+                base_url, profile, options['concurrency'], options['seed']
+            ).run(options['duration'], options['warmup'])
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+            regressions = compare_reports(
+                report, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError(
+                    'Регрессии относительно эталона:\n'
+                    + '\n'.join(regressions)
+                )
+        self.stdout.write(self.style.SUCCESS('Нагрузочный прогон завершён.'))
+
+    def print_report(self, report):
+        header = (f'{"маршрут":<60} {"запр.":>7} {"rps":>8} {"ошибки":>7} '
+                  f'{"p50":>8} {"p95":>8} {"p99":>8}')
+        self.stdout.write(header)
+        rows = list(report['routes'].items()) + [('ВСЕГО', report['total'])]
+        for name, summary in rows:
+            self.stdout.write(
+                f'{name[:60]:<60} {summary["requests"]:>7} '
+                f'{summary["rps"]:>8} {summary["error_rate"]:>7.2%} '
+                f'{summary["p50_ms"]:>8} {summary["p95_ms"]:>8} '
+                f'{summary["p99_ms"]:>8}'
+            )
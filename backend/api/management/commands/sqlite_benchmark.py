@@ -0,0 +1,68 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from api.sqlite_benchmark import (
+    MODES,
+    register_database,
+    run_mode,
+    seed,
+    unregister_database,
+)
+
+BENCHMARK_ALIAS = 'sqlite_benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite с настройками '
+        'по умолчанию и рабочего backend при параллельной записи и чтении'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Длительность замера каждого режима, секунд'
+        )
+        parser.add_argument(
+            '--mode', action='append', choices=list(MODES),
+            help='Режимы для замера; по умолчанию все'
+        )
+        parser.add_argument('--output', help='Файл для отчёта в JSON')
+
+    def handle(self, *args, **options):
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for mode in options['mode'] or MODES:
+                # Свой файл на режим: journal_mode сохраняется в базе.
+                register_database(
+                    BENCHMARK_ALIAS, mode, Path(directory) / f'{mode}.db')
+                try:
+                    seed(BENCHMARK_ALIAS)
+                    results[mode] = run_mode(
+                        BENCHMARK_ALIAS, options['writers'],
+                        options['readers'], options['duration'])
+                finally:
+                    unregister_database(BENCHMARK_ALIAS)
+        self.print_results(results, options)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+
+    def print_results(self, results, options):
+        self.stdout.write(
+            f'Писателей: {options["writers"]}, читателей: '
+            f'{options["readers"]}, {options["duration"]} с на режим.')
+        self.stdout.write(
+            f'{"режим":<10}{"операция":<10}{"оп/с":>10}'
+            f'{"p95, мс":>10}{"locked":>10}')
+        for mode, summary in results.items():
+            for kind, stats in summary.items():
+                self.stdout.write(
+                    f'{mode:<10}{kind:<10}{stats["ops_per_second"]:>10}'
+                    f'{stats["p95_ms"]:>10}{stats["locked"]:>10}')
+        self.stdout.write(self.style.SUCCESS('Замер завершён.'))
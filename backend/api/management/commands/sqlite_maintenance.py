@@ -0,0 +1,55 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+# Сколько строк индекса просматривает ANALYZE: статистики хватает
+# планировщику, а время прохода не растёт с размером таблиц.
+ANALYSIS_LIMIT = 1000
+
+
+def wal_size():
+    path = f'{connection.settings_dict["NAME"]}-wal'
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+class Command(BaseCommand):
+    help = (
+        'Обслуживание SQLite: checkpoint журнала WAL, ANALYZE '
+        'и PRAGMA optimize. Запускать периодически, например из cron'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analysis-limit',
+            type=int,
+            default=ANALYSIS_LIMIT,
+            help='Строк индекса на ANALYZE; 0 — полный проход.'
+        )
+        parser.add_argument(
+            '--skip-analyze',
+            action='store_true',
+            help='Не пересчитывать статистику, только checkpoint.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        with connection.cursor() as cursor:
+            before = wal_size()
+            # TRUNCATE переносит журнал в базу и обнуляет файл -wal;
+            # при активных читателях перенос частичный (busy = 1).
+            cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            busy, log_frames, checkpointed = cursor.fetchone()
+            self.stdout.write(
+                f'Checkpoint: страниц в журнале {log_frames}, перенесено '
+                f'{checkpointed}, журнал {before} → {wal_size()} байт'
+                + (' (базу держали читатели)' if busy else '')
+            )
+            if not options['skip_analyze']:
+                cursor.execute(
+                    f'PRAGMA analysis_limit = {options["analysis_limit"]}')
+                cursor.execute('ANALYZE')
+                cursor.execute('PRAGMA optimize')
+                self.stdout.write('Статистика планировщика обновлена.')
+        self.stdout.write(self.style.SUCCESS('Обслуживание завершено.'))
@@ -0,0 +1,100 @@
+import os
+
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from rest_framework.decorators import api_view, permission_classes
+
+from .permissions import IsStaffOrInternalIP
+
+# В gunicorn с несколькими воркерами значения пишутся в файлы каталога
+# PROMETHEUS_MULTIPROC_DIR и суммируются при выдаче /metrics.
+MULTIPROCESS = 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+REQUEST_LATENCY = Histogram(
+    'foodgram_request_duration_seconds',
+    'Время обработки запроса по вьюсету и действию.',
+    ['view', 'action', 'method'],
+)
+RESPONSES = Counter(
+    'foodgram_responses_total',
+    'Ответы по вьюсету, действию и коду статуса.',
+    ['view', 'action', 'status'],
+)
+SQL_QUERIES = Histogram(
+    'foodgram_request_sql_queries',
+    'Число SQL-запросов за один HTTP-запрос.',
+    ['view', 'action'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float('inf')),
+)
+SQL_DURATION = Histogram(
+    'foodgram_request_sql_duration_seconds',
+    'Суммарное время SQL-запросов за один HTTP-запрос.',
+    ['view', 'action'],
+)
+CACHE_REQUESTS = Counter(
+    'foodgram_cache_requests_total',
+    'Обращения к кэшам приложения: попадания и промахи.',
+    ['cache', 'result'],
+)
+CACHE_EVICTIONS = Counter(
+    'foodgram_cache_evictions_total',
+    'Записи, вытесненные из ограниченных кэшей приложения.',
+    ['cache'],
+)
+SHOPPING_LIST_BYTES = Histogram(
+    'foodgram_shopping_list_bytes',
+    'Размер выгружаемого списка покупок.',
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, float('inf')),
+)
+INFLIGHT_REQUESTS = Gauge(
+    'foodgram_inflight_requests',
+    'Запросы в обработке во всех живых воркерах.',
+    multiprocess_mode='livesum',
+)
+WORKER_MAX_RSS = Gauge(
+    'foodgram_worker_max_rss_bytes',
+    'Пиковый объём памяти воркера.',
+    multiprocess_mode='liveall',
+)
+OUTBOX_LAG = Gauge(
+    'foodgram_outbox_lag_seconds',
+    'Возраст самого старого события последней пачки журнала изменений.',
+    multiprocess_mode='livemax',
+)
+OUTBOX_EVENTS = Counter(
+    'foodgram_outbox_events_total',
+    'События журнала изменений, обработанные воркерами.',
+    ['model'],
+)
+OUTBOX_SKIPPED_GAPS = Counter(
+    'foodgram_outbox_skipped_gaps_total',
+    'Пропуски id журнала, так и не заполненные (откаты транзакций).',
+)
+
+
+def record_cache(cache, hits, misses):
+    if hits:
+        CACHE_REQUESTS.labels(cache, 'hit').inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels(cache, 'miss').inc(misses)
+
+
+@api_view(['GET'])
+@permission_classes([IsStaffOrInternalIP])
+def metrics_view(request):
+    """Метрики в формате Prometheus (для персонала и INTERNAL_IPS)."""
+    registry = REGISTRY
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(generate_latest(registry),
+                        content_type=CONTENT_TYPE_LATEST)
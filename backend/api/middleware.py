@@ -0,0 +1,162 @@
+import cProfile
+import resource
+import sys
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from .metrics import (
+    INFLIGHT_REQUESTS,
+    REQUEST_LATENCY,
+    RESPONSES,
+    SQL_DURATION,
+    SQL_QUERIES,
+    WORKER_MAX_RSS,
+)
+
+# ru_maxrss в Linux в килобайтах, в macOS — в байтах.
+MAX_RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+class QueryTracker:
+    """
+    Считает SQL-запросы и их суммарное время через execute_wrapper.
+    С record=True сохраняет и сами запросы.
+    """
+
+    def __init__(self, record=False):
+        self.count = 0
+        self.duration = 0.0
+        self.queries = [] if record else None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if self.queries is not None:
+                self.queries.append((elapsed, sql))
+
+
+def view_labels(view_func, method):
+    """Возвращает (вьюсет, действие) для обработчика DRF или Django."""
+    view_class = getattr(view_func, 'cls', None)
+    name = (view_class.__name__ if view_class
+            else getattr(view_func, '__name__', 'unknown'))
+    actions = getattr(view_func, 'actions', None) or {}
+    return name, actions.get(method.lower(), method.lower())
+
+
+class MetricsMiddleware:
+    """Собирает метрики запросов: время, коды ответов и SQL."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.metrics_labels = ('unresolved', 'none')
+        tracker = QueryTracker()
+        start = perf_counter()
+        INFLIGHT_REQUESTS.inc()
+        try:
+            with connection.execute_wrapper(tracker):
+                response = self.get_response(request)
+        finally:
+            INFLIGHT_REQUESTS.dec()
+        view, action = request.metrics_labels
+        REQUEST_LATENCY.labels(view, action, request.method).observe(
+            perf_counter() - start)
+        RESPONSES.labels(view, action, response.status_code).inc()
+        SQL_QUERIES.labels(view, action).observe(tracker.count)
+        SQL_DURATION.labels(view, action).observe(tracker.duration)
+        WORKER_MAX_RSS.set(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * MAX_RSS_UNIT)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_labels = view_labels(view_func, request.method)
+
+
+def staff_user(request):
+    """Возвращает сотрудника из сессии или токена DRF, иначе None."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return user
+    try:
+        authenticated = TokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    if authenticated and authenticated[0].is_staff:
+        return authenticated[0]
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует запрос сотрудника с заголовком X-Profile: 1.
+    Профиль cProfile сохраняется в PROFILE_DIR, сводка — в RequestProfile.
+    Запросы без заголовка проходят без дополнительной работы.
+    """
+
+    header = 'HTTP_X_PROFILE'
+    slow_queries_limit = 10
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.META.get(self.header) not in ('1', 'true'):
+            return self.get_response(request)
+        user = staff_user(request)
+        if user is None:
+            return self.get_response(request)
+        return self.profile(request, user)
+
+    def profile(self, request, user):
+        from .models import RequestProfile
+
+        tracker = QueryTracker(record=True)
+        profiler = cProfile.Profile()
+        start = perf_counter()
+        with connection.execute_wrapper(tracker):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration = perf_counter() - start
+
+        view, action = getattr(request, 'metrics_labels',
+                               ('unresolved', 'none'))
+        created_at = timezone.now()
+        file_name = (f'{created_at:%Y%m%d-%H%M%S-%f}-'
+                     f'{view}-{action}.prof')
+        settings.PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(settings.PROFILE_DIR / file_name)
+
+        slow_queries = sorted(tracker.queries, reverse=True)
+        profile = RequestProfile.objects.create(
+            user=user,
+            method=request.method,
+            path=request.get_full_path()[:RequestProfile.PATH_MAX_LENGTH],
+            view=view,
+            action=action,
+            status_code=response.status_code,
+            duration=duration,
+            sql_count=tracker.count,
+            sql_duration=tracker.duration,
+            slow_queries=[
+                {'duration': round(elapsed, 6), 'sql': sql}
+                for elapsed, sql in slow_queries[:self.slow_queries_limit]
+            ],
+            file_name=file_name,
+        )
+        response['X-Profile-Id'] = str(profile.pk)
+        return response
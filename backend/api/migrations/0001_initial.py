@@ -0,0 +1,40 @@
+# Generated by Django 4.2.23 on 2026-10-19 09:13
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата')),
+                ('method', models.CharField(max_length=10, verbose_name='Метод')),
+                ('path', models.CharField(max_length=500, verbose_name='Путь')),
+                ('view', models.CharField(max_length=100, verbose_name='Вьюсет')),
+                ('action', models.CharField(max_length=100, verbose_name='Действие')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='Статус')),
+                ('duration', models.FloatField(verbose_name='Время, с')),
+                ('sql_count', models.PositiveIntegerField(verbose_name='SQL-запросов')),
+                ('sql_duration', models.FloatField(verbose_name='Время SQL, с')),
+                ('slow_queries', models.JSONField(default=list, verbose_name='Самые медленные запросы')),
+                ('file_name', models.CharField(max_length=255, verbose_name='Файл профиля')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Сотрудник')),
+            ],
+            options={
+                'verbose_name': 'Профиль запроса',
+                'verbose_name_plural': 'Профили запросов',
+                'ordering': ('-created_at',),
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+import pstats
+from io import StringIO
+
+from django.conf import settings
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """Профиль одного запроса, снятый по заголовку X-Profile."""
+    PATH_MAX_LENGTH = 500
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        verbose_name='Сотрудник'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата'
+    )
+    method = models.CharField(max_length=10, verbose_name='Метод')
+    path = models.CharField(max_length=PATH_MAX_LENGTH, verbose_name='Путь')
+    view = models.CharField(max_length=100, verbose_name='Вьюсет')
+    action = models.CharField(max_length=100, verbose_name='Действие')
+    status_code = models.PositiveSmallIntegerField(verbose_name='Статус')
+    duration = models.FloatField(verbose_name='Время, с')
+    sql_count = models.PositiveIntegerField(verbose_name='SQL-запросов')
+    sql_duration = models.FloatField(verbose_name='Время SQL, с')
+    slow_queries = models.JSONField(
+        default=list,
+        verbose_name='Самые медленные запросы'
+    )
+    file_name = models.CharField(
+        max_length=255,
+        verbose_name='Файл профиля'
+    )
+
+    class Meta:
+        verbose_name = 'Профиль запроса'
+        verbose_name_plural = 'Профили запросов'
+        ordering = ('-created_at',)
+
+    def __str__(self):
+        return f'{self.method} {self.path} ({self.duration:.3f} с)'
+
+    @property
+    def file_path(self):
+        return settings.PROFILE_DIR / self.file_name
+
+    def stats_text(self, limit=40):
+        """Топ функций по накопленному времени в текстовом виде."""
+        if not self.file_path.exists():
+            return 'Файл профиля не найден.'
+        stream = StringIO()
+        stats = pstats.Stats(str(self.file_path), stream=stream)
+        stats.strip_dirs().sort_stats('cumulative').print_stats(limit)
+        return stream.getvalue()
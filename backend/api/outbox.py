@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from api.metrics import OUTBOX_EVENTS, OUTBOX_LAG, OUTBOX_SKIPPED_GAPS
+from recipes.ingredient_index import invalidate_ingredient_index
+from recipes.models import ChangeEvent, Ingredient, Recipe
+from recipes.short_links import resolve_short_code
+from recipes.trigram_index import invalidate_trigram_index
+
+OUTBOX_POLL_SECONDS = 1
+OUTBOX_BATCH_SIZE = 500
+# Id выдаются при вставке, а видны после фиксации, поэтому пропуск
+# в последовательности может заполниться позже. Пропуск, не
+# заполнившийся за это время, считается откатом транзакции.
+OUTBOX_GAP_TIMEOUT = 10
+OUTBOX_MAX_GAPS = 1000
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = defaultdict(list)
+
+
+def register_handler(model, handler):
+    """
+    Подписывает handler(events) на события модели: он получает
+    список ChangeEvent одной модели в порядке чтения из журнала.
+    """
+    HANDLERS[model._meta.model_name].append(handler)
+
+
+def drop_recipe_caches(events):
+    invalidate_ingredient_index()
+    if any(event.action == ChangeEvent.Action.DELETE for event in events):
+        resolve_short_code.cache_clear()
+
+
+def drop_ingredient_caches(events):
+    invalidate_trigram_index()
+    invalidate_ingredient_index()
+
+
+register_handler(Recipe, drop_recipe_caches)
+register_handler(Ingredient, drop_ingredient_caches)
+
+
+class OutboxConsumer:
+    """
+    Читает журнал изменений по возрастанию id и сбрасывает кэши
+    процесса. Начинает с конца журнала: прошлые изменения уже учтены
+    кэшами, построенными после старта. Задержка ограничена интервалом
+    опроса, а для событий долгих транзакций — OUTBOX_GAP_TIMEOUT.
+    """
+
+    def __init__(self, poll_seconds=OUTBOX_POLL_SECONDS,
+                 batch_size=OUTBOX_BATCH_SIZE):
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.last_id = None
+        self.gaps = {}
+        self.stopped = threading.Event()
+
+    def fetch(self):
+        condition = Q(pk__gt=self.last_id)
+        if self.gaps:
+            condition |= Q(pk__in=list(self.gaps))
+        return list(
+            ChangeEvent.objects.filter(condition)
+            .order_by('pk')[:self.batch_size]
+        )
+
+    def track_gaps(self, events):
+        """Запоминает пропущенные id и забывает просроченные."""
+        now = time.monotonic()
+        for event in events:
+            if event.pk in self.gaps:
+                del self.gaps[event.pk]
+                continue
+            for missing in range(self.last_id + 1, event.pk):
+                self.gaps[missing] = now
+            self.last_id = max(self.last_id, event.pk)
+        expired = [
+            pk for pk, seen in self.gaps.items()
+            if now - seen > OUTBOX_GAP_TIMEOUT
+        ]
+        overflow = len(self.gaps) - len(expired) - OUTBOX_MAX_GAPS
+        if overflow > 0:
+            expired.extend(sorted(self.gaps)[:overflow])
+        for pk in set(expired):
+            del self.gaps[pk]
+        if expired:
+            OUTBOX_SKIPPED_GAPS.inc(len(set(expired)))
+
+    def dispatch(self, events):
+        by_model = defaultdict(list)
+        for event in events:
+            by_model[event.model].append(event)
+        for model, model_events in by_model.items():
+            OUTBOX_EVENTS.labels(model).inc(len(model_events))
+            for handler in HANDLERS.get(model, ()):
+                try:
+                    handler(model_events)
+                except Exception:
+                    logger.exception(
+                        'Обработчик журнала изменений %s завершился ошибкой',
+                        model)
+
+    def poll(self):
+        """Обрабатывает новые события; возвращает их число."""
+        if self.last_id is None:
+            self.last_id = (
+                ChangeEvent.objects.aggregate(last=Max('pk'))['last'] or 0)
+        events = self.fetch()
+        self.track_gaps(events)
+        self.dispatch(events)
+        OUTBOX_LAG.set(
+            (timezone.now() - events[0].created_at).total_seconds()
+            if events else 0
+        )
+        return len(events)
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                while self.poll() == self.batch_size:
+                    pass
+            except Exception:
+                logger.exception('Ошибка чтения журнала изменений')
+                connection.close()
+            self.stopped.wait(self.poll_seconds)
+        connection.close()
+
+    def start(self):
+        threading.Thread(
+            target=self.run, name='outbox-consumer', daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+
+
+_consumer = None
+_consumer_lock = threading.Lock()
+
+
+def start_outbox_consumer():
+    """Запускает потребителя журнала в процессе один раз."""
+    global _consumer
+    with _consumer_lock:
+        if _consumer is None:
+            _consumer = OutboxConsumer()
+            _consumer.start()
+    return _consumer
@@ -1,6 +1,19 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+CURSOR_MAX_PAGE_SIZE = 100
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Курсор по (username, id): без COUNT и OFFSET, поэтому страница
+    стоит одинаково и в начале, и в конце справочника.
+    """
+    ordering = ('username', 'id')
+    page_size = LimitPageNumberPagination.page_size
+    page_size_query_param = 'limit'
+    max_page_size = CURSOR_MAX_PAGE_SIZE
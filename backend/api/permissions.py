@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import permissions
 from rest_framework.exceptions import MethodNotAllowed
 
@@ -27,3 +28,11 @@ class ReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         raise MethodNotAllowed(request.method)
+
+
+class IsStaffOrInternalIP(permissions.BasePermission):
+    """Доступ для персонала или с адресов из INTERNAL_IPS."""
+
+    def has_permission(self, request, view):
+        return (request.user.is_staff
+                or request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS)
@@ -0,0 +1,413 @@
+import base64
+import io
+import statistics
+from dataclasses import dataclass, field
+from datetime import timedelta
+from time import perf_counter
+from typing import Callable, Optional
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.sync import SYNC_SETTLE_SECONDS, SyncTokenField
+from recipes.models import (
+    ChangeEvent,
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+)
+from users.models import FoodgramUser, Subscription
+
+SEED_USERS = 12
+SEED_TAGS = 3
+SEED_INGREDIENTS = 40
+SEED_RECIPES_PER_USER = 4
+SEED_INGREDIENTS_PER_RECIPE = 5
+SEED_ITEMS = 10
+PASSWORD = 'Budget-Pa55word'
+# Размеры страниц, на которых сравнивается число запросов: у списка
+# без N+1 оно не зависит от того, сколько объектов на странице.
+PAGE_SIZES = (2, 6)
+# Время ниже этого прироста считается шумом при любой толерантности.
+TIME_FLOOR_MS = 5
+
+
+def png_data_uri(color=(200, 80, 40)):
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), color).save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+def recipe_payload(fixtures, name='Бюджетный рецепт'):
+    return {
+        'name': name,
+        'text': 'Описание',
+        'cooking_time': 10,
+        'image': fixtures['image'],
+        'tags': fixtures['tag_ids'][:2],
+        'ingredients': [
+            {'id': ingredient_id, 'amount': 50}
+            for ingredient_id in fixtures['ingredient_ids'][:4]
+        ],
+    }
+
+
+def seed():
+    """
+    Типовые данные: авторы с рецептами, читатель с избранным,
+    корзиной и подписками. Возвращает словарь фикстур для сценариев.
+    """
+    tags = Tag.objects.bulk_create(
+        Tag(name=f'Тег {number}', slug=f'tag{number}')
+        for number in range(SEED_TAGS)
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=f'сахар {number}', measurement_unit='г')
+        for number in range(SEED_INGREDIENTS)
+    )
+    users = [
+        FoodgramUser.objects.create_user(
+            username=f'budget{number}', email=f'budget{number}@example.com',
+            first_name='Имя', last_name='Фамилия', password=PASSWORD
+        )
+        for number in range(SEED_USERS)
+    ]
+    reader, authors = users[0], users[1:]
+    recipes = []
+    for author in authors:
+        for number in range(SEED_RECIPES_PER_USER):
+            recipe = Recipe.objects.create(
+                author=author, name=f'Рецепт {author.pk}-{number}',
+                text='Описание', cooking_time=5 + number
+            )
+            recipe.tags.set(tags[:1 + number % SEED_TAGS])
+            offset = (recipe.pk * 3) % SEED_INGREDIENTS
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredient=ingredients[
+                        (offset + step) % SEED_INGREDIENTS],
+                    amount=10 + step
+                )
+                for step in range(SEED_INGREDIENTS_PER_RECIPE)
+            )
+            recipes.append(recipe)
+    for recipe in recipes[:SEED_ITEMS]:
+        Favorite.objects.create(user=reader, recipe=recipe)
+        ShoppingCart.objects.create(user=reader, recipe=recipe)
+    for author in authors[:SEED_ITEMS]:
+        Subscription.objects.create(user=reader, author=author)
+    own = Recipe.objects.create(
+        author=reader, name='Свой рецепт', text='Описание', cooking_time=5)
+    own.tags.set(tags[:1])
+    return {
+        'reader': reader,
+        'token': Token.objects.create(user=reader).key,
+        'author': authors[-1],
+        'recipe': recipes[-1],
+        'own_recipe': own,
+        'tag_ids': [tag.pk for tag in tags],
+        'tag_slug': tags[0].slug,
+        'ingredient_ids': [ingredient.pk for ingredient in ingredients],
+        'image': png_data_uri(),
+    }
+
+
+def noop(fixtures):
+    pass
+
+
+@dataclass
+class Scenario:
+    """Один запрос к одному действию вьюсета."""
+
+    name: str
+    action: str
+    method: str
+    path: Callable
+    status: int = 200
+    authenticated: bool = True
+    data: Optional[Callable] = None
+    prepare: Callable = noop
+    paged: bool = False
+
+
+def remove_item(model, key='recipe'):
+    def prepare(fixtures):
+        model.objects.filter(
+            user=fixtures['reader'], **{key: fixtures[key]}).delete()
+    return prepare
+
+
+def ensure_item(model, key='recipe'):
+    def prepare(fixtures):
+        model.objects.get_or_create(
+            user=fixtures['reader'], **{key: fixtures[key]})
+    return prepare
+
+
+def create_victim(fixtures):
+    fixtures['victim'] = Recipe.objects.create(
+        author=fixtures['reader'], name='На удаление', text='Описание',
+        cooking_time=5
+    )
+
+
+def reset_password(fixtures):
+    fixtures['reader'].set_password(PASSWORD)
+    fixtures['reader'].save()
+
+
+def settle_journal(fixtures):
+    """Старит журнал, чтобы синхронизация видела только что записанное."""
+    ChangeEvent.objects.update(
+        created_at=timezone.now() - timedelta(seconds=SYNC_SETTLE_SECONDS * 2))
+
+
+def sync_path(model=None):
+    """Синхронизация с начала журнала или с первого события модели."""
+    def path(fixtures):
+        since = 0
+        if model is not None:
+            since = ChangeEvent.objects.filter(
+                model=model._meta.model_name).order_by('pk').first().pk - 1
+        return f'/api/sync/?since={SyncTokenField().to_representation(since)}'
+    return path
+
+
+SCENARIOS = (
+    Scenario('tags.list', 'tags.list', 'get', lambda f: '/api/tags/',
+             authenticated=False),
+    Scenario('ingredients.search', 'ingredients.list', 'get',
+             lambda f: '/api/ingredients/?name=сахр', authenticated=False),
+    Scenario('recipes.list', 'recipes.list', 'get',
+             lambda f: '/api/recipes/', authenticated=False, paged=True),
+    Scenario('recipes.list.viewer', 'recipes.list', 'get',
+             lambda f: '/api/recipes/', paged=True),
+    Scenario('recipes.list.filtered', 'recipes.list', 'get',
+             lambda f: (f'/api/recipes/?is_favorited=1&is_in_shopping_cart=1'
+                        f'&tags={f["tag_slug"]}'),
+             paged=True),
+    Scenario('recipes.list.sparse', 'recipes.list', 'get',
+             lambda f: ('/api/recipes/?fields=name,image,cooking_time,'
+                        'author.first_name,author.last_name'),
+             paged=True),
+    Scenario('recipes.retrieve', 'recipes.retrieve', 'get',
+             lambda f: f'/api/recipes/{f["recipe"].pk}/'),
+    Scenario('recipes.create', 'recipes.create', 'post',
+             lambda f: '/api/recipes/', status=201, data=recipe_payload),
+    Scenario('recipes.update', 'recipes.update', 'put',
+             lambda f: f'/api/recipes/{f["own_recipe"].pk}/',
+             data=recipe_payload),
+    Scenario('recipes.partial_update', 'recipes.partial_update', 'patch',
+             lambda f: f'/api/recipes/{f["own_recipe"].pk}/',
+             data=recipe_payload),
+    Scenario('recipes.destroy', 'recipes.destroy', 'delete',
+             lambda f: f'/api/recipes/{f["victim"].pk}/', status=204,
+             prepare=create_victim),
+    Scenario('recipes.favorite', 'recipes.favorite', 'post',
+             lambda f: f'/api/recipes/{f["recipe"].pk}/favorite/',
+             status=201, prepare=remove_item(Favorite)),
+    Scenario('recipes.delete_favorite', 'recipes.delete_favorite', 'delete',
+             lambda f: f'/api/recipes/{f["recipe"].pk}/favorite/',
+             status=204, prepare=ensure_item(Favorite)),
+    Scenario('recipes.shopping_cart', 'recipes.shopping_cart', 'post',
+             lambda f: f'/api/recipes/{f["recipe"].pk}/shopping_cart/',
+             status=201, prepare=remove_item(ShoppingCart)),
+    Scenario('recipes.delete_shopping_cart', 'recipes.delete_shopping_cart',
+             'delete',
+             lambda f: f'/api/recipes/{f["recipe"].pk}/shopping_cart/',
+             status=204, prepare=ensure_item(ShoppingCart)),
+    Scenario('recipes.get_shopping_cart', 'recipes.get_shopping_cart', 'get',
+             lambda f: '/api/recipes/shopping_cart/'),
+    Scenario('recipes.download_shopping_cart',
+             'recipes.download_shopping_cart', 'get',
+             lambda f: '/api/recipes/download_shopping_cart/'),
+    Scenario('users.list', 'users.list', 'get', lambda f: '/api/users/',
+             paged=True),
+    Scenario('users.search', 'users.list', 'get',
+             lambda f: '/api/users/?search=budget', paged=True),
+    Scenario('users.list.sparse', 'users.list', 'get',
+             lambda f: '/api/users/?fields=username,avatar', paged=True),
+    Scenario('users.list.cursor', 'users.list', 'get',
+             lambda f: '/api/users/?cursor=', paged=True),
+    Scenario('users.retrieve', 'users.retrieve', 'get',
+             lambda f: f'/api/users/{f["author"].pk}/'),
+    Scenario('users.me', 'users.me', 'get', lambda f: '/api/users/me/'),
+    Scenario('users.set_password', 'users.set_password', 'post',
+             lambda f: '/api/users/set_password/', status=204,
+             data=lambda f: {'current_password': PASSWORD,
+                             'new_password': 'Another-Pa55word'},
+             prepare=reset_password),
+    Scenario('users.subscribe', 'users.subscribe', 'post',
+             lambda f: f'/api/users/{f["author"].pk}/subscribe/'
+                       '?recipes_limit=3',
+             status=201, prepare=remove_item(Subscription, 'author')),
+    Scenario('users.unsubscribe', 'users.subscribe', 'delete',
+             lambda f: f'/api/users/{f["author"].pk}/subscribe/',
+             status=204, prepare=ensure_item(Subscription, 'author')),
+    Scenario('users.subscriptions', 'users.subscriptions', 'get',
+             lambda f: '/api/users/subscriptions/?recipes_limit=3',
+             paged=True),
+    Scenario('users.set_avatar', 'users.set_avatar', 'put',
+             lambda f: '/api/users/me/avatar/',
+             data=lambda f: {'avatar': f['image']}),
+    Scenario('users.delete_avatar', 'users.delete_avatar', 'delete',
+             lambda f: '/api/users/me/avatar/', status=204),
+    Scenario('sync.recipes', 'sync', 'get', sync_path(),
+             authenticated=False, prepare=settle_journal, paged=True),
+    Scenario('sync.viewer', 'sync', 'get', sync_path(Favorite),
+             prepare=settle_journal, paged=True),
+)
+
+
+def missing_actions(scenarios, permission_maps):
+    """Действия из карт прав, для которых нет сценария."""
+    covered = {scenario.action for scenario in scenarios}
+    return sorted(
+        f'{prefix}.{action}'
+        for prefix, permissions in permission_maps.items()
+        for action in permissions
+        if f'{prefix}.{action}' not in covered
+    )
+
+
+@dataclass
+class Measurement:
+    queries: int = 0
+    bytes: int = 0
+    times: list = field(default_factory=list)
+    # Число запросов по размерам страницы для списков.
+    page_queries: dict = field(default_factory=dict)
+
+    def summary(self):
+        return {
+            'queries': self.queries,
+            'bytes': self.bytes,
+            'time_ms': round(statistics.median(self.times) * 1000, 2),
+            'page_queries': self.page_queries,
+            'page_dependent': len(set(self.page_queries.values())) > 1,
+        }
+
+
+class BudgetRunner:
+    """
+    Выполняет сценарии тестовым клиентом DRF и считает SQL-запросы,
+    размер ответа и медианное время. Кэш очищается перед каждым
+    запросом, так что замеряется худший (холодный) путь.
+    """
+
+    def __init__(self, fixtures, repeat):
+        self.fixtures = fixtures
+        self.repeat = repeat
+        self.anonymous = APIClient()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {fixtures["token"]}')
+
+    def call(self, scenario, page_size=None):
+        scenario.prepare(self.fixtures)
+        cache.clear()
+        path = scenario.path(self.fixtures)
+        if page_size is not None:
+            separator = '&' if '?' in path else '?'
+            path = f'{path}{separator}limit={page_size}'
+        client = self.client if scenario.authenticated else self.anonymous
+        data = scenario.data(self.fixtures) if scenario.data else None
+        with CaptureQueriesContext(connection) as queries:
+            start = perf_counter()
+            response = getattr(client, scenario.method)(
+                path, data, format='json', secure=True)
+            content = (b''.join(response.streaming_content)
+                       if response.streaming else response.content)
+            elapsed = perf_counter() - start
+        if response.status_code != scenario.status:
+            raise AssertionError(
+                f'{scenario.name}: ответ {response.status_code}, '
+                f'ожидался {scenario.status}: {content[:200]!r}'
+            )
+        return len(queries), len(content), elapsed
+
+    def measure(self, scenario):
+        measurement = Measurement()
+        page_size = PAGE_SIZES[-1] if scenario.paged else None
+        # Первый вызов прогревает импорты и индексы процесса.
+        self.call(scenario, page_size)
+        if scenario.paged:
+            for size in PAGE_SIZES:
+                measurement.page_queries[str(size)] = self.call(
+                    scenario, size)[0]
+        for _ in range(self.repeat):
+            queries, size_bytes, elapsed = self.call(scenario, page_size)
+            measurement.queries = max(measurement.queries, queries)
+            measurement.bytes = size_bytes
+            measurement.times.append(elapsed)
+        return measurement.summary()
+
+    def run(self, scenarios):
+        return {scenario.name: self.measure(scenario)
+                for scenario in scenarios}
+
+
+def compare(results, baseline, tolerance, check_timing=True):
+    """
+    Нарушения бюджета и предупреждения. Число запросов не должно расти
+    совсем и не должно зависеть от размера страницы (кроме известных
+    случаев, отмеченных в эталоне page_dependent); размер ответа
+    и время — не больше эталона с толерантностью.
+    """
+    problems, warnings = [], []
+    for name, result in results.items():
+        expected = baseline.get(name, {})
+        if result['page_dependent']:
+            message = (f'{name}: число запросов зависит от размера '
+                       f'страницы {result["page_queries"]}')
+            if expected.get('page_dependent'):
+                warnings.append(message)
+            else:
+                problems.append(message)
+        if not expected:
+            continue
+        if result['queries'] > expected['queries']:
+            problems.append(
+                f'{name}: запросов {result["queries"]}, '
+                f'бюджет {expected["queries"]}'
+            )
+        if result['bytes'] > expected['bytes'] * (1 + tolerance):
+            problems.append(
+                f'{name}: ответ {result["bytes"]} байт, '
+                f'эталон {expected["bytes"]}'
+            )
+        time_limit = max(expected['time_ms'] * (1 + tolerance),
+                         expected['time_ms'] + TIME_FLOOR_MS)
+        if check_timing and result['time_ms'] > time_limit:
+            problems.append(
+                f'{name}: {result["time_ms"]} мс, '
+                f'эталон {expected["time_ms"]} мс'
+            )
+    return problems, warnings
+
+
+def baseline_entry(result):
+    """В эталон попадают только сравниваемые величины."""
+    entry = {key: result[key] for key in ('queries', 'bytes', 'time_ms')}
+    if result['page_dependent']:
+        entry['page_dependent'] = True
+    return entry
+
+
+def split_missing(results, baseline):
+    """Сценарии без эталона и эталоны без сценария."""
+    return (
+        sorted(set(results) - set(baseline)),
+        sorted(set(baseline) - set(results)),
+    )
@@ -1,13 +1,21 @@
+from functools import partial
+
 from django.contrib.auth.password_validation import validate_password
 from django.core.validators import RegexValidator
 from django.db import transaction
+from django.db.models import Count, F, Prefetch, Q, Window
+from django.db.models.functions import RowNumber
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
 from api.fields import SmartImageField
 from api.utils.auth_context_mixin import AuthContextMixin
+from api.utils.sparse_fields import SparseFieldsMixin
+from recipes.changes import record_change
 from recipes.constants import NAME_MAX_LENGTH
+from recipes.ingredient_index import invalidate_ingredient_index
 from recipes.models import (
+    ChangeEvent,
     Favorite,
     Ingredient,
     Recipe,
@@ -15,6 +23,7 @@ from recipes.models import (
     ShoppingCart,
     Tag,
 )
+from recipes.similarity import schedule_similar_refresh
 from users.models import FoodgramUser, Subscription
 
 
@@ -63,7 +72,26 @@ class CreateUserSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserInfoSerializer(AuthContextMixin, serializers.ModelSerializer):
+class UserListSerializer(AuthContextMixin, serializers.ListSerializer):
+    """
+    Список пользователей: подписки зрителя на всю страницу читаются
+    одним запросом и передаются дочернему сериализатору через контекст.
+    """
+
+    def to_representation(self, data):
+        users = list(data.all() if hasattr(data, 'all') else data)
+        viewer = self.get_authenticated_user()
+        if viewer and users and 'is_subscribed' in self.child.fields:
+            self.context['subscribed_ids'] = set(
+                Subscription.objects
+                .filter(user=viewer, author__in=users)
+                .values_list('author_id', flat=True)
+            )
+        return super().to_representation(users)
+
+
+class UserInfoSerializer(SparseFieldsMixin, AuthContextMixin,
+                         serializers.ModelSerializer):
     """Сериализатор пользователя с флагом подписки."""
     is_subscribed = serializers.SerializerMethodField()
     avatar = SmartImageField(read_only=True, required=False, allow_null=True)
@@ -73,10 +101,24 @@ class UserInfoSerializer(AuthContextMixin, serializers.ModelSerializer):
         fields = (
             'email', 'id', 'username', 'first_name', 'last_name',
             'is_subscribed', 'avatar')
+        list_serializer_class = UserListSerializer
+
+    @classmethod
+    def columns(cls, selection=None):
+        """Колонки модели, нужные выбранным полям."""
+        model_fields = {
+            model_field.name
+            for model_field in cls.Meta.model._meta.concrete_fields
+        }
+        return [
+            name for name in cls.Meta.fields
+            if name in model_fields
+            and (selection is None or selection.includes(name))
+        ]
 
     def to_representation(self, instance):
         rep = super().to_representation(instance)
-        if not instance.avatar:
+        if 'avatar' in rep and not instance.avatar:
             rep['avatar'] = None
         return rep
 
@@ -84,6 +126,9 @@ class UserInfoSerializer(AuthContextMixin, serializers.ModelSerializer):
         user = self.get_authenticated_user()
         if not user:
             return False
+        subscribed_ids = self.context.get('subscribed_ids')
+        if subscribed_ids is not None:
+            return obj.pk in subscribed_ids
         return Subscription.objects.filter(user=user, author=obj).exists()
 
 
@@ -155,23 +200,53 @@ class UserSubscriptionSerializer(UserInfoSerializer):
             'recipes_count',
         )
 
-    def get_recipes(self, obj):
-        request = self.context.get('request')
+    @staticmethod
+    def recipes_limit(request):
         limit = request.query_params.get('recipes_limit')
+        return int(limit) if limit and limit.isdigit() else None
+
+    @classmethod
+    def prefetch(cls, authors, request, selection=None):
+        """
+        Рецепты и их число для страницы авторов — двумя запросами.
+        Невыбранные поля не читаются и не считаются.
+        """
+        if selection is not None:
+            authors = authors.only(*cls.columns(selection))
+        if selection is None or selection.includes('recipes_count'):
+            authors = authors.annotate(recipes_total=Count(
+                'recipes', filter=Q(recipes__deleted_at__isnull=True)))
+        if selection is not None and not selection.includes('recipes'):
+            return authors
+        recipes = Recipe.objects.only(
+            'id', 'author', 'name', 'image', 'cooking_time')
+        limit = cls.recipes_limit(request)
+        if limit is not None:
+            # Срез внутри prefetch: первые limit рецептов каждого автора.
+            recipes = recipes.annotate(position=Window(
+                RowNumber(), partition_by=F('author'),
+                order_by=F('pub_date').desc()
+            )).filter(position__lte=limit)
+        return authors.prefetch_related(Prefetch('recipes', queryset=recipes))
+
+    def get_recipes(self, obj):
         recipes_qs = obj.recipes.all()
+        limit = self.recipes_limit(self.context.get('request'))
 
-        if limit and limit.isdigit():
-            recipes_qs = recipes_qs[:int(limit)]
+        if limit is not None:
+            recipes_qs = recipes_qs[:limit]
 
         serializer = RecipeShortSerializer(recipes_qs, many=True,
                                            context=self.context)
         return serializer.data
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_total'):
+            return obj.recipes_total
         return obj.recipes.count()
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для модели Tag."""
 
     class Meta:
@@ -187,7 +262,8 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit')
 
 
-class RecipeIngredientSerializer(serializers.ModelSerializer):
+class RecipeIngredientSerializer(SparseFieldsMixin,
+                                 serializers.ModelSerializer):
     """Сериализатор для промежуточной модели ингредиента в рецепте."""
     id = serializers.ReadOnlyField(source='ingredient.id')
     name = serializers.ReadOnlyField(source='ingredient.name')
@@ -199,7 +275,17 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class RecipeSerializer(AuthContextMixin, serializers.ModelSerializer):
+class IngredientAmountSerializer(serializers.ModelSerializer):
+    """Ингредиент рецепта без раскрытия: id и количество."""
+    id = serializers.ReadOnlyField(source='ingredient_id')
+
+    class Meta:
+        model = RecipeIngredient
+        fields = ('id', 'amount')
+
+
+class RecipeSerializer(SparseFieldsMixin, AuthContextMixin,
+                       serializers.ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     ingredients = RecipeIngredientSerializer(source='recipe_ingredients',
                                              many=True, read_only=True)
@@ -208,6 +294,8 @@ class RecipeSerializer(AuthContextMixin, serializers.ModelSerializer):
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
+    expandable_fields = ('tags', 'author', 'ingredients')
+
     class Meta:
         model = Recipe
         fields = (
@@ -216,6 +304,55 @@ class RecipeSerializer(AuthContextMixin, serializers.ModelSerializer):
             'is_favorited', 'is_in_shopping_cart',
         )
 
+    @classmethod
+    def prefetch(cls, recipes, selection=None):
+        """
+        Колонки, JOIN и prefetch для выбранных полей. Нераскрытые
+        связи читаются без справочников: только id.
+        """
+        if selection is None:
+            return recipes.select_related('author').prefetch_related(
+                'tags', 'recipe_ingredients__ingredient')
+        model_fields = {
+            model_field.name
+            for model_field in Recipe._meta.concrete_fields
+        }
+        columns = [
+            name for name in cls.Meta.fields
+            if name in model_fields and selection.includes(name)
+        ]
+        if selection.is_expanded('author'):
+            recipes = recipes.select_related('author')
+            columns += [
+                f'author__{name}' for name in UserInfoSerializer.columns(
+                    selection.get_nested('author'))
+            ]
+        if selection.includes('tags'):
+            recipes = recipes.prefetch_related(
+                'tags' if selection.is_expanded('tags')
+                else Prefetch('tags', queryset=Tag.objects.only('id'))
+            )
+        if selection.includes('ingredients'):
+            recipes = recipes.prefetch_related(
+                'recipe_ingredients__ingredient'
+                if selection.is_expanded('ingredients')
+                else Prefetch(
+                    'recipe_ingredients',
+                    queryset=RecipeIngredient.objects.only(
+                        'recipe_id', 'ingredient_id', 'amount')
+                )
+            )
+        return recipes.only(*columns)
+
+    def get_collapsed_field(self, name):
+        if name == 'author':
+            return serializers.ReadOnlyField(source='author_id')
+        if name == 'tags':
+            return serializers.PrimaryKeyRelatedField(
+                many=True, read_only=True)
+        return IngredientAmountSerializer(
+            source='recipe_ingredients', many=True, read_only=True)
+
     def get_is_favorited(self, obj):
         user = self.get_authenticated_user()
         if not user:
@@ -319,6 +456,9 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             for ingredient_data in ingredients
         ]
         RecipeIngredient.objects.bulk_create(objs)
+        record_change(Recipe, recipe.pk, ChangeEvent.Action.UPDATE)
+        transaction.on_commit(partial(schedule_similar_refresh, recipe.pk))
+        transaction.on_commit(invalidate_ingredient_index)
 
     @transaction.atomic
     def create(self, validated_data):
@@ -356,12 +496,34 @@ class RecipeShortSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time')
 
 
+class IdListField(serializers.Field):
+    """Список id через запятую в параметре запроса."""
+
+    def to_internal_value(self, data):
+        try:
+            return [int(item) for item in data.split(',') if item.strip()]
+        except ValueError:
+            raise serializers.ValidationError(
+                'Ожидается список id через запятую.')
+
+
+class PantrySearchSerializer(serializers.Serializer):
+    """Параметры поиска рецептов по имеющимся ингредиентам."""
+    have = IdListField()
+    exclude = IdListField(required=False, default=list)
+
+    def validate_have(self, value):
+        if not value:
+            raise serializers.ValidationError('Укажите ингредиенты.')
+        return value
+
+
 class RecipeLinkSerializer(serializers.Serializer):
     def to_representation(self, instance):
         request = self.context.get('request')
         return {
             'short-link': request.build_absolute_uri(
-                instance.get_absolute_url())
+                instance.get_short_url())
         }
 
 
@@ -0,0 +1,179 @@
+import random
+import threading
+from dataclasses import dataclass, field
+from time import perf_counter
+
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    OperationalError,
+    connections,
+    transaction,
+)
+
+from api.loadtest import percentile
+
+# Режимы сравнения: настройки SQLite из коробки и рабочий backend.
+MODES = {
+    'default': {'ENGINE': 'django.db.backends.sqlite3', 'OPTIONS': {}},
+    'tuned': {
+        'ENGINE': 'foodgram_backend.sqlite_backend',
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+    },
+}
+SEED_USERS = 200
+SEED_RECIPES = 2000
+SEED_FAVORITES = 10000
+PAGE_SIZE = 6
+
+SCHEMA = (
+    'CREATE TABLE bench_user ('
+    'id INTEGER PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)',
+    'CREATE TABLE bench_recipe ('
+    'id INTEGER PRIMARY KEY, author_id INTEGER NOT NULL, name TEXT)',
+    'CREATE TABLE bench_favorite ('
+    'id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, '
+    'recipe_id INTEGER NOT NULL, UNIQUE (user_id, recipe_id))',
+    'CREATE INDEX bench_favorite_recipe ON bench_favorite (recipe_id)',
+)
+READ_PAGE = (
+    'SELECT r.id, r.name, COUNT(f.id) FROM bench_recipe r '
+    'LEFT JOIN bench_favorite f ON f.recipe_id = r.id '
+    'WHERE r.id <= %s GROUP BY r.id ORDER BY r.id DESC LIMIT %s'
+)
+
+
+@dataclass
+class Stats:
+    """Замеры одного вида операций."""
+    latencies: list = field(default_factory=list)
+    locked: int = 0
+
+    def summary(self, duration):
+        latencies = sorted(self.latencies)
+        return {
+            'ops_per_second': round(len(latencies) / duration, 1),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'locked': self.locked,
+        }
+
+
+def register_database(alias, mode, path):
+    """Подключает файл path под алиасом alias с настройками режима."""
+    databases = connections.configure_settings({
+        DEFAULT_DB_ALIAS: {**MODES[mode], 'NAME': str(path)},
+    })
+    connections.settings[alias] = databases[DEFAULT_DB_ALIAS]
+
+
+def unregister_database(alias):
+    connections[alias].close()
+    del connections[alias]
+    del connections.settings[alias]
+
+
+def seed(alias):
+    with transaction.atomic(using=alias):
+        with connections[alias].cursor() as cursor:
+            for statement in SCHEMA:
+                cursor.execute(statement)
+            cursor.executemany(
+                'INSERT INTO bench_user (id) VALUES (%s)',
+                [(pk,) for pk in range(1, SEED_USERS + 1)])
+            cursor.executemany(
+                'INSERT INTO bench_recipe (id, author_id, name) '
+                'VALUES (%s, %s, %s)',
+                [(pk, pk % SEED_USERS + 1, f'Рецепт {pk}')
+                 for pk in range(1, SEED_RECIPES + 1)])
+            rng = random.Random(0)
+            cursor.executemany(
+                'INSERT OR IGNORE INTO bench_favorite (user_id, recipe_id) '
+                'VALUES (%s, %s)',
+                [(rng.randint(1, SEED_USERS), rng.randint(1, SEED_RECIPES))
+                 for _ in range(SEED_FAVORITES)])
+
+
+def toggle_favorite(alias, rng):
+    """
+    Как добавление в избранное: проверка, вставка или удаление
+    и увеличение версии коллекций пользователя в одной транзакции.
+    """
+    user_id = rng.randint(1, SEED_USERS)
+    recipe_id = rng.randint(1, SEED_RECIPES)
+    with transaction.atomic(using=alias):
+        with connections[alias].cursor() as cursor:
+            cursor.execute(
+                'SELECT id FROM bench_favorite '
+                'WHERE user_id = %s AND recipe_id = %s',
+                [user_id, recipe_id])
+            row = cursor.fetchone()
+            if row:
+                cursor.execute(
+                    'DELETE FROM bench_favorite WHERE id = %s', [row[0]])
+            else:
+                cursor.execute(
+                    'INSERT INTO bench_favorite (user_id, recipe_id) '
+                    'VALUES (%s, %s)', [user_id, recipe_id])
+            cursor.execute(
+                'UPDATE bench_user SET version = version + 1 '
+                'WHERE id = %s', [user_id])
+
+
+def read_page(alias, rng):
+    """Как страница списка рецептов с числом добавлений в избранное."""
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            READ_PAGE, [rng.randint(PAGE_SIZE, SEED_RECIPES), PAGE_SIZE])
+        cursor.fetchall()
+
+
+def worker(alias, operation, stats, barrier, deadline, seed_value):
+    rng = random.Random(seed_value)
+    barrier.wait()
+    try:
+        while perf_counter() < deadline[0]:
+            start = perf_counter()
+            try:
+                operation(alias, rng)
+            except OperationalError as error:
+                if 'locked' not in str(error):
+                    raise
+                stats.locked += 1
+                continue
+            stats.latencies.append(perf_counter() - start)
+    finally:
+        connections[alias].close()
+
+
+def run_mode(alias, writers, readers, duration):
+    """
+    Запускает писателей и читателей в потоках, у каждого своё
+    соединение и свои замеры. Возвращает сводку по записи и чтению.
+    """
+    operations = {'write': toggle_favorite, 'read': read_page}
+    plan = ['write'] * writers + ['read'] * readers
+    stats = [Stats() for _ in plan]
+    deadline = [0]
+    barrier = threading.Barrier(
+        len(plan) + 1,
+        action=lambda: deadline.__setitem__(0, perf_counter() + duration))
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(alias, operations[kind], stats[number], barrier,
+                  deadline, number))
+        for number, kind in enumerate(plan)
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+    summary = {}
+    for kind in operations:
+        merged = Stats()
+        for number, thread_kind in enumerate(plan):
+            if thread_kind == kind:
+                merged.latencies += stats[number].latencies
+                merged.locked += stats[number].locked
+        summary[kind] = merged.summary(duration)
+    return summary
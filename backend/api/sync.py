@@ -0,0 +1,197 @@
+from datetime import timedelta
+from operator import attrgetter
+
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from rest_framework import serializers, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from api.outbox import OUTBOX_GAP_TIMEOUT
+from api.utils.recipe_cache import render_recipes
+from recipes.models import ChangeEvent, Favorite, Recipe, ShoppingCart
+from users.models import Subscription
+
+SYNC_PAGE_SIZE = 100
+SYNC_MAX_PAGE_SIZE = 500
+# Id событий выдаются при вставке, а видны после фиксации. Событие
+# отдаётся, когда прошло столько секунд: к этому времени транзакции
+# с меньшими id уже зафиксированы, и токен не перескочит через них.
+SYNC_SETTLE_SECONDS = OUTBOX_GAP_TIMEOUT
+# Коллекции зрителя: модель, поле объекта и ключ ответа.
+VIEWER_COLLECTIONS = (
+    (Favorite, 'recipe_id', 'favorites'),
+    (ShoppingCart, 'recipe_id', 'shopping_cart'),
+    (Subscription, 'author_id', 'subscriptions'),
+)
+
+
+class SyncTokenExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = (
+        'Токен синхронизации устарел: журнал изменений уже очищен. '
+        'Загрузите данные заново и начните с нового токена.'
+    )
+    default_code = 'sync_token_expired'
+
+
+class SyncTokenField(serializers.Field):
+    """Непрозрачный токен: id последнего учтённого события журнала."""
+
+    default_error_messages = {
+        'invalid': 'Некорректный токен синхронизации.',
+    }
+
+    def to_internal_value(self, data):
+        try:
+            value = urlsafe_base64_decode(data).decode()
+        except (ValueError, UnicodeDecodeError):
+            self.fail('invalid')
+        if not value.isdigit():
+            self.fail('invalid')
+        return int(value)
+
+    def to_representation(self, value):
+        return urlsafe_base64_encode(str(value).encode())
+
+
+class SyncParamsSerializer(serializers.Serializer):
+    """Параметры синхронизации."""
+    since = SyncTokenField(required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=SYNC_MAX_PAGE_SIZE, default=SYNC_PAGE_SIZE)
+
+
+def settled_horizon(since):
+    """
+    Последний id, который можно отдать. Токен since должен лежать
+    внутри журнала: если события после него удалены очисткой, клиент
+    пропустил бы изменения, поэтому ему нужна полная загрузка.
+    """
+    bounds = ChangeEvent.objects.aggregate(
+        oldest=Min('pk'), newest=Max('pk'))
+    oldest, newest = bounds['oldest'], bounds['newest'] or 0
+    if since is not None and (
+            since > newest or (oldest is not None and since < oldest - 1)):
+        raise SyncTokenExpired
+    horizon = (
+        ChangeEvent.objects
+        .filter(created_at__lt=timezone.now()
+                - timedelta(seconds=SYNC_SETTLE_SECONDS))
+        .order_by('-pk')
+        .values_list('pk', flat=True)
+        .first()
+    ) or 0
+    return max(horizon, since or 0)
+
+
+def read_events(since, horizon, user, limit):
+    """
+    Страница событий рецептов и коллекций зрителя по возрастанию id.
+    Каждый поток читается по своему индексу не дальше limit + 1 строки,
+    поэтому стоимость зависит от числа изменений, а не от каталога.
+    """
+    journal = (
+        ChangeEvent.objects
+        .filter(pk__gt=since, pk__lte=horizon)
+        .order_by('pk')
+        .only('pk', 'model', 'object_id', 'action')
+    )
+    streams = [journal.filter(model=Recipe._meta.model_name)]
+    if user.is_authenticated:
+        streams.append(journal.filter(user_id=user.pk))
+    events = sorted(
+        (event for stream in streams for event in stream[:limit + 1]),
+        key=attrgetter('pk')
+    )
+    return events[:limit], len(events) > limit
+
+
+def object_ids(events, model):
+    return list(dict.fromkeys(
+        event.object_id for event in events
+        if event.model == model._meta.model_name
+    ))
+
+
+def recipe_changes(events, request):
+    """
+    Изменённые рецепты в текущем состоянии: существующие отдаются
+    целиком, скрытые и удалённые — только id.
+    """
+    ids = object_ids(events, Recipe)
+    created = {
+        event.object_id for event in events
+        if event.model == Recipe._meta.model_name
+        and event.action == ChangeEvent.Action.CREATE
+    }
+    alive = Recipe.objects.only('id', 'author_id', 'updated_at').in_bulk(ids)
+    rendered = render_recipes(
+        [alive[pk] for pk in ids if pk in alive], request)
+    return {
+        'created': [item for item in rendered if item['id'] in created],
+        'updated': [item for item in rendered if item['id'] not in created],
+        'deleted': [pk for pk in ids if pk not in alive],
+    }
+
+
+def viewer_changes(events, user):
+    """Что добавилось в коллекции зрителя и что из них пропало."""
+    changes = {}
+    for model, field, key in VIEWER_COLLECTIONS:
+        ids = object_ids(events, model)
+        present = set(
+            model.objects
+            .filter(user=user, **{f'{field}__in': ids})
+            .values_list(field, flat=True)
+        ) if ids else set()
+        changes[key] = {
+            'added': [pk for pk in ids if pk in present],
+            'removed': [pk for pk in ids if pk not in present],
+        }
+    return changes
+
+
+def collect_changes(request, since=None, limit=SYNC_PAGE_SIZE):
+    """
+    Изменения после токена since. Без токена возвращается только
+    текущий токен и reset: клиент загружает списки целиком и дальше
+    синхронизируется с этого токена.
+    """
+    horizon = settled_horizon(since)
+    if since is None:
+        since, reset = horizon, True
+    else:
+        reset = False
+    events, has_more = read_events(since, horizon, request.user, limit)
+    token = events[-1].pk if has_more else horizon
+    # Массовая перезагрузка справочника меняет рецепты без событий
+    # по каждому из них.
+    reset = reset or ChangeEvent.objects.filter(
+        pk__gt=since, pk__lte=token,
+        action=ChangeEvent.Action.RELOAD
+    ).exists()
+    data = {
+        'token': SyncTokenField().to_representation(token),
+        'has_more': has_more,
+        'reset': reset,
+        'recipes': recipe_changes(events, request),
+    }
+    if request.user.is_authenticated:
+        data.update(viewer_changes(events, request.user))
+    return data
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def sync_view(request):
+    """
+    Изменения рецептов и коллекций пользователя с момента токена
+    ?since=. Повторяйте запрос с новым token, пока has_more истинно.
+    """
+    params = SyncParamsSerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    return Response(collect_changes(request, **params.validated_data))
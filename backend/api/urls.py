@@ -2,6 +2,8 @@ from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from .events import events_ticket_view, events_view
+from .sync import sync_view
 from .views import (
     CustomUserViewSet,
     IngredientViewSet,
@@ -16,6 +18,9 @@ router.register(r'recipes', RecipeViewSet, basename='recipes')
 router.register('users', CustomUserViewSet, basename='users')
 
 urlpatterns = [
+    path('events/', events_view, name='events'),
+    path('events/ticket/', events_ticket_view, name='events-ticket'),
+    path('sync/', sync_view, name='sync'),
     path('', include(router.urls)),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
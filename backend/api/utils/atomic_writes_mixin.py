@@ -0,0 +1,21 @@
+from django.db import transaction
+from rest_framework.permissions import SAFE_METHODS
+
+
+class AtomicWritesMixin:
+    """
+    Миксин, выполняющий изменяющие запросы в одной транзакции.
+    Записи журнала изменений из сигналов фиксируются вместе
+    с изменением или откатываются с ним. Чтение идёт без транзакции:
+    на SQLite она брала бы блокировку записи.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+        with transaction.atomic():
+            response = super().dispatch(request, *args, **kwargs)
+            # DRF превращает исключение в ответ внутри dispatch.
+            if getattr(response, 'exception', False):
+                transaction.set_rollback(True)
+            return response
@@ -2,9 +2,13 @@ class AuthContextMixin:
     """
     Миксин для получения авторизованного
     пользователя из контекста сериализатора.
+    Флаг viewer_independent в контексте отключает зависящие
+    от пользователя поля (для кэшируемых фрагментов).
     """
 
     def get_authenticated_user(self):
+        if self.context.get("viewer_independent"):
+            return None
         request = self.context.get("request")
         user = getattr(request, "user", None)
         return user if user and user.is_authenticated else None
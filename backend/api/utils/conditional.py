@@ -0,0 +1,56 @@
+from hashlib import md5
+
+from django.db.models import Count, Max
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
+
+
+def viewer_version(request):
+    """
+    Версия состояния зрителя: флаги избранного, корзины и подписок
+    в ответе меняются только вместе с collection_version.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return 'anonymous'
+    return f'{user.pk}:{user.collection_version}'
+
+
+def make_etag(*parts):
+    digest = md5(
+        '|'.join(map(str, parts)).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def collection_state(queryset):
+    """Дешёвый отпечаток выборки: одна агрегатная строка без сортировки."""
+    state = queryset.order_by().aggregate(
+        last=Max('updated_at'), count=Count('pk'))
+    return state['last'], state['count']
+
+
+def conditional_response(request, render, *parts, last_modified=None):
+    """
+    Отвечает 304, если ETag (или Last-Modified) совпал с заголовками
+    запроса, иначе вызывает render(). Last-Modified передаётся только
+    для ответов, не зависящих от зрителя: смену избранного или
+    подписок он не отражает.
+    """
+    etag = make_etag(request.get_full_path(), viewer_version(request), *parts)
+    timestamp = last_modified and int(last_modified.timestamp())
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = render()
+    if 200 <= response.status_code < 300 or response.status_code == 304:
+        response['ETag'] = etag
+        if timestamp:
+            response['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+    return response
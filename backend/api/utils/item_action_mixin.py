@@ -1,7 +1,16 @@
+import re
+
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.response import Response
 
+from api.events import publish_event
+
+
+def event_prefix(model):
+    """ShoppingCart → shopping_cart: префикс событий для потока SSE."""
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', model.__name__).lower()
+
 
 class ItemActionMixin:
     """Миксин для добавления и удаления рецептов в избранное и корзину."""
@@ -17,6 +26,8 @@ class ItemActionMixin:
             return Response({'message': 'Рецепт уже добавлен'},
                             status=status.HTTP_400_BAD_REQUEST)
         model.objects.create(user=user, recipe=recipe)
+        publish_event(user.pk, f'{event_prefix(model)}.added',
+                      recipe=recipe.pk)
         serializer = serializer_class(recipe, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -27,4 +38,6 @@ class ItemActionMixin:
             return Response({'message': 'Рецепт не найден в списке.'},
                             status=status.HTTP_400_BAD_REQUEST)
         item.delete()
+        publish_event(request.user.pk, f'{event_prefix(model)}.removed',
+                      recipe=recipe.pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
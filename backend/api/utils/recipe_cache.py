@@ -0,0 +1,129 @@
+from django.core.cache import cache
+
+from api.metrics import record_cache
+from api.serializers import RecipeSerializer
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription
+
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+
+def fragment_key(request, recipe, selection=None):
+    """
+    Ключ фрагмента рецепта. Версия — время последнего изменения,
+    поэтому устаревшие фрагменты просто перестают запрашиваться.
+    Выборочные поля кэшируются отдельно от полного представления.
+    """
+    version = int(recipe.updated_at.timestamp() * 1_000_000)
+    key = f'recipe-fragment:{request.get_host()}:{recipe.pk}:{version}'
+    if selection is not None:
+        key = f'{key}:{selection.key}'
+    return key
+
+
+def render_fragments(recipe_ids, request, selection=None):
+    """Сериализует рецепты без полей, зависящих от пользователя."""
+    recipes = RecipeSerializer.prefetch(
+        Recipe.objects.filter(pk__in=recipe_ids), selection)
+    context = {'request': request, 'viewer_independent': True}
+    return {
+        recipe.pk: RecipeSerializer(
+            recipe, context=context, selection=selection).data
+        for recipe in recipes
+    }
+
+
+def overlay_viewer_flags(fragments, request):
+    """
+    Дополняет фрагменты флагами текущего пользователя. Флаги,
+    которых нет во фрагментах, не запрашиваются.
+    """
+    if not fragments:
+        return fragments
+    sample = fragments[0]
+    author = sample.get('author')
+    wants_favorited = 'is_favorited' in sample
+    wants_in_cart = 'is_in_shopping_cart' in sample
+    wants_subscribed = isinstance(author, dict) and 'is_subscribed' in author
+    user = request.user
+    favorited = in_cart = subscribed = frozenset()
+    if user.is_authenticated:
+        recipe_ids = [item['id'] for item in fragments]
+        if wants_favorited:
+            favorited = set(
+                Favorite.objects
+                .filter(user=user, recipe_id__in=recipe_ids)
+                .values_list('recipe_id', flat=True)
+            )
+        if wants_in_cart:
+            in_cart = set(
+                ShoppingCart.objects
+                .filter(user=user, recipe_id__in=recipe_ids)
+                .values_list('recipe_id', flat=True)
+            )
+        if wants_subscribed:
+            subscribed = set(
+                Subscription.objects
+                .filter(user=user, author_id__in={
+                    item['author']['id'] for item in fragments})
+                .values_list('author_id', flat=True)
+            )
+    data = []
+    for fragment in fragments:
+        fragment = dict(fragment)
+        if wants_subscribed:
+            fragment['author'] = dict(
+                fragment['author'],
+                is_subscribed=fragment['author']['id'] in subscribed)
+        if wants_favorited:
+            fragment['is_favorited'] = fragment['id'] in favorited
+        if wants_in_cart:
+            fragment['is_in_shopping_cart'] = fragment['id'] in in_cart
+        data.append(fragment)
+    return data
+
+
+def render_recipes(recipes, request, selection=None):
+    """
+    Собирает представление рецептов из кэшированных фрагментов.
+    Достаточно объектов с полями id и updated_at; сериализатор
+    вызывается только для промахов кэша. selection оставляет
+    в ответе только выбранные поля.
+    """
+    keys = {
+        recipe.pk: fragment_key(request, recipe, selection)
+        for recipe in recipes
+    }
+    fragments = cache.get_many(keys.values())
+    missing = [pk for pk, key in keys.items() if key not in fragments]
+    record_cache('recipe_fragments', len(keys) - len(missing), len(missing))
+    if missing:
+        rendered = {
+            keys[pk]: fragment
+            for pk, fragment in render_fragments(
+                missing, request, selection).items()
+        }
+        cache.set_many(rendered, FRAGMENT_TIMEOUT)
+        fragments.update(rendered)
+    return overlay_viewer_flags(
+        [fragments[key] for key in keys.values() if key in fragments],
+        request
+    )
+
+
+def render_recipe(recipe, request, selection=None):
+    """
+    Представление одного рецепта. Промах пересчитывается через
+    get_or_set: если свежеизменённую карточку запросили сразу многие,
+    сериализатор вызывается один раз, остальные ждут его результат.
+    """
+    rendered = []
+
+    def render():
+        rendered.append(recipe.pk)
+        return render_fragments([recipe.pk], request, selection)[recipe.pk]
+
+    fragment = cache.get_or_set(
+        fragment_key(request, recipe, selection), render, FRAGMENT_TIMEOUT)
+    record_cache('recipe_fragments', 1 - len(rendered), len(rendered))
+    return overlay_viewer_flags([fragment], request)[0]
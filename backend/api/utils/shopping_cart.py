@@ -1,17 +1,16 @@
 from django.db.models import F, Sum
 from django.http import HttpResponse
 
+from api.metrics import SHOPPING_LIST_BYTES
 from recipes.models import RecipeIngredient
 
 
-def generate_shopping_cart_text(user):
-    """
-    Генерирует текстовый список покупок для пользователя по его корзине.
-    Возвращает строку или None, если корзина пуста.
-    """
-    ingredients = (
+def shopping_cart_ingredients(user):
+    """Суммирует ингредиенты рецептов из корзины пользователя."""
+    return (
         RecipeIngredient.objects
-        .filter(recipe__shoppingcart__user=user)
+        .filter(recipe__shoppingcart__user=user,
+                recipe__deleted_at__isnull=True)
         .values(
             name=F('ingredient__name'),
             unit=F('ingredient__measurement_unit')
@@ -20,6 +19,14 @@ def generate_shopping_cart_text(user):
         .order_by('name')
     )
 
+
+def generate_shopping_cart_text(user):
+    """
+    Генерирует текстовый список покупок для пользователя по его корзине.
+    Возвращает строку или None, если корзина пуста.
+    """
+    ingredients = shopping_cart_ingredients(user)
+
     if not ingredients:
         return None
 
@@ -40,6 +47,7 @@ def download_shopping_cart_response(user):
         return None
 
     response = HttpResponse(content, content_type='text/plain')
+    SHOPPING_LIST_BYTES.observe(len(response.content))
     response['Content-Disposition'] = (
         'attachment; filename="shopping_list.txt"'
     )
@@ -0,0 +1,141 @@
+from dataclasses import dataclass, field
+
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+@dataclass(frozen=True)
+class FieldSelection:
+    """
+    Поля ответа из ?fields= и ?expand=. id отдаётся всегда. Связи
+    без раскрытия отдаются одними id; author.username в fields
+    раскрывает связь только с перечисленными полями.
+    """
+
+    fields: frozenset
+    expand: frozenset = frozenset()
+    nested: dict = field(default_factory=dict)
+
+    def includes(self, name):
+        return name in self.fields
+
+    def is_expanded(self, name):
+        return name in self.expand or name in self.nested
+
+    def get_nested(self, name):
+        """Выборка полей раскрытой связи; None — все поля."""
+        return self.nested.get(name)
+
+    @property
+    def key(self):
+        """Каноническая запись выборки для ключей кэша."""
+        parts = []
+        for name in sorted(self.fields):
+            if name in self.nested:
+                name = f'{name}({self.nested[name].key})'
+            elif name in self.expand:
+                name = f'{name}(*)'
+            parts.append(name)
+        return ','.join(parts)
+
+
+def split_param(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def nested_fields(serializer_class, name):
+    """Поля сериализатора связи name."""
+    nested = serializer_class._declared_fields[name]
+    return getattr(nested, 'child', nested).Meta.fields
+
+
+def parse_selection(query_params, serializer_class):
+    """
+    Разбирает ?fields= и ?expand= для сериализатора с SparseFieldsMixin.
+    Возвращает None, если поля не выбраны (fields нет или он пуст):
+    тогда ответ полный, все связи раскрыты и expand ничего не меняет.
+    """
+    allowed = serializer_class.Meta.fields
+    expandable = serializer_class.expandable_fields
+    names = split_param(query_params.get(FIELDS_PARAM, ''))
+    expand = split_param(query_params.get(EXPAND_PARAM, ''))
+    errors = {}
+    unknown = [name for name in expand if name not in expandable]
+    if unknown:
+        errors[EXPAND_PARAM] = (
+            f'Нельзя раскрыть: {", ".join(unknown)}. '
+            f'Доступно: {", ".join(expandable) or "нет"}.'
+        )
+    if not names:
+        if errors:
+            raise serializers.ValidationError(errors)
+        return None
+    top, nested = set(), {}
+    for name in names:
+        name, _, child = name.partition('.')
+        top.add(name)
+        if child:
+            nested.setdefault(name, set()).add(child)
+    unknown = [name for name in top if name not in allowed]
+    for name, children in nested.items():
+        if name in expandable:
+            children = [
+                child for child in children
+                if child not in nested_fields(serializer_class, name)]
+        unknown.extend(f'{name}.{child}' for child in children)
+    if unknown:
+        errors[FIELDS_PARAM] = (
+            f'Неизвестные поля: {", ".join(sorted(unknown))}.')
+    if errors:
+        raise serializers.ValidationError(errors)
+    return FieldSelection(
+        fields=frozenset(top | set(expand) | {'id'}),
+        expand=frozenset(expand),
+        nested={
+            name: FieldSelection(fields=frozenset(children | {'id'}))
+            for name, children in nested.items()
+        },
+    )
+
+
+class SparseFieldsMixin:
+    """
+    Оставляет в сериализаторе только поля выборки selection. Связи
+    из expandable_fields без раскрытия заменяются полями из
+    get_collapsed_field(name) — обычно одними id; сериализатор
+    со сворачиваемыми связями обязан его определить.
+    """
+    expandable_fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.expandable_fields and not hasattr(cls, 'get_collapsed_field'):
+            raise TypeError(
+                f'{cls.__name__}: для expandable_fields нужен '
+                f'get_collapsed_field.')
+
+    def __init__(self, *args, selection=None, **kwargs):
+        self.selection = selection
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = self.selection
+        if selection is None:
+            return fields
+        selected = {}
+        for name, serializer_field in fields.items():
+            if not selection.includes(name):
+                continue
+            if name in self.expandable_fields:
+                if not selection.is_expanded(name):
+                    serializer_field = self.get_collapsed_field(name)
+                else:
+                    # Поля — копии объявленных, их можно настраивать.
+                    getattr(serializer_field, 'child',
+                            serializer_field).selection = (
+                        selection.get_nested(name))
+            selected[name] = serializer_field
+        return selected
@@ -1,3 +1,4 @@
+from django.db.models import Max, Sum
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
@@ -7,15 +8,27 @@ from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
+from api.utils.conditional import collection_state, conditional_response
+from api.utils.recipe_cache import render_recipe, render_recipes
 from api.utils.shopping_cart import download_shopping_cart_response
+from api.utils.sparse_fields import parse_selection
+from recipes.ingredient_index import get_ingredient_index
 from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.purge import tombstone_recipe, tombstone_user
 from users.models import FoodgramUser, Subscription
-from .filters import IngredientSearchFilter, RecipeFilter
-from .pagination import LimitPageNumberPagination
+from .events import publish_event
+from .filters import (
+    IngredientSearchFilter,
+    RecipeFilter,
+    RecipeOrderingFilter,
+    UserSearchFilter,
+)
+from .pagination import LimitPageNumberPagination, UserCursorPagination
 from .permissions import ReadOnly
 from .serializers import (
     CreateUserSerializer,
     IngredientSerializer,
+    PantrySearchSerializer,
     RecipeCreateSerializer,
     RecipeLinkSerializer,
     RecipeSerializer,
@@ -27,6 +40,7 @@ from .serializers import (
     UserInfoSerializer,
     UserSubscriptionSerializer,
 )
+from .utils.atomic_writes_mixin import AtomicWritesMixin
 from .utils.item_action_mixin import ItemActionMixin
 from .utils.permissions_map import recipe_permissions, user_permissions
 
@@ -39,7 +53,7 @@ class TagViewSet(ReadOnlyModelViewSet):
     pagination_class = None
 
 
-class IngredientViewSet(ModelViewSet):
+class IngredientViewSet(AtomicWritesMixin, ModelViewSet):
     """Вьюсет для ингредиентов. CRUD + поиск."""
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
@@ -49,23 +63,23 @@ class IngredientViewSet(ModelViewSet):
     pagination_class = None
 
 
-class RecipeViewSet(ItemActionMixin, ModelViewSet):
+class RecipeViewSet(AtomicWritesMixin, ItemActionMixin, ModelViewSet):
     """
     Вьюсет для рецептов. CRUD, избранное, корзина, скачивание списка покупок.
     """
     queryset = Recipe.objects.select_related('author').prefetch_related(
         'tags',
         'recipe_ingredients__ingredient',
-        'favorite_set',
-        'shoppingcart_set'
     )
     pagination_class = LimitPageNumberPagination
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, RecipeOrderingFilter)
     filterset_class = RecipeFilter
     ordering_fields = ('pub_date',)
-    ordering = ('pub_date',)
+    ordering = ('-pub_date',)
     permission_classes = [AllowAny]
     permission_classes_by_action = recipe_permissions
+    # Действия, ответ которых можно сузить через ?fields= и ?expand=.
+    sparse_actions = {'list', 'retrieve', 'pantry'}
 
     def get_permissions(self):
         perms = self.permission_classes_by_action.get(
@@ -73,19 +87,70 @@ class RecipeViewSet(ItemActionMixin, ModelViewSet):
         )
         return [perm() for perm in perms]
 
+    def get_selection(self):
+        if self.action not in self.sparse_actions:
+            return None
+        return parse_selection(self.request.query_params, RecipeSerializer)
+
+    def get_queryset(self):
+        if self.action in {'list', 'retrieve', 'similar'}:
+            # Представление собирается из кэша фрагментов,
+            # поэтому достаточно ключевых полей.
+            return Recipe.objects.only('id', 'author_id', 'updated_at')
+        return super().get_queryset()
+
     def get_serializer_class(self):
         if self.action in {'create', 'update', 'partial_update'}:
             return RecipeCreateSerializer
         if self.action in {'favorite', 'shopping_cart', 'delete_favorite',
-                           'delete_shopping_cart', 'get_shopping_cart'}:
+                           'delete_shopping_cart', 'get_shopping_cart',
+                           'similar'}:
             return RecipeShortSerializer
         if self.action == 'get_short_link':
             return RecipeLinkSerializer
         return RecipeSerializer
 
+    def list(self, request, *args, **kwargs):
+        selection = self.get_selection()
+        queryset = self.filter_queryset(self.get_queryset())
+        last_modified, count = collection_state(queryset)
+        parts = [last_modified, count]
+        if request.query_params.get('ordering') == 'trending':
+            parts.append(queryset.order_by().aggregate(
+                total=Sum('trending_score'))['total'])
+
+        def render():
+            page = self.paginate_queryset(queryset)
+            return self.get_paginated_response(
+                render_recipes(page, request, selection))
+
+        # Без Last-Modified: максимум updated_at падает, когда скрывают
+        # самый свежий рецепт, а trending меняет порядок без правок.
+        # Изменения списка ловит ETag: в нём и число, и сумма trending.
+        return conditional_response(request, render, *parts)
+
+    def retrieve(self, request, *args, **kwargs):
+        selection = self.get_selection()
+        recipe = self.get_object()
+        return conditional_response(
+            request,
+            lambda: Response(render_recipe(recipe, request, selection)),
+            recipe.updated_at,
+            last_modified=self.public_last_modified(recipe.updated_at)
+        )
+
+    def public_last_modified(self, last_modified):
+        """Last-Modified не отражает флаги зрителя — только для анонимов."""
+        if self.request.user.is_authenticated:
+            return None
+        return last_modified
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def perform_destroy(self, instance):
+        tombstone_recipe(instance)
+
     @action(detail=True, methods=['post'])
     def favorite(self, request, pk=None):
         return self.add_item(Favorite, RecipeShortSerializer, request, pk)
@@ -120,9 +185,42 @@ class RecipeViewSet(ItemActionMixin, ModelViewSet):
     def get_shopping_cart(self, request):
         user = request.user
         recipes = Recipe.objects.filter(shoppingcart__user=user)
+
+        def render():
+            serializer = RecipeShortSerializer(recipes, many=True,
+                                               context={'request': request})
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+        return conditional_response(
+            request, render, *collection_state(recipes))
+
+    @action(detail=False, methods=['get'])
+    def pantry(self, request):
+        params = PantrySearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        ranked = get_ingredient_index().rank_by_coverage(
+            params.validated_data['have'], params.validated_data['exclude'])
+        page = dict(self.paginate_queryset(ranked))
+        recipes = Recipe.objects.only(
+            'id', 'author_id', 'updated_at').in_bulk(page)
+        data = render_recipes(
+            [recipes[pk] for pk in page if pk in recipes], request,
+            self.get_selection())
+        for item in data:
+            item['coverage'] = round(page[item['id']], 3)
+        return self.get_paginated_response(data)
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        recipe = self.get_object()
+        recipes = (
+            Recipe.objects
+            .filter(similar_to__recipe=recipe)
+            .order_by('-similar_to__score')
+        )
         serializer = RecipeShortSerializer(recipes, many=True,
                                            context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(serializer.data)
 
     @action(detail=True, methods=['get'], url_path='get-link')
     def get_short_link(self, request, pk=None):
@@ -132,16 +230,20 @@ class RecipeViewSet(ItemActionMixin, ModelViewSet):
         return Response(serializer.data)
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(AtomicWritesMixin, UserViewSet):
     """
     Кастомный вьюсет на базе Djoser для работы с пользователями:
     регистрация, профиль, подписки, смена пароля.
     """
-    queryset = FoodgramUser.objects.all()
+    queryset = FoodgramUser.objects.filter(deleted_at__isnull=True)
     pagination_class = LimitPageNumberPagination
     permission_classes = (AllowAny,)
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = UserSearchFilter
 
     permission_classes_by_action = user_permissions
+    # Действия, ответ которых можно сузить через ?fields=.
+    sparse_actions = {'list', 'retrieve', 'me', 'subscriptions'}
 
     def get_permissions(self):
         perms = self.permission_classes_by_action.get(
@@ -149,6 +251,46 @@ class CustomUserViewSet(UserViewSet):
         )
         return [perm() for perm in perms]
 
+    def get_selection(self):
+        if not hasattr(self, '_selection'):
+            self._selection = None
+            if (self.action in self.sparse_actions
+                    and self.request.method == 'GET'):
+                self._selection = parse_selection(
+                    self.request.query_params,
+                    UserSubscriptionSerializer
+                    if self.action == 'subscriptions'
+                    else UserInfoSerializer
+                )
+        return self._selection
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        selection = self.get_selection()
+        if selection is not None and self.action in {'list', 'retrieve'}:
+            columns = UserInfoSerializer.columns(selection)
+            if isinstance(self.paginator, UserCursorPagination):
+                # Курсор строится по полям сортировки последней записи.
+                columns += UserCursorPagination.ordering
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.get_serializer_class() is UserInfoSerializer:
+            kwargs.setdefault('selection', self.get_selection())
+        return super().get_serializer(*args, **kwargs)
+
+    @property
+    def paginator(self):
+        """Параметр cursor (можно пустой) включает курсорную пагинацию."""
+        if not hasattr(self, '_paginator'):
+            if (self.action == 'list'
+                    and 'cursor' in self.request.query_params):
+                self._paginator = UserCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def get_serializer_class(self):
         if self.action == 'create':
             return CreateUserSerializer
@@ -156,6 +298,9 @@ class CustomUserViewSet(UserViewSet):
             return SetPasswordSerializer
         return UserInfoSerializer
 
+    def perform_destroy(self, instance):
+        tombstone_user(instance)
+
     @action(detail=False, methods=['post'])
     def set_password(self, request):
         serializer = self.get_serializer(data=request.data,
@@ -170,7 +315,7 @@ class CustomUserViewSet(UserViewSet):
     @action(detail=True, methods=['post', 'delete'])
     def subscribe(self, request, id=None):
         user = request.user
-        author = get_object_or_404(FoodgramUser, pk=id)
+        author = get_object_or_404(self.queryset, pk=id)
 
         if request.method == 'POST':
             serializer = SubscriptionSerializer(
@@ -179,6 +324,7 @@ class CustomUserViewSet(UserViewSet):
             )
             serializer.is_valid(raise_exception=True)
             serializer.save()
+            publish_event(user.pk, 'subscription.added', author=author.pk)
 
             response_serializer = UserSubscriptionSerializer(
                 author, context={'request': request}
@@ -190,6 +336,7 @@ class CustomUserViewSet(UserViewSet):
                                                    author=author).first()
         if subscription:
             subscription.delete()
+            publish_event(user.pk, 'subscription.removed', author=author.pk)
             return Response(status=status.HTTP_204_NO_CONTENT)
 
         return Response(
@@ -202,11 +349,27 @@ class CustomUserViewSet(UserViewSet):
         author_ids = Subscription.objects.filter(user=request.user) \
             .values_list('author_id', flat=True)
 
-        authors = FoodgramUser.objects.filter(id__in=author_ids)
-        page = self.paginate_queryset(authors)
-        serializer = UserSubscriptionSerializer(page, many=True,
-                                                context={'request': request})
-        return self.get_paginated_response(serializer.data)
+        # Meta.ordering не применяется к запросам с агрегатами.
+        selection = self.get_selection()
+        authors = UserSubscriptionSerializer.prefetch(
+            self.queryset.filter(id__in=author_ids), request, selection
+        ).order_by('username')
+
+        def render():
+            page = self.paginate_queryset(authors)
+            serializer = UserSubscriptionSerializer(
+                page, many=True, context={'request': request},
+                selection=selection)
+            return self.get_paginated_response(serializer.data)
+
+        # Профили авторов и их рецепты: рецепты меняют recipes
+        # и recipes_count, профиль — поля автора, даже без рецептов.
+        return conditional_response(
+            request, render,
+            *collection_state(Recipe.objects.filter(author__in=author_ids)),
+            FoodgramUser.objects.filter(id__in=author_ids).aggregate(
+                last=Max('updated_at'))['last']
+        )
 
     @action(detail=False, methods=['post', 'put', 'patch'],
             url_path='me/avatar')
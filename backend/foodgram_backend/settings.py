@@ -32,10 +32,13 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'recipes.apps.RecipesConfig',
     'api.apps.ApiConfig',
+    'analytics.apps.AnalyticsConfig',
     'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'api.health.HealthCheckMiddleware',
+    'api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -44,6 +47,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'api.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'foodgram_backend.urls'
@@ -73,11 +77,26 @@ DATABASE_TYPE = os.getenv('DATABASE_TYPE', 'sqlite').lower()
 if DATABASE_TYPE == 'sqlite':
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
+            'ENGINE': 'foodgram_backend.sqlite_backend',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # Соединение живёт между запросами: PRAGMA, кэш страниц
+            # и mmap не настраиваются заново на каждый запрос.
+            'CONN_MAX_AGE': int(os.getenv('SQLITE_CONN_MAX_AGE', 60)),
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'pragmas': {
+                    'busy_timeout': int(
+                        os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+                    'mmap_size': int(
+                        os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+                    'cache_size': -int(
+                        os.getenv('SQLITE_CACHE_SIZE_KB', 20000)),
+                },
+            },
         }
     }
 elif DATABASE_TYPE == 'postgresql':
+    INSTALLED_APPS.append('django.contrib.postgres')
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.postgresql',
@@ -86,6 +105,10 @@ elif DATABASE_TYPE == 'postgresql':
             'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
             'HOST': os.getenv('DB_HOST'),
             'PORT': os.getenv('DB_PORT', 5432),
+            # Соединение, открытое при прогреве воркера, переживает
+            # запросы; перед повторным использованием оно проверяется.
+            'CONN_MAX_AGE': int(os.getenv('POSTGRES_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
         }
     }
 else:
@@ -120,12 +143,45 @@ STATIC_ROOT = BASE_DIR / 'collect_static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+EVENTS_BROKER = os.getenv('EVENTS_BROKER', 'api.events.InProcessBroker')
+
+PROFILE_DIR = Path(os.getenv('PROFILE_DIR', BASE_DIR / 'profiles'))
+
+# default — LRU процесса перед общим для воркеров кэшем shared.
+# Для memcached: CACHE_BACKEND=django.core.cache.backends.memcached.
+# PyMemcacheCache и CACHE_LOCATION=host:11211.
+CACHES = {
+    'default': {
+        'BACKEND': 'api.cache.TieredCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_ENTRIES': int(
+                os.getenv('CACHE_LOCAL_MAX_ENTRIES', 1000)),
+            'LOCAL_TIMEOUT': int(os.getenv('CACHE_LOCAL_TIMEOUT', 30)),
+        },
+    },
+    'shared': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'recipes.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-INTERNAL_IPS = [
-    '127.0.0.1',
-    'localhost',
-]
+INTERNAL_IPS = os.getenv('INTERNAL_IPS', '127.0.0.1,localhost').split(',')
 
 REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'api.utils.handlers.custom_exception_handler',
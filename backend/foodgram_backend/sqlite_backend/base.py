@@ -0,0 +1,59 @@
+from django.db.backends.sqlite3 import base
+
+# Значения по умолчанию для рабочих инстансов на SQLite. WAL пускает
+# читателей параллельно с писателем; synchronous=NORMAL в WAL теряет
+# при сбое питания лишь последние транзакции, но не портит базу.
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ, а не в страницах.
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite с настройкой каждого соединения через PRAGMA и записью
+    в транзакциях BEGIN IMMEDIATE. Обычный BEGIN берёт блокировку
+    записи только на первой записи: если к этому моменту пишет другой
+    процесс, SQLite сразу отвечает «database is locked», не дожидаясь
+    busy_timeout. IMMEDIATE берёт её в начале транзакции, и ожидание
+    работает.
+
+    OPTIONS: pragmas — словарь PRAGMA поверх DEFAULT_PRAGMAS,
+    transaction_mode — режим BEGIN для transaction.atomic().
+    """
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    @property
+    def pragmas(self):
+        return {
+            **DEFAULT_PRAGMAS,
+            **self.settings_dict['OPTIONS'].get('pragmas', {}),
+        }
+
+    @property
+    def transaction_mode(self):
+        mode = self.settings_dict['OPTIONS'].get(
+            'transaction_mode', 'IMMEDIATE').upper()
+        if mode not in TRANSACTION_MODES:
+            raise ValueError(f'Неизвестный transaction_mode: {mode}')
+        return mode
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -3,9 +3,14 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from api.metrics import metrics_view
+from recipes.views import short_link_redirect
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    path('s/<str:code>/', short_link_redirect, name='short-link'),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,32 @@
+import os
+import shutil
+
+bind = '0.0.0.0:8000'
+
+
+def on_starting(server):
+    """Очищает файлы метрик прошлого запуска."""
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def post_worker_init(worker):
+    """
+    Прогревает воркер до того, как /api/health/ сообщит о готовности,
+    и запускает чтение журнала изменений для сброса кэшей воркера.
+    """
+    from api.health import warm_up
+    from api.outbox import start_outbox_consumer
+
+    warm_up()
+    start_outbox_consumer()
+
+
+def child_exit(server, worker):
+    """Убирает gauge-метрики завершившегося воркера."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.html import format_html
 
+from .admin_mixins import TombstoneAdminMixin
 from .models import (
     Favorite,
     Ingredient,
@@ -9,6 +12,8 @@ from .models import (
     ShoppingCart,
     Tag,
 )
+from .paginators import EstimatedCountPaginator
+from .purge import tombstone_recipe
 
 admin.site.empty_value_display = '-пусто-'
 
@@ -39,15 +44,22 @@ class RecipeIngredientInline(admin.TabularInline):
     """
     model = RecipeIngredient
     extra = 1
+    autocomplete_fields = ('ingredient',)
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(TombstoneAdminMixin, admin.ModelAdmin):
     """Админка для модели Recipe (рецепт)."""
     list_display = ('id', 'name', 'author', 'favorites_count', 'image_display')
     search_fields = ('name', 'author__username', 'author__email')
-    list_filter = ('tags', 'author', 'pub_date')
+    list_filter = ('tags', 'pub_date')
+    list_select_related = ('author',)
+    autocomplete_fields = ('author',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     inlines = [RecipeIngredientInline]
+    actions = ('mark_deleted',)
+    tombstone = staticmethod(tombstone_recipe)
     readonly_fields = ('image_display', 'favorites_count')
 
     fields = (
@@ -55,6 +67,27 @@ class RecipeAdmin(admin.ModelAdmin):
         'cooking_time', 'favorites_count', 'tags'
     )
 
+    def get_queryset(self, request):
+        # Коррелированный подзапрос считается только для строк страницы,
+        # в отличие от GROUP BY по всей таблице.
+        favorites = (
+            Favorite.objects
+            .filter(recipe=OuterRef('pk'))
+            .values('recipe')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return super().get_queryset(request).annotate(
+            favorites_total=Coalesce(
+                Subquery(favorites, output_field=IntegerField()), 0)
+        )
+
+    @admin.action(description='Скрыть и удалить в фоне')
+    def mark_deleted(self, request, queryset):
+        """Помечает рецепты на удаление командой purge_deleted."""
+        for recipe in queryset:
+            tombstone_recipe(recipe)
+
     @admin.display(description='Фото')
     def image_display(self, obj):
         """Показывает превью изображения рецепта в админке."""
@@ -62,10 +95,10 @@ class RecipeAdmin(admin.ModelAdmin):
             return format_html("<img src='{}' width='100' />", obj.image.url)
         return 'нет фото'
 
-    @admin.display(description='В избранном')
+    @admin.display(description='В избранном', ordering='favorites_total')
     def favorites_count(self, obj):
         """Возвращает количество добавлений рецепта в избранное."""
-        return obj.favorite_set.count()
+        return obj.favorites_total
 
 
 @admin.register(RecipeIngredient)
@@ -75,7 +108,10 @@ class RecipeIngredientAdmin(admin.ModelAdmin):
     """
     list_display = ('id', 'recipe', 'ingredient', 'amount')
     search_fields = ('recipe__name', 'ingredient__name')
-    list_filter = ('ingredient',)
+    list_select_related = ('recipe', 'ingredient')
+    autocomplete_fields = ('recipe', 'ingredient')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Favorite)
@@ -83,9 +119,13 @@ class FavoriteAdmin(admin.ModelAdmin):
     """
     Админка для модели Favorite (избранное).
     """
-    list_display = ('id', 'user', 'recipe')
+    list_display = ('id', 'user', 'recipe', 'created_at')
     search_fields = ('user__username', 'recipe__name')
-    list_filter = ('user',)
+    list_filter = ('created_at',)
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(ShoppingCart)
@@ -93,6 +133,10 @@ class ShoppingCartAdmin(admin.ModelAdmin):
     """
     Админка для модели ShoppingCart (список покупок).
     """
-    list_display = ('id', 'user', 'recipe')
+    list_display = ('id', 'user', 'recipe', 'created_at')
     search_fields = ('user__username', 'recipe__name')
-    list_filter = ('user',)
+    list_filter = ('created_at',)
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
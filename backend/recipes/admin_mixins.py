@@ -0,0 +1,56 @@
+from django.db import models
+
+
+def cascade_models(model, seen=None):
+    """Модели, строки которых удаляются каскадом вслед за model."""
+    seen = set() if seen is None else seen
+    for relation in model._meta.related_objects:
+        related = relation.related_model
+        if (getattr(relation, 'on_delete', None) is models.CASCADE
+                and related not in seen):
+            seen.add(related)
+            cascade_models(related, seen)
+    return seen
+
+
+class TombstoneAdminMixin:
+    """
+    Удаление из админки без синхронного каскада: объект скрывается
+    функцией tombstone, а строки и файлы удаляет purge_deleted.
+    Стандартное «Удалить выбранные» убрано: массово объекты скрывает
+    действие mark_deleted. Страница подтверждения не обходит связи объекта.
+    """
+    tombstone = None
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_deleted_objects(self, objs, request):
+        """
+        Подтверждение без обхода связанных строк. Права проверяются,
+        как в Django, но по моделям каскада, а не по каждой строке:
+        purge_deleted позже удалит их все.
+        """
+        objs = list(objs)
+        perms_needed = set()
+        registry = self.admin_site._registry
+        for model in cascade_models(self.model):
+            model_admin = registry.get(model)
+            if (model_admin is not None
+                    and not model_admin.has_delete_permission(request)):
+                perms_needed.add(model._meta.verbose_name)
+        return (
+            [str(obj) for obj in objs],
+            {self.model._meta.verbose_name_plural: len(objs)},
+            perms_needed,
+            [],
+        )
+
+    def delete_model(self, request, obj):
+        self.tombstone(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.tombstone(obj)
@@ -0,0 +1,73 @@
+import logging
+import threading
+import time
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundIndex:
+    """
+    Индекс в памяти процесса, который перестраивается в фоновом
+    потоке: пока идёт сборка, запросы читают прежний. Первая сборка
+    идёт на месте (её выполняет прогрев при старте). Если индекс
+    устарел во время сборки, сборка повторяется.
+
+    build() возвращает новый индекс с атрибутом built_at.
+    """
+
+    def __init__(self, name, build, ttl):
+        self.name = name
+        self.build = build
+        self.ttl = ttl
+        self.index = None
+        self.stale = False
+        self.rebuilding = False
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+
+    def get(self):
+        index = self.index
+        if index is None:
+            with self.build_lock:
+                if self.index is None:
+                    self.index = self.build()
+                return self.index
+        if self.stale or time.monotonic() - index.built_at > self.ttl:
+            self.schedule_rebuild()
+        return index
+
+    def invalidate(self):
+        if self.index is None:
+            return
+        with self.lock:
+            self.stale = True
+        self.schedule_rebuild()
+
+    def schedule_rebuild(self):
+        with self.lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+        threading.Thread(
+            target=self.rebuild, name=self.name, daemon=True).start()
+
+    def rebuild(self):
+        try:
+            while True:
+                with self.lock:
+                    self.stale = False
+                index = self.build()
+                with self.lock:
+                    self.index = index
+                    if not self.stale:
+                        self.rebuilding = False
+                        return
+        except Exception:
+            logger.exception('Не удалось перестроить индекс %s', self.name)
+            with self.lock:
+                self.stale = True
+                self.rebuilding = False
+        finally:
+            connection.close()
@@ -0,0 +1,28 @@
+from .models import ChangeEvent
+
+
+def record_change(model, object_id, action, user_id=None):
+    """Пишет событие в журнал изменений в текущей транзакции."""
+    ChangeEvent.objects.create(
+        model=model._meta.model_name,
+        object_id=object_id,
+        action=action,
+        user_id=user_id,
+    )
+
+
+def record_changes(model, object_ids, action):
+    """Журналирует изменения, сделанные в обход сигналов (update, bulk)."""
+    ChangeEvent.objects.bulk_create(
+        ChangeEvent(
+            model=model._meta.model_name,
+            object_id=object_id,
+            action=action,
+        )
+        for object_id in dict.fromkeys(object_ids)
+    )
+
+
+def record_reload(model):
+    """Помечает, что изменилась вся таблица модели."""
+    record_change(model, None, ChangeEvent.Action.RELOAD)
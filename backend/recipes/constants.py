@@ -16,3 +16,39 @@ INGREDIENT_AMOUNT_MAX = 10000
 
 # CreateUserSerializer
 NAME_MAX_LENGTH = 150
+
+# Short links
+SHORT_CODE_MAX_LENGTH = 11
+SHORT_LINK_CACHE_SIZE = 4096
+SHORT_LINK_MAX_AGE = 60 * 60 * 24 * 30
+
+# SimilarRecipe
+SIMILAR_RECIPES_TOP_K = 10
+
+# Ingredient index
+INGREDIENT_INDEX_TTL = 60
+# Больше id фильтр не передаёт в IN (...): SQLite до 3.32 принимает
+# не больше 999 параметров в запросе.
+INGREDIENT_FILTER_MAX_IDS = 900
+
+# Ingredient search
+INGREDIENT_SEARCH_SIMILARITY = 0.3
+INGREDIENT_SEARCH_MIN_FUZZY_LENGTH = 3
+INGREDIENT_SEARCH_INDEX_TTL = 60 * 10
+
+# Trending
+TRENDING_HALF_LIFE_HOURS = 72
+TRENDING_FAVORITE_WEIGHT = 2
+TRENDING_SHOPPING_CART_WEIGHT = 1
+TRENDING_RECENT_MINUTES = 60
+
+# MediaBlob
+MEDIA_BLOB_NAME_MAX_LENGTH = 100
+MEDIA_BLOB_PREFIX = 'blobs'
+MEDIA_SWEEP_GRACE_HOURS = 24
+MEDIA_VERIFY_WORKERS = 2
+
+# ChangeEvent
+CHANGE_EVENT_MODEL_MAX_LENGTH = 32
+CHANGE_EVENT_ACTION_MAX_LENGTH = 10
+CHANGE_EVENT_RETENTION_HOURS = 24 * 7
@@ -0,0 +1,91 @@
+import time
+from array import array
+from collections import Counter, defaultdict
+
+from .background_index import BackgroundIndex
+from .constants import INGREDIENT_INDEX_TTL
+from .similarity import load_recipe_sets
+
+
+class IngredientIndex:
+    """
+    Индекс «ингредиент → рецепты»: для каждого ингредиента хранится
+    отсортированный массив id рецептов, которые его содержат. Память
+    и время операций растут с числом пар «рецепт — ингредиент»,
+    а не с наибольшим id.
+    """
+
+    def __init__(self, recipe_sets):
+        postings = defaultdict(list)
+        self.sizes = {}
+        for recipe_id, ingredients in recipe_sets.items():
+            self.sizes[recipe_id] = len(ingredients)
+            for ingredient_id in ingredients:
+                postings[ingredient_id].append(recipe_id)
+        self.postings = {
+            ingredient_id: array('q', sorted(recipe_ids))
+            for ingredient_id, recipe_ids in postings.items()
+        }
+        self.built_at = time.monotonic()
+
+    def posting(self, ingredient_id):
+        return self.postings.get(ingredient_id, ())
+
+    def with_any(self, ingredient_ids):
+        return set().union(*map(self.posting, set(ingredient_ids)))
+
+    def with_all(self, ingredient_ids):
+        postings = sorted(map(self.posting, set(ingredient_ids)), key=len)
+        if not postings:
+            return set()
+        # Пересечение начинается с самого короткого списка.
+        result = set(postings[0])
+        for posting in postings[1:]:
+            if not result:
+                break
+            result.intersection_update(posting)
+        return result
+
+    def recipes_with_all(self, ingredient_ids):
+        return sorted(self.with_all(ingredient_ids))
+
+    def recipes_with_any(self, ingredient_ids):
+        return sorted(self.with_any(ingredient_ids))
+
+    def rank_by_coverage(self, have, exclude=()):
+        """
+        Возвращает пары (id рецепта, покрытие), где покрытие — доля
+        ингредиентов рецепта из списка have. Рецепты с ингредиентами
+        из exclude отбрасываются.
+        """
+        excluded = self.with_any(exclude)
+        matched = Counter()
+        for ingredient_id in set(have):
+            matched.update(self.posting(ingredient_id))
+        ranked = [
+            (recipe_id, count / self.sizes[recipe_id], count)
+            for recipe_id, count in matched.items()
+            if recipe_id not in excluded
+        ]
+        ranked.sort(key=lambda item: (item[1], item[2], item[0]),
+                    reverse=True)
+        return [(recipe_id, coverage) for recipe_id, coverage, _ in ranked]
+
+
+_index = BackgroundIndex(
+    'ingredient-index',
+    lambda: IngredientIndex(load_recipe_sets()),
+    INGREDIENT_INDEX_TTL,
+)
+
+
+def get_ingredient_index():
+    """
+    Возвращает индекс процесса. Устаревший по TTL или после изменений
+    индекс отдаётся как есть, а новый собирается в фоне.
+    """
+    return _index.get()
+
+
+def invalidate_ingredient_index():
+    _index.invalidate()
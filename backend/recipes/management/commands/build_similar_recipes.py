@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from recipes.constants import SIMILAR_RECIPES_TOP_K
+from recipes.similarity import rebuild_similar_recipes
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает таблицу похожих рецептов по ингредиентам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=SIMILAR_RECIPES_TOP_K,
+            help='Сколько соседей хранить для каждого рецепта.'
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_similar_recipes(options['top'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитаны похожие рецепты для {count} рецептов.'
+        ))
@@ -3,7 +3,9 @@ from pathlib import Path
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
+from recipes.changes import record_reload
 from recipes.models import Ingredient
 
 
@@ -39,7 +41,9 @@ class Command(BaseCommand):
                     )
                     existing.add((name, unit))
 
-        Ingredient.objects.bulk_create(new_ingredients)
+        with transaction.atomic():
+            Ingredient.objects.bulk_create(new_ingredients)
+            record_reload(Ingredient)
         self.stdout.write(self.style.SUCCESS(
             f'Успешно загружено {len(new_ingredients)} ингредиентов.'
         ))
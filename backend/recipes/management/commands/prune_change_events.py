@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.constants import CHANGE_EVENT_RETENTION_HOURS
+from recipes.models import ChangeEvent
+from recipes.purge import PURGE_BATCH_SIZE, delete_in_batches
+
+
+class Command(BaseCommand):
+    help = 'Удаляет из журнала изменений события старше срока хранения'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-hours',
+            type=int,
+            default=CHANGE_EVENT_RETENTION_HOURS,
+            help='Сколько часов хранить события.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=PURGE_BATCH_SIZE,
+            help='Сколько строк удалять в одной транзакции.'
+        )
+
+    def handle(self, *args, **options):
+        border = timezone.now() - timedelta(hours=options['keep_hours'])
+        # Последнее событие остаётся всегда: в пустом журнале
+        # синхронизация сочла бы устаревшими все выданные токены.
+        newest = ChangeEvent.objects.order_by('-pk').values_list(
+            'pk', flat=True).first()
+        deleted = delete_in_batches(
+            ChangeEvent.objects.filter(created_at__lt=border)
+            .exclude(pk=newest),
+            options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено событий журнала: {deleted}.'
+        ))
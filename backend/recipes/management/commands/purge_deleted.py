@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.purge import (
+    PURGE_BATCH_SIZE,
+    purge_recipe,
+    purge_status,
+    purge_user,
+)
+from users.models import FoodgramUser
+
+
+class Command(BaseCommand):
+    help = (
+        'Порциями удаляет помеченных на удаление пользователей и рецепты '
+        'вместе со связанными строками и файлами'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=PURGE_BATCH_SIZE,
+            help='Сколько строк удалять в одной транзакции.'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Пауза между порциями в секундах.'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Сколько объектов обработать за запуск.'
+        )
+        parser.add_argument(
+            '--status',
+            action='store_true',
+            help='Только показать, сколько объектов ждут удаления.'
+        )
+
+    def handle(self, *args, **options):
+        status = purge_status()
+        self.stdout.write(
+            f'Ожидают удаления: пользователей — {status["users"]}, '
+            f'рецептов — {status["recipes"]}.'
+        )
+        if options['status']:
+            return
+
+        batch_size, pause = options['batch_size'], options['pause']
+        limit = options['limit']
+        processed = rows = 0
+        users = FoodgramUser.objects.filter(
+            deleted_at__isnull=False).order_by('deleted_at')
+        for user in users.iterator():
+            if limit is not None and processed >= limit:
+                break
+            self.stdout.write(f'Пользователь {user.pk} ({user.username})')
+            rows += purge_user(user, batch_size, pause,
+                               progress=self.stdout.write)
+            processed += 1
+
+        recipes = Recipe.all_objects.filter(
+            deleted_at__isnull=False).order_by('deleted_at')
+        for recipe in recipes.iterator():
+            if limit is not None and processed >= limit:
+                break
+            rows += purge_recipe(recipe, batch_size, pause)
+            processed += 1
+            self.stdout.write(f'Рецепт {recipe.pk} удалён')
+
+        status = purge_status()
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано объектов: {processed}, удалено строк: {rows}. '
+            f'Осталось: пользователей — {status["users"]}, '
+            f'рецептов — {status["recipes"]}.'
+        ))
@@ -0,0 +1,101 @@
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.constants import MEDIA_BLOB_PREFIX, MEDIA_SWEEP_GRACE_HOURS
+from recipes.models import MediaBlob, Recipe
+from recipes.storage import is_blob
+from users.models import FoodgramUser
+
+CHUNK_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счётчики ссылок медиафайлов с базой и удаляет '
+        'файлы, на которые никто не ссылается'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=int,
+            default=MEDIA_SWEEP_GRACE_HOURS,
+            help='Не трогать файлы, изменённые недавно.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что будет удалено.'
+        )
+
+    def collect_references(self):
+        references = Counter()
+        sources = (
+            Recipe.all_objects.exclude(image='').values_list(
+                'image', flat=True),
+            FoodgramUser.objects.exclude(avatar='').values_list(
+                'avatar', flat=True),
+        )
+        for names in sources:
+            references.update(
+                name for name in names.iterator(chunk_size=CHUNK_SIZE)
+                if name and is_blob(name)
+            )
+        return references
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        references = self.collect_references()
+
+        fixed = removed = 0
+        known = set()
+        for blob in MediaBlob.objects.iterator(chunk_size=CHUNK_SIZE):
+            known.add(blob.name)
+            refcount = references.get(blob.name, 0)
+            if (refcount == 0 and blob.refcount == 0
+                    and blob.updated_at < cutoff):
+                self.stdout.write(f'Удаление {blob.name}')
+                if dry_run:
+                    removed += 1
+                    continue
+                # Запись забирается заново по тем же условиям: если файл
+                # успели загрузить повторно, счётчик уже не ноль.
+                deleted, _ = MediaBlob.objects.filter(
+                    pk=blob.pk, refcount=0, updated_at__lt=cutoff).delete()
+                if deleted:
+                    removed += 1
+                    default_storage.remove_file(blob.name)
+            elif refcount != blob.refcount:
+                fixed += 1
+                if not dry_run:
+                    # Только если счётчик не менялся после чтения.
+                    MediaBlob.objects.filter(
+                        pk=blob.pk, refcount=blob.refcount).update(
+                        refcount=refcount, updated_at=timezone.now())
+
+        orphans = 0
+        root = default_storage.path(MEDIA_BLOB_PREFIX)
+        for directory, _, files in os.walk(root):
+            for file_name in files:
+                path = os.path.join(directory, file_name)
+                name = os.path.relpath(
+                    path, default_storage.location).replace(os.sep, '/')
+                modified = datetime.fromtimestamp(
+                    os.path.getmtime(path), tz=timezone.utc)
+                if name in known or modified >= cutoff:
+                    continue
+                orphans += 1
+                self.stdout.write(f'Файл без записи: {name}')
+                if not dry_run:
+                    os.remove(path)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков: {fixed}, удалено файлов: {removed}, '
+            f'файлов без записи: {orphans}.'
+        ))
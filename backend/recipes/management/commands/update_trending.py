@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.constants import TRENDING_RECENT_MINUTES
+from recipes.models import Recipe
+from recipes.trending import recently_active_recipes, recompute_trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинг популярности рецептов '
+        'с недавней активностью'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since-minutes',
+            type=int,
+            default=TRENDING_RECENT_MINUTES,
+            help='Окно активности; запускайте команду не реже этого.'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать все рецепты (учитывает и удаления).'
+        )
+
+    def handle(self, *args, **options):
+        if options['full']:
+            recipe_ids = Recipe.objects.values_list('pk', flat=True)
+        else:
+            recipe_ids = recently_active_recipes(
+                timezone.now() - timedelta(minutes=options['since_minutes'])
+            )
+        count = recompute_trending(recipe_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг пересчитан для {count} рецептов.'
+        ))
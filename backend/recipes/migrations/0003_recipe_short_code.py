@@ -0,0 +1,41 @@
+# Generated by Django 4.2.23 on 2026-10-19 09:04
+
+from django.db import migrations, models
+
+from recipes.short_links import encode_base62
+
+BATCH_SIZE = 1000
+
+
+def fill_short_codes(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    recipes = (
+        Recipe.objects
+        .filter(short_code__isnull=True)
+        .only('pk')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    batch = []
+    for recipe in recipes:
+        recipe.short_code = encode_base62(recipe.pk)
+        batch.append(recipe)
+        if len(batch) >= BATCH_SIZE:
+            Recipe.objects.bulk_update(batch, ['short_code'])
+            batch = []
+    Recipe.objects.bulk_update(batch, ['short_code'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='short_code',
+            field=models.CharField(blank=True, editable=False, help_text='Base62-код id рецепта для короткой ссылки.', max_length=11, null=True, unique=True, verbose_name='Короткий код'),
+        ),
+        migrations.RunPython(fill_short_codes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.23 on 2026-10-19 09:07
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_similarrecipe'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favorite',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, help_text='Пересчитывается командой update_trending.', verbose_name='Рейтинг популярности'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-trending_score', '-pub_date'], name='recipe_trending_idx'),
+        ),
+    ]
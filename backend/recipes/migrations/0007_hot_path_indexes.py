@@ -0,0 +1,67 @@
+# Generated by Django 4.2.23 on 2026-10-19 09:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+INGREDIENT_NAME_INDEX = 'ingredient_name_ci_prefix_idx'
+
+
+def create_ingredient_name_index(apps, schema_editor):
+    """
+    Индекс для поиска по началу имени без учёта регистра (istartswith).
+    В PostgreSQL Django строит UPPER(name) LIKE UPPER(%s), в SQLite —
+    LIKE, который использует индекс с COLLATE NOCASE.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {INGREDIENT_NAME_INDEX} '
+            'ON recipes_ingredient (UPPER(name) varchar_pattern_ops)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {INGREDIENT_NAME_INDEX} '
+            'ON recipes_ingredient (name COLLATE NOCASE)'
+        )
+
+
+def drop_ingredient_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INGREDIENT_NAME_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0006_trending'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-pub_date'], name='recipe_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='author',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recipes', to=settings.AUTH_USER_MODEL, verbose_name='Автор рецепта'),
+        ),
+        migrations.AddIndex(
+            model_name='recipeingredient',
+            index=models.Index(fields=['ingredient', 'recipe'], name='recipe_ingredient_reverse_idx'),
+        ),
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='ingredient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='recipes.ingredient', verbose_name='Ингредиент'),
+        ),
+        migrations.RunPython(
+            create_ingredient_name_index, drop_ingredient_name_index
+        ),
+    ]
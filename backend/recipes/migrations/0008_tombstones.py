@@ -0,0 +1,22 @@
+# Generated by Django 4.2.23 on 2026-10-19 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Рецепт скрыт и будет удалён командой purge_deleted.', null=True, verbose_name='Помечен на удаление'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='recipe_deleted_idx'),
+        ),
+    ]
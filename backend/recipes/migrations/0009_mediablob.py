@@ -0,0 +1,29 @@
+# Generated by Django 4.2.23 on 2026-10-19 09:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_tombstones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Путь к файлу')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Размер, байт')),
+                ('refcount', models.PositiveIntegerField(default=0, verbose_name='Число ссылок')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата загрузки')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения счётчика')),
+            ],
+            options={
+                'verbose_name': 'Медиафайл',
+                'verbose_name_plural': 'Медиафайлы',
+                'indexes': [models.Index(condition=models.Q(('refcount', 0)), fields=['updated_at'], name='media_blob_orphan_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+INGREDIENT_TRIGRAM_INDEX = 'ingredient_name_trgm_idx'
+
+
+def create_trigram_index(apps, schema_editor):
+    """
+    GIN-индекс pg_trgm и fuzzystrmatch для нечёткого поиска;
+    на других базах поиск идёт по индексу в памяти процесса.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS fuzzystrmatch')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INGREDIENT_TRIGRAM_INDEX} '
+        'ON recipes_ingredient USING gin (name gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'DROP INDEX IF EXISTS {INGREDIENT_TRIGRAM_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_mediablob'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.23 on 2026-10-19 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_ingredient_trigram_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=32, verbose_name='Модель')),
+                ('object_id', models.PositiveBigIntegerField(null=True, verbose_name='ID объекта')),
+                ('action', models.CharField(choices=[('create', 'Создание'), ('update', 'Изменение'), ('delete', 'Удаление'), ('reload', 'Массовое изменение')], max_length=10, verbose_name='Действие')),
+                ('user_id', models.PositiveBigIntegerField(null=True, verbose_name='ID владельца')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Время')),
+            ],
+            options={
+                'verbose_name': 'Событие изменения',
+                'verbose_name_plural': 'События изменений',
+            },
+        ),
+    ]
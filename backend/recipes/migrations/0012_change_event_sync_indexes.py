@@ -0,0 +1,21 @@
+# Generated by Django 4.2.23 on 2026-10-19 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_changeevent'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='changeevent',
+            index=models.Index(fields=['model', 'id'], name='change_event_model_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changeevent',
+            index=models.Index(fields=['user_id', 'id'], name='change_event_user_idx'),
+        ),
+    ]
@@ -4,18 +4,25 @@ from django.core.validators import (
     RegexValidator,
 )
 from django.db import models
+from django.db.models import Q
+from django.urls import reverse
 
 from users.models import FoodgramUser
 from .constants import (
+    CHANGE_EVENT_ACTION_MAX_LENGTH,
+    CHANGE_EVENT_MODEL_MAX_LENGTH,
     COOKING_TIME_MIN,
     INGREDIENT_AMOUNT_MAX,
     INGREDIENT_AMOUNT_MIN,
     INGREDIENT_NAME_MAX_LENGTH,
     MEASUREMENT_UNIT_MAX_LENGTH,
+    MEDIA_BLOB_NAME_MAX_LENGTH,
     RECIPE_NAME_MAX_LENGTH,
+    SHORT_CODE_MAX_LENGTH,
     TAG_NAME_MAX_LENGTH,
     TAG_SLUG_MAX_LENGTH,
 )
+from .short_links import encode_base62
 
 
 class Tag(models.Model):
@@ -75,11 +82,19 @@ class Ingredient(models.Model):
         return f'{self.name}, {self.measurement_unit}'
 
 
+class VisibleRecipeManager(models.Manager):
+    """Менеджер рецептов без помеченных на удаление."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Recipe(models.Model):
     """Модель рецепта, публикуемого пользователями."""
     author = models.ForeignKey(
         FoodgramUser,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name='recipes',
         verbose_name='Автор рецепта'
     )
@@ -123,15 +138,70 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
+    trending_score = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name='Рейтинг популярности',
+        help_text='Пересчитывается командой update_trending.'
+    )
+    short_code = models.CharField(
+        max_length=SHORT_CODE_MAX_LENGTH,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Короткий код',
+        help_text='Base62-код id рецепта для короткой ссылки.'
+    )
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Помечен на удаление',
+        help_text='Рецепт скрыт и будет удалён командой purge_deleted.'
+    )
+
+    objects = VisibleRecipeManager()
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-pub_date'], name='recipe_pub_date_idx'),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-trending_score', '-pub_date'],
+                name='recipe_trending_idx'
+            ),
+            models.Index(
+                fields=['deleted_at'],
+                condition=Q(deleted_at__isnull=False),
+                name='recipe_deleted_idx'
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if not self.short_code:
+            self.short_code = encode_base62(self.pk)
+            Recipe.all_objects.filter(pk=self.pk).update(
+                short_code=self.short_code)
 
     def get_absolute_url(self):
         return f'/recipes/{self.pk}/'
 
+    def get_short_url(self):
+        return reverse('short-link', args=[self.short_code])
+
     def __str__(self):
         return self.name
 
@@ -147,6 +217,7 @@ class RecipeIngredient(models.Model):
     ingredient = models.ForeignKey(
         Ingredient,
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='Ингредиент'
     )
     amount = models.PositiveSmallIntegerField(
@@ -173,6 +244,14 @@ class RecipeIngredient(models.Model):
                 name='unique_recipe_ingredient'
             )
         ]
+        indexes = [
+            # Обратный поиск «ингредиент → рецепты» читается из индекса
+            # целиком и заменяет одиночный индекс внешнего ключа.
+            models.Index(
+                fields=['ingredient', 'recipe'],
+                name='recipe_ingredient_reverse_idx'
+            )
+        ]
 
     def __str__(self):
         return f'{self.ingredient.name} в {self.recipe.name} — {self.amount}'
@@ -191,6 +270,11 @@ class Favorite(models.Model):
         on_delete=models.CASCADE,
         verbose_name='Рецепт'
     )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата добавления'
+    )
 
     class Meta:
         verbose_name = 'Избранное'
@@ -218,6 +302,11 @@ class ShoppingCart(models.Model):
         on_delete=models.CASCADE,
         verbose_name='Рецепт'
     )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата добавления'
+    )
 
     class Meta:
         verbose_name = 'Корзина покупок'
@@ -231,3 +320,138 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.recipe} в корзине у {self.user}'
+
+
+class SimilarRecipe(models.Model):
+    """
+    Предрасчитанный сосед рецепта по пересечению ингредиентов.
+    Заполняется командой build_similar_recipes и обновляется
+    при изменении рецептов.
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_entries',
+        verbose_name='Рецепт'
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Похожий рецепт'
+    )
+    score = models.FloatField(verbose_name='Коэффициент Жаккара')
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='unique_similar_recipe'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score'],
+                name='similar_recipe_score_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} ~ {self.similar} ({self.score:.2f})'
+
+
+class MediaBlob(models.Model):
+    """
+    Файл в контентно-адресуемом хранилище. Имя файла — хеш содержимого,
+    поэтому одинаковые загрузки хранятся один раз.
+    """
+    name = models.CharField(
+        max_length=MEDIA_BLOB_NAME_MAX_LENGTH,
+        unique=True,
+        verbose_name='Путь к файлу'
+    )
+    size = models.PositiveBigIntegerField(verbose_name='Размер, байт')
+    refcount = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число ссылок'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата загрузки'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения счётчика'
+    )
+
+    class Meta:
+        verbose_name = 'Медиафайл'
+        verbose_name_plural = 'Медиафайлы'
+        indexes = [
+            models.Index(
+                fields=['updated_at'],
+                condition=Q(refcount=0),
+                name='media_blob_orphan_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.refcount})'
+
+
+class ChangeEvent(models.Model):
+    """
+    Журнал изменений (outbox). Пишется в той же транзакции, что и само
+    изменение; воркеры читают его по возрастанию id и сбрасывают кэши.
+    Для избранного, корзины и подписок object_id — рецепт или автор,
+    user_id — владелец списка.
+    """
+
+    class Action(models.TextChoices):
+        CREATE = 'create', 'Создание'
+        UPDATE = 'update', 'Изменение'
+        DELETE = 'delete', 'Удаление'
+        RELOAD = 'reload', 'Массовое изменение'
+
+    model = models.CharField(
+        max_length=CHANGE_EVENT_MODEL_MAX_LENGTH,
+        verbose_name='Модель'
+    )
+    object_id = models.PositiveBigIntegerField(
+        null=True,
+        verbose_name='ID объекта'
+    )
+    action = models.CharField(
+        max_length=CHANGE_EVENT_ACTION_MAX_LENGTH,
+        choices=Action.choices,
+        verbose_name='Действие'
+    )
+    user_id = models.PositiveBigIntegerField(
+        null=True,
+        verbose_name='ID владельца'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Время'
+    )
+
+    class Meta:
+        verbose_name = 'Событие изменения'
+        verbose_name_plural = 'События изменений'
+        indexes = [
+            models.Index(
+                fields=['model', 'id'],
+                name='change_event_model_idx'
+            ),
+            models.Index(
+                fields=['user_id', 'id'],
+                name='change_event_user_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'#{self.pk} {self.model}:{self.object_id} {self.action}'
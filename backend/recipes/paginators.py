@@ -0,0 +1,38 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+ESTIMATE_THRESHOLD = 100_000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор админки для больших таблиц.
+    Для нефильтрованного списка в PostgreSQL берёт оценку числа строк
+    из статистики pg_class вместо COUNT(*) по всей таблице.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = self.estimate_count(queryset)
+            if estimate is not None and estimate > ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
+
+    @staticmethod
+    def estimate_count(queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if row is None or row[0] < 0:
+            return None
+        return row[0]
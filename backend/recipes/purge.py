@@ -0,0 +1,118 @@
+import time
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from users.models import FoodgramUser, Subscription
+from .changes import record_change, record_changes
+from .ingredient_index import invalidate_ingredient_index
+from .models import (
+    ChangeEvent,
+    Favorite,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    SimilarRecipe,
+)
+
+PURGE_BATCH_SIZE = 500
+
+
+@transaction.atomic
+def tombstone_recipe(recipe):
+    """Скрывает рецепт; строки и файлы удалит purge_deleted."""
+    now = timezone.now()
+    Recipe.all_objects.filter(pk=recipe.pk).update(
+        deleted_at=now, updated_at=now)
+    record_change(Recipe, recipe.pk, ChangeEvent.Action.DELETE)
+    transaction.on_commit(invalidate_ingredient_index)
+
+
+@transaction.atomic
+def tombstone_user(user):
+    """
+    Скрывает пользователя и все его рецепты одним UPDATE.
+    Неактивный пользователь не проходит аутентификацию по токену.
+    """
+    now = timezone.now()
+    FoodgramUser.objects.filter(pk=user.pk).update(
+        deleted_at=now, is_active=False, updated_at=now)
+    recipes = Recipe.objects.filter(author=user)
+    record_change(FoodgramUser, user.pk, ChangeEvent.Action.DELETE)
+    record_changes(
+        Recipe, recipes.values_list('pk', flat=True),
+        ChangeEvent.Action.DELETE
+    )
+    recipes.update(deleted_at=now, updated_at=now)
+    transaction.on_commit(invalidate_ingredient_index)
+
+
+def delete_in_batches(queryset, batch_size=PURGE_BATCH_SIZE, pause=0):
+    """
+    Удаляет строки порциями по первичному ключу, каждую порцию
+    в отдельной короткой транзакции. Возвращает число удалённых строк.
+    """
+    model = queryset.model
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            model._base_manager.filter(pk__in=ids).delete()
+        deleted += len(ids)
+        if pause:
+            time.sleep(pause)
+
+
+def purge_recipe(recipe, batch_size=PURGE_BATCH_SIZE, pause=0):
+    """Удаляет помеченный рецепт, его связи и файл изображения."""
+    related = (
+        Favorite.objects.filter(recipe=recipe),
+        ShoppingCart.objects.filter(recipe=recipe),
+        SimilarRecipe.objects.filter(Q(recipe=recipe) | Q(similar=recipe)),
+        RecipeIngredient.objects.filter(recipe=recipe),
+    )
+    deleted = sum(
+        delete_in_batches(queryset, batch_size, pause)
+        for queryset in related
+    )
+    image = recipe.image
+    with transaction.atomic():
+        Recipe.all_objects.filter(pk=recipe.pk).delete()
+    if image:
+        image.delete(save=False)
+    return deleted + 1
+
+
+def purge_user(user, batch_size=PURGE_BATCH_SIZE, pause=0, progress=None):
+    """Удаляет помеченного пользователя после всего его содержимого."""
+    deleted = 0
+    for recipe in Recipe.all_objects.filter(author=user).iterator():
+        deleted += purge_recipe(recipe, batch_size, pause)
+        if progress:
+            progress(f'  рецепт {recipe.pk} удалён')
+    related = (
+        Favorite.objects.filter(user=user),
+        ShoppingCart.objects.filter(user=user),
+        Subscription.objects.filter(Q(user=user) | Q(author=user)),
+    )
+    for queryset in related:
+        deleted += delete_in_batches(queryset, batch_size, pause)
+    avatar = user.avatar
+    with transaction.atomic():
+        FoodgramUser.objects.filter(pk=user.pk).delete()
+    if avatar:
+        avatar.delete(save=False)
+    return deleted + 1
+
+
+def purge_status():
+    """Возвращает количество помеченных объектов, ожидающих удаления."""
+    return {
+        'users': FoodgramUser.objects.filter(
+            deleted_at__isnull=False).count(),
+        'recipes': Recipe.all_objects.filter(
+            deleted_at__isnull=False).count(),
+    }
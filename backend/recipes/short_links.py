@@ -0,0 +1,30 @@
+from functools import lru_cache
+from string import ascii_letters, digits
+
+from .constants import SHORT_LINK_CACHE_SIZE
+
+BASE62_ALPHABET = digits + ascii_letters
+
+
+def encode_base62(number):
+    """Кодирует неотрицательное целое число в строку base62."""
+    if number == 0:
+        return BASE62_ALPHABET[0]
+    base = len(BASE62_ALPHABET)
+    chars = []
+    while number:
+        number, remainder = divmod(number, base)
+        chars.append(BASE62_ALPHABET[remainder])
+    return ''.join(reversed(chars))
+
+
+@lru_cache(maxsize=SHORT_LINK_CACHE_SIZE)
+def resolve_short_code(code):
+    """
+    Возвращает id рецепта по короткому коду.
+    Результат кэшируется в LRU процесса; промахи (DoesNotExist)
+    не кэшируются, поэтому новые рецепты находятся сразу.
+    """
+    from .models import Recipe
+
+    return Recipe.objects.values_list('pk', flat=True).get(short_code=code)
@@ -0,0 +1,135 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from users.models import FoodgramUser, Subscription
+from .changes import record_change, record_changes
+from .ingredient_index import invalidate_ingredient_index
+from .models import (
+    ChangeEvent,
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+)
+from .trigram_index import invalidate_trigram_index
+
+SERVICE_USER_FIELDS = {'last_login', 'password'}
+
+
+def touch_recipes(queryset):
+    """Обновляет updated_at рецептов, чьё представление изменилось."""
+    record_changes(Recipe, queryset.values_list('pk', flat=True),
+                   ChangeEvent.Action.UPDATE)
+    queryset.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=FoodgramUser)
+def touch_author_recipes(sender, instance, created, update_fields=None,
+                         **kwargs):
+    if created:
+        return
+    if update_fields and set(update_fields) <= SERVICE_USER_FIELDS:
+        return
+    touch_recipes(Recipe.objects.filter(author=instance))
+
+
+@receiver(post_save, sender=Tag)
+def touch_tag_recipes(sender, instance, **kwargs):
+    touch_recipes(Recipe.objects.filter(tags=instance))
+
+
+@receiver(post_save, sender=Ingredient)
+def touch_ingredient_recipes(sender, instance, **kwargs):
+    touch_recipes(Recipe.objects.filter(ingredients=instance))
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def drop_trigram_index(sender, **kwargs):
+    transaction.on_commit(invalidate_trigram_index)
+
+
+@receiver(post_delete, sender=Recipe)
+def drop_deleted_recipe_from_index(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_ingredient_index)
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+@receiver((post_save, post_delete), sender=Subscription)
+def bump_collection_version(sender, instance, **kwargs):
+    """
+    Меняет ETag ответов с флагами избранного, корзины и подписок.
+    update() не вызывает post_save пользователя и не трогает рецепты.
+    """
+    FoodgramUser.objects.filter(pk=instance.user_id).update(
+        collection_version=F('collection_version') + 1)
+
+
+def save_action(created):
+    return ChangeEvent.Action.CREATE if created else ChangeEvent.Action.UPDATE
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=FoodgramUser)
+def log_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= SERVICE_USER_FIELDS:
+        return
+    record_change(sender, instance.pk, save_action(created))
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=FoodgramUser)
+def log_deleted(sender, instance, **kwargs):
+    record_change(sender, instance.pk, ChangeEvent.Action.DELETE)
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def log_recipe_ingredient(sender, instance, **kwargs):
+    record_change(Recipe, instance.recipe_id, ChangeEvent.Action.UPDATE)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def log_recipe_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """Смена тегов рецепта — и с его стороны, и со стороны тега."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        record_change(Recipe, instance.pk, ChangeEvent.Action.UPDATE)
+    elif pk_set:
+        record_changes(Recipe, pk_set, ChangeEvent.Action.UPDATE)
+
+
+def item_object_id(instance):
+    """Рецепт для избранного и корзины, автор для подписки."""
+    if isinstance(instance, Subscription):
+        return instance.author_id
+    return instance.recipe_id
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Subscription)
+def log_added_item(sender, instance, **kwargs):
+    record_change(
+        sender, item_object_id(instance), ChangeEvent.Action.CREATE,
+        instance.user_id
+    )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Subscription)
+def log_removed_item(sender, instance, **kwargs):
+    record_change(
+        sender, item_object_id(instance), ChangeEvent.Action.DELETE,
+        instance.user_id
+    )
@@ -0,0 +1,192 @@
+import heapq
+import logging
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Min, Window
+from django.db.models.functions import RowNumber
+
+from .constants import SIMILAR_RECIPES_TOP_K
+from .models import RecipeIngredient, SimilarRecipe
+
+BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+# Один поток: пересчёты соседей не конкурируют за одни и те же строки.
+refresh_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix='similar-refresh')
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def load_recipe_sets(recipe_ids=None):
+    """Возвращает словарь {id рецепта: frozenset id ингредиентов}."""
+    rows = (
+        RecipeIngredient.objects
+        .filter(recipe__deleted_at__isnull=True)
+        .values_list('recipe_id', 'ingredient_id')
+    )
+    if recipe_ids is not None:
+        rows = rows.filter(recipe_id__in=recipe_ids)
+    recipe_sets = defaultdict(set)
+    for recipe_id, ingredient_id in rows.iterator(chunk_size=BATCH_SIZE):
+        recipe_sets[recipe_id].add(ingredient_id)
+    return {
+        recipe_id: frozenset(ingredients)
+        for recipe_id, ingredients in recipe_sets.items()
+    }
+
+
+def build_inverted_index(recipe_sets):
+    """Строит инвертированный индекс {ингредиент: [id рецептов]}."""
+    index = defaultdict(list)
+    for recipe_id, ingredients in recipe_sets.items():
+        for ingredient_id in ingredients:
+            index[ingredient_id].append(recipe_id)
+    return index
+
+
+def score_candidates(recipe_id, size, overlaps, sizes):
+    """Считает коэффициент Жаккара по числу общих ингредиентов."""
+    overlaps.pop(recipe_id, None)
+    for other_id, overlap in overlaps.items():
+        yield overlap / (size + sizes[other_id] - overlap), other_id
+
+
+def top_neighbours(recipe_id, ingredients, index, sizes,
+                   k=SIMILAR_RECIPES_TOP_K):
+    """
+    Возвращает k пар (score, id) наиболее похожих рецептов.
+    Перебираются только рецепты с общими ингредиентами.
+    """
+    overlaps = Counter()
+    for ingredient_id in ingredients:
+        overlaps.update(index[ingredient_id])
+    return heapq.nlargest(
+        k, score_candidates(recipe_id, len(ingredients), overlaps, sizes))
+
+
+@transaction.atomic
+def rebuild_similar_recipes(k=SIMILAR_RECIPES_TOP_K):
+    """Полностью пересчитывает таблицу похожих рецептов."""
+    recipe_sets = load_recipe_sets()
+    index = build_inverted_index(recipe_sets)
+    sizes = {
+        recipe_id: len(ingredients)
+        for recipe_id, ingredients in recipe_sets.items()
+    }
+    SimilarRecipe.objects.all().delete()
+    batch = []
+    for recipe_id, ingredients in recipe_sets.items():
+        for score, other_id in top_neighbours(
+                recipe_id, ingredients, index, sizes, k):
+            batch.append(SimilarRecipe(
+                recipe_id=recipe_id, similar_id=other_id, score=score))
+        if len(batch) >= BATCH_SIZE:
+            SimilarRecipe.objects.bulk_create(batch)
+            batch = []
+    SimilarRecipe.objects.bulk_create(batch)
+    return len(recipe_sets)
+
+
+def trim_similar_lists(recipe_ids, k=SIMILAR_RECIPES_TOP_K):
+    """Оставляет в списках соседей recipe_ids по k лучших одним DELETE."""
+    overflow = (
+        SimilarRecipe.objects
+        .filter(recipe_id__in=recipe_ids)
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=F('recipe_id'),
+            order_by=[F('score').desc(), F('pk')],
+        ))
+        .filter(rank__gt=k)
+        .values('pk')
+    )
+    SimilarRecipe.objects.filter(pk__in=overflow).delete()
+
+
+@transaction.atomic
+def refresh_similar_recipes(recipe_id, k=SIMILAR_RECIPES_TOP_K):
+    """
+    Инкрементально обновляет соседей одного рецепта.
+    Пересчитывается его собственный top-k, а рецепт добавляется
+    в списки соседей, куда теперь проходит по порогу. Вытесненные
+    из чужих списков места восстанавливает полный пересчёт.
+    Число запросов не зависит от числа соседей.
+    """
+    ingredients = set(
+        RecipeIngredient.objects
+        .filter(recipe_id=recipe_id)
+        .values_list('ingredient_id', flat=True)
+    )
+    overlaps = Counter(dict(
+        RecipeIngredient.objects
+        .filter(ingredient_id__in=ingredients,
+                recipe__deleted_at__isnull=True)
+        .values('recipe_id')
+        .annotate(overlap=Count('id'))
+        .values_list('recipe_id', 'overlap')
+    ))
+    sizes = dict(
+        RecipeIngredient.objects
+        .filter(recipe_id__in=overlaps)
+        .values('recipe_id')
+        .annotate(size=Count('id'))
+        .values_list('recipe_id', 'size')
+    )
+    scored = list(score_candidates(
+        recipe_id, len(ingredients), overlaps, sizes))
+
+    SimilarRecipe.objects.filter(recipe_id=recipe_id).delete()
+    SimilarRecipe.objects.filter(similar_id=recipe_id).delete()
+    SimilarRecipe.objects.bulk_create(
+        SimilarRecipe(recipe_id=recipe_id, similar_id=other_id, score=score)
+        for score, other_id in heapq.nlargest(k, scored)
+    )
+
+    thresholds = {
+        row['recipe_id']: row
+        for row in SimilarRecipe.objects
+        .filter(recipe_id__in=[other_id for _, other_id in scored])
+        .values('recipe_id')
+        .annotate(count=Count('id'), min_score=Min('score'))
+    }
+    reverse = []
+    for score, other_id in scored:
+        current = thresholds.get(other_id)
+        if (current is None or current['count'] < k
+                or score > current['min_score']):
+            reverse.append(SimilarRecipe(
+                recipe_id=other_id, similar_id=recipe_id, score=score))
+    SimilarRecipe.objects.bulk_create(reverse, batch_size=BATCH_SIZE)
+    if reverse:
+        trim_similar_lists([entry.recipe_id for entry in reverse], k)
+
+
+def run_similar_refresh(recipe_id):
+    with _pending_lock:
+        _pending.discard(recipe_id)
+    try:
+        refresh_similar_recipes(recipe_id)
+    except Exception:
+        logger.exception('Не удалось обновить похожие для рецепта %s',
+                         recipe_id)
+    finally:
+        connection.close()
+
+
+def schedule_similar_refresh(recipe_id):
+    """
+    Ставит пересчёт соседей рецепта в очередь фонового потока, чтобы
+    он не задерживал ответ. Повторные правки до начала пересчёта
+    схлопываются. Очередь живёт в памяти процесса: потерянные при
+    перезапуске пересчёты восполняет build_similar_recipes.
+    """
+    with _pending_lock:
+        if recipe_id in _pending:
+            return
+        _pending.add(recipe_id)
+    refresh_executor.submit(run_similar_refresh, recipe_id)
@@ -0,0 +1,149 @@
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image
+
+from .constants import MEDIA_BLOB_PREFIX, MEDIA_VERIFY_WORKERS
+
+logger = logging.getLogger(__name__)
+
+verify_executor = ThreadPoolExecutor(
+    max_workers=MEDIA_VERIFY_WORKERS, thread_name_prefix='media-verify')
+
+
+def blob_name(digest, extension):
+    """Путь blobs/ab/cd/<sha256>.<ext> для содержимого с данным хешем."""
+    return (f'{MEDIA_BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/'
+            f'{digest}{extension}')
+
+
+def is_blob(name):
+    return name.startswith(f'{MEDIA_BLOB_PREFIX}/')
+
+
+def is_image(name):
+    return os.path.splitext(name)[1].lower() in Image.registered_extensions()
+
+
+def quarantine_blob(name):
+    """
+    Убирает ссылки на повреждённый файл: поля изображений обнуляются,
+    счётчик ссылок — тоже, а сам файл удалит sweep_media.
+    """
+    from users.models import FoodgramUser
+    from .models import MediaBlob, Recipe
+    from .signals import touch_recipes
+
+    with transaction.atomic():
+        touch_recipes(Recipe.all_objects.filter(image=name))
+        Recipe.all_objects.filter(image=name).update(image=None)
+        authors = FoodgramUser.objects.filter(avatar=name)
+        touch_recipes(Recipe.objects.filter(author__in=authors))
+        authors.update(avatar=None, updated_at=timezone.now())
+        MediaBlob.objects.filter(name=name).update(
+            refcount=0, updated_at=timezone.now())
+
+
+def verify_blob(path, name):
+    """Полная проверка изображения Pillow; выполняется в фоновом потоке."""
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception:
+        logger.warning('Повреждённое изображение %s убрано', name,
+                       exc_info=True)
+        try:
+            quarantine_blob(name)
+        except Exception:
+            logger.exception('Не удалось убрать ссылки на %s', name)
+        finally:
+            connection.close()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище медиа с именами по SHA-256 содержимого.
+    Повторная загрузка того же файла не пишет его заново, а увеличивает
+    счётчик ссылок в MediaBlob. delete() только уменьшает счётчик;
+    сами файлы удаляет команда sweep_media.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in content.chunks():
+            digest.update(chunk)
+            size += len(chunk)
+        extension = os.path.splitext(name)[1].lower()
+        name = blob_name(digest.hexdigest(), extension)
+
+        if not self.exists(name):
+            self._write_blob(name, content)
+            if is_image(name):
+                path = self.path(name)
+                transaction.on_commit(
+                    lambda: verify_executor.submit(verify_blob, path, name))
+        self._add_reference(name, size)
+        return name
+
+    def _write_blob(self, name, content):
+        """
+        Пишет файл во временный и атомарно переименовывает: при гонке
+        двух загрузок одинаковое содержимое просто перезапишется.
+        """
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                content.seek(0)
+                for chunk in content.chunks():
+                    tmp_file.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _add_reference(name, size):
+        from .models import MediaBlob
+
+        blobs = MediaBlob.objects.filter(name=name)
+        if blobs.update(refcount=F('refcount') + 1,
+                        updated_at=timezone.now()):
+            return
+        try:
+            with transaction.atomic():
+                MediaBlob.objects.create(name=name, size=size, refcount=1)
+        except IntegrityError:
+            blobs.update(refcount=F('refcount') + 1,
+                         updated_at=timezone.now())
+
+    def delete(self, name):
+        if not is_blob(name):
+            return super().delete(name)
+        from .models import MediaBlob
+
+        MediaBlob.objects.filter(name=name, refcount__gt=0).update(
+            refcount=F('refcount') - 1, updated_at=timezone.now())
+
+    def remove_file(self, name):
+        """Физически удаляет файл (используется sweep_media)."""
+        super().delete(name)
@@ -0,0 +1,77 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from .constants import (
+    TRENDING_FAVORITE_WEIGHT,
+    TRENDING_HALF_LIFE_HOURS,
+    TRENDING_SHOPPING_CART_WEIGHT,
+)
+from .models import Favorite, Recipe, ShoppingCart
+
+TRENDING_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+HALF_LIFE_SECONDS = TRENDING_HALF_LIFE_HOURS * 60 * 60
+BATCH_SIZE = 500
+
+TRENDING_SOURCES = (
+    (Favorite, TRENDING_FAVORITE_WEIGHT),
+    (ShoppingCart, TRENDING_SHOPPING_CART_WEIGHT),
+)
+
+
+def event_exponent(weight, created_at):
+    """
+    Вклад события в log2-шкале с «прямым» затуханием: каждое событие
+    весит вдвое больше события, случившегося на период полураспада
+    раньше. Порядок рецептов при этом не меняется со временем, и
+    пересчитывать нужно только рецепты с новой активностью.
+    """
+    age = (created_at - TRENDING_EPOCH).total_seconds()
+    return math.log2(weight) + age / HALF_LIFE_SECONDS
+
+
+def trending_score(exponents):
+    """Логарифм суммы вкладов (log-sum-exp по основанию 2)."""
+    if not exponents:
+        return 0.0
+    top = max(exponents)
+    return top + math.log2(sum(2 ** (value - top) for value in exponents))
+
+
+def recently_active_recipes(since):
+    """Возвращает id рецептов с добавлениями в избранное/корзину."""
+    recipe_ids = set()
+    for model, _ in TRENDING_SOURCES:
+        recipe_ids.update(
+            model.objects
+            .filter(created_at__gte=since)
+            .values_list('recipe_id', flat=True)
+        )
+    return recipe_ids
+
+
+def recompute_trending(recipe_ids):
+    """Пересчитывает trending_score для заданных рецептов."""
+    recipe_ids = list(recipe_ids)
+    for start in range(0, len(recipe_ids), BATCH_SIZE):
+        batch_ids = recipe_ids[start:start + BATCH_SIZE]
+        exponents = defaultdict(list)
+        for model, weight in TRENDING_SOURCES:
+            events = (
+                model.objects
+                .filter(recipe_id__in=batch_ids)
+                .values_list('recipe_id', 'created_at')
+            )
+            for recipe_id, created_at in events:
+                exponents[recipe_id].append(
+                    event_exponent(weight, created_at))
+        # bulk_update не трогает updated_at: содержимое рецепта прежнее.
+        Recipe.objects.bulk_update(
+            [
+                Recipe(pk=recipe_id,
+                       trending_score=trending_score(exponents[recipe_id]))
+                for recipe_id in batch_ids
+            ],
+            ['trending_score']
+        )
+    return len(recipe_ids)
@@ -0,0 +1,263 @@
+import re
+import time
+from collections import Counter, defaultdict
+
+from django.db import connection
+from django.db.models import Case, Func, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest, Least, Lower, Substr
+
+from .background_index import BackgroundIndex
+from .constants import (
+    INGREDIENT_SEARCH_INDEX_TTL,
+    INGREDIENT_SEARCH_MIN_FUZZY_LENGTH,
+    INGREDIENT_SEARCH_SIMILARITY,
+)
+from .models import Ingredient
+
+LATIN_LAYOUT = "qwertyuiop[]asdfghjkl;'zxcvbnm,.`"
+CYRILLIC_LAYOUT = 'йцукенгшщзхъфывапролджэячсмитьбюё'
+LAYOUT_TABLE = str.maketrans(
+    LATIN_LAYOUT + LATIN_LAYOUT.upper(),
+    CYRILLIC_LAYOUT + CYRILLIC_LAYOUT.upper()
+)
+# Безударные гласные — самая частая опечатка: «малако», «сахор».
+VOWELS_FROM = 'ое'
+VOWELS_TO = 'аи'
+VOWEL_TABLE = str.maketrans(VOWELS_FROM, VOWELS_TO)
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def normalize(text):
+    return text.lower().replace('ё', 'е').strip()
+
+
+def fold(text):
+    """Нормализует текст и сводит взаимозаменяемые гласные к одной."""
+    return normalize(text).translate(VOWEL_TABLE)
+
+
+def from_latin_layout(text):
+    """Переводит текст, набранный в латинской раскладке, в кириллицу."""
+    return text.translate(LAYOUT_TABLE)
+
+
+def search_variants(query):
+    """Запрос и, если он отличается, его вариант в русской раскладке."""
+    variants = [normalize(query)]
+    converted = normalize(from_latin_layout(query))
+    if converted != variants[0]:
+        variants.append(converted)
+    return variants
+
+
+def typo_budget(query):
+    """Допустимое число опечаток после свёртки гласных."""
+    if len(query) <= INGREDIENT_SEARCH_MIN_FUZZY_LENGTH:
+        return 0
+    return 1 if len(query) < 10 else 2
+
+
+def prefix_distance(query, name, budget):
+    """
+    Наименьшее расстояние Левенштейна от query до какого-либо начала
+    name; если оно больше budget, возвращает budget + 1. Совпадающие
+    символы пропускаются жадно, ветвление — только на расхождениях.
+    """
+    limit = min(len(query), len(name))
+    i = 0
+    while i < limit and query[i] == name[i]:
+        i += 1
+    if i == len(query):
+        return 0
+    if budget == 0:
+        return 1
+    return 1 + min(
+        prefix_distance(query[i + 1:], name[i + 1:], budget - 1),
+        prefix_distance(query[i + 1:], name[i:], budget - 1),
+        prefix_distance(query[i:], name[i + 1:], budget - 1),
+    )
+
+
+def trigrams(text):
+    """
+    Множество триграмм как в pg_trgm: каждое слово дополняется
+    двумя пробелами слева и одним справа.
+    """
+    result = set()
+    for word in WORD_PATTERN.findall(text):
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+class TrigramIndex:
+    """
+    Инвертированный индекс «триграмма → ингредиенты» по именам
+    со свёрнутыми гласными. Похожесть — доля общих триграмм,
+    как similarity() в pg_trgm.
+    """
+
+    def __init__(self, ingredients):
+        self.names = {}
+        self.folded = {}
+        self.sizes = {}
+        self.postings = defaultdict(list)
+        for ingredient_id, name in ingredients:
+            self.names[ingredient_id] = normalize(name)
+            self.folded[ingredient_id] = fold(name)
+            grams = trigrams(self.folded[ingredient_id])
+            self.sizes[ingredient_id] = len(grams)
+            for gram in grams:
+                self.postings[gram].append(ingredient_id)
+        self.built_at = time.monotonic()
+
+    def overlaps(self, grams):
+        overlaps = Counter()
+        for gram in grams:
+            overlaps.update(self.postings.get(gram, ()))
+        return overlaps
+
+    def fuzzy_ranks(self, variant, threshold):
+        """
+        Ранги (опечатка не найдена, расстояние, -похожесть) для
+        ингредиентов, похожих на запрос по триграммам или по началу
+        имени с опечатками. Расстояние считается только для имён,
+        прошедших фильтр по числу общих триграмм: каждая правка
+        портит не больше трёх из них.
+        """
+        query = fold(variant)
+        grams = trigrams(query)
+        budget = typo_budget(query)
+        min_overlap = len(grams) - 1 - 3 * budget
+        ranks = {}
+        for ingredient_id, overlap in self.overlaps(grams).items():
+            score = overlap / (
+                len(grams) + self.sizes[ingredient_id] - overlap)
+            distance = budget + 1
+            if budget and overlap >= min_overlap:
+                distance = prefix_distance(
+                    query, self.folded[ingredient_id], budget)
+            if distance <= budget or score >= threshold:
+                ranks[ingredient_id] = (distance > budget, distance, -score)
+        return ranks
+
+    def search(self, query, threshold):
+        """
+        Возвращает id ингредиентов: сначала совпадения по началу имени,
+        затем начало имени с опечатками, затем похожие по триграммам.
+        Запрос проверяется и в русской раскладке.
+        """
+        variants = search_variants(query)
+        prefixed = sorted(
+            (name, ingredient_id)
+            for ingredient_id, name in self.names.items()
+            if name.startswith(tuple(variants))
+        )
+        result = [ingredient_id for _, ingredient_id in prefixed]
+        if len(variants[0]) < INGREDIENT_SEARCH_MIN_FUZZY_LENGTH:
+            return result
+        ranks = {}
+        for variant in variants:
+            for ingredient_id, rank in self.fuzzy_ranks(
+                    variant, threshold).items():
+                ranks[ingredient_id] = min(
+                    rank, ranks.get(ingredient_id, rank))
+        seen = set(result)
+        result.extend(
+            ingredient_id
+            for ingredient_id, _ in sorted(
+                ranks.items(),
+                key=lambda item: (item[1], self.names[item[0]]))
+            if ingredient_id not in seen
+        )
+        return result
+
+
+_index = BackgroundIndex(
+    'trigram-index',
+    lambda: TrigramIndex(Ingredient.objects.values_list('id', 'name')),
+    INGREDIENT_SEARCH_INDEX_TTL,
+)
+
+
+def get_trigram_index():
+    """
+    Возвращает индекс процесса. Устаревший по TTL или после изменений
+    справочника индекс отдаётся как есть, а новый собирается в фоне.
+    """
+    return _index.get()
+
+
+def invalidate_trigram_index():
+    _index.invalidate()
+
+
+def search_postgresql(queryset, variants):
+    """
+    Поиск средствами pg_trgm и fuzzystrmatch. Оператор % (lookup
+    trigram_similar) использует GIN-индекс ingredient_name_trgm_idx,
+    его порог pg_trgm.similarity_threshold по умолчанию 0.3.
+    Опечатки в начале имени проверяет levenshtein_less_equal
+    на строках со свёрнутыми гласными, как и индекс в памяти.
+    Полный перебор levenshtein по справочнику в пару тысяч строк
+    обходится дешевле отдельного индекса.
+    """
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    prefix = Q()
+    for variant in variants:
+        prefix |= Q(name__istartswith=variant)
+    if len(variants[0]) < INGREDIENT_SEARCH_MIN_FUZZY_LENGTH:
+        return queryset.filter(prefix).order_by('name')
+    budget = typo_budget(fold(variants[0]))
+    folded_name = Func(
+        Lower('name'), Value(VOWELS_FROM + 'ё'), Value(VOWELS_TO + 'и'),
+        function='translate'
+    )
+    # Расстояние до начала имени: сравниваются начала длиной ±budget.
+    distances = [
+        Func(
+            Substr(folded_name, 1, length), Value(fold(variant)),
+            Value(budget), function='levenshtein_less_equal',
+            output_field=IntegerField()
+        )
+        for variant in variants
+        for length in range(max(1, len(variant) - budget),
+                            len(variant) + budget + 1)
+    ]
+    similarities = [TrigramSimilarity('name', variant) for variant in variants]
+    condition = prefix | Q(distance__lte=budget)
+    for variant in variants:
+        condition |= Q(name__trigram_similar=variant)
+    return (
+        queryset
+        .annotate(
+            distance=(Least(*distances) if len(distances) > 1
+                      else distances[0]),
+            similarity=(Greatest(*similarities) if len(similarities) > 1
+                        else similarities[0]),
+        )
+        .filter(condition)
+        .annotate(match_rank=Case(
+            When(prefix, then=Value(0)),
+            When(distance__lte=budget, then=Value(1)),
+            default=Value(2),
+        ))
+        .order_by('match_rank', 'distance', '-similarity', 'name')
+    )
+
+
+def search_ingredients(queryset, query):
+    """
+    Нечёткий поиск ингредиентов с опечатками и латинской раскладкой.
+    Совпадения по началу имени идут первыми. На PostgreSQL работает
+    pg_trgm, на остальных базах — триграммный индекс в памяти процесса.
+    """
+    if connection.vendor == 'postgresql':
+        return search_postgresql(queryset, search_variants(query))
+    ids = get_trigram_index().search(query, INGREDIENT_SEARCH_SIMILARITY)
+    return queryset.filter(pk__in=ids).order_by(Case(
+        *(When(pk=pk, then=Value(position))
+          for position, pk in enumerate(ids)),
+        default=Value(len(ids)),
+    ))
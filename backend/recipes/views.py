@@ -0,0 +1,20 @@
+from django.http import Http404, HttpResponsePermanentRedirect
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+
+from .constants import SHORT_LINK_MAX_AGE
+from .models import Recipe
+from .short_links import resolve_short_code
+
+
+@require_safe
+def short_link_redirect(request, code):
+    """Перенаправляет короткую ссылку /s/<code>/ на страницу рецепта."""
+    try:
+        pk = resolve_short_code(code)
+    except Recipe.DoesNotExist:
+        raise Http404('Рецепт не найден.')
+    response = HttpResponsePermanentRedirect(
+        Recipe(pk=pk).get_absolute_url())
+    patch_cache_control(response, public=True, max_age=SHORT_LINK_MAX_AGE)
+    return response
@@ -1,18 +1,31 @@
 from django.contrib import admin
 from django.utils.html import format_html
 
+from recipes.admin_mixins import TombstoneAdminMixin
+from recipes.paginators import EstimatedCountPaginator
+from recipes.purge import tombstone_user
 from users.models import FoodgramUser, Subscription
 
 
 @admin.register(FoodgramUser)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(TombstoneAdminMixin, admin.ModelAdmin):
     list_display = (
         'email', 'username', 'first_name',
         'last_name', 'avatar_preview'
     )
-    list_filter = ('email', 'first_name')
+    list_filter = ('is_staff', 'is_active', 'date_joined')
     search_fields = ('username', 'email', 'first_name', 'last_name')
     readonly_fields = ('avatar_preview',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('mark_deleted',)
+    tombstone = staticmethod(tombstone_user)
+
+    @admin.action(description='Скрыть и удалить в фоне')
+    def mark_deleted(self, request, queryset):
+        """Блокирует пользователей и скрывает их рецепты."""
+        for user in queryset:
+            tombstone_user(user)
 
     @admin.display(description='Аватар')
     def avatar_preview(self, obj):
@@ -29,3 +42,7 @@ class SubscriptionAdmin(admin.ModelAdmin):
     list_display = ('user', 'author', 'date_added')
     search_fields = ('user__username', 'author__username')
     list_filter = ('date_added',)
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
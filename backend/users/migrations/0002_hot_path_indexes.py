@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-19 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['user', '-date_added'], name='subscription_user_date_idx'),
+        ),
+    ]
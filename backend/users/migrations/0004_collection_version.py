@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-19 09:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodgramuser',
+            name='collection_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Растёт при изменении избранного, корзины и подписок.', verbose_name='Версия коллекций'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+SEARCH_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def index_name(field):
+    return f'user_{field}_prefix_idx'
+
+
+def create_prefix_indexes(apps, schema_editor):
+    """
+    Индексы lower(поле) text_pattern_ops для поиска по началу строки
+    (LIKE 'слово%') при любой collation базы. Только для PostgreSQL.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in SEARCH_FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name(field)} '
+            f'ON users_foodgramuser (lower({field}) text_pattern_ops)'
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in SEARCH_FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name(field)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_collection_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
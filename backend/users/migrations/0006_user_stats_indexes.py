@@ -0,0 +1,21 @@
+# Generated by Django 4.2.23 on 2026-10-19 09:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='foodgramuser',
+            index=models.Index(fields=['date_joined'], name='user_date_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['date_added'], name='subscription_date_added_idx'),
+        ),
+    ]
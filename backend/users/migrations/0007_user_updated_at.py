@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-19 10:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_user_stats_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodgramuser',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Меняется при правке профиля, но не коллекций.', verbose_name='Профиль изменён'),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.db import models
+from django.db.models import Q
 
 MAX_LENGTH_EMAIL = 254
 MAX_LENGTH_USERNAME = 150
@@ -35,6 +36,24 @@ class FoodgramUser(AbstractUser):
         blank=True,
         verbose_name='Аватар'
     )
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Помечен на удаление',
+        help_text='Пользователь скрыт и будет удалён командой purge_deleted.'
+    )
+    collection_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия коллекций',
+        help_text='Растёт при изменении избранного, корзины и подписок.'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Профиль изменён',
+        help_text='Меняется при правке профиля, но не коллекций.'
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
@@ -43,6 +62,14 @@ class FoodgramUser(AbstractUser):
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ('username',)
+        indexes = (
+            models.Index(
+                fields=['deleted_at'],
+                condition=Q(deleted_at__isnull=False),
+                name='user_deleted_idx'
+            ),
+            models.Index(fields=['date_joined'], name='user_date_joined_idx'),
+        )
 
     def __str__(self) -> str:
         return f'{self.username}: {self.email}'
@@ -81,6 +108,16 @@ class Subscription(models.Model):
                 name='unique_author_user'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=['user', '-date_added'],
+                name='subscription_user_date_idx'
+            ),
+            models.Index(
+                fields=['date_added'],
+                name='subscription_date_added_idx'
+            ),
+        )
 
     def __str__(self) -> str:
         return f'{self.user.username} подписан на: {self.author.username}'